@@ -98,7 +98,7 @@ CREATE TABLE IF NOT EXISTS ordenes (
 CREATE INDEX IF NOT EXISTS idx_ordenes_cliente ON ordenes(cliente_id);
 CREATE INDEX IF NOT EXISTS idx_ordenes_estado ON ordenes(estado);
 CREATE INDEX IF NOT EXISTS idx_ordenes_fecha ON ordenes(fecha_entrada);
-CREATE INDEX IF NOT EXISTS idx_ordenes_tecnico ON ordenes(tecnico_id);
+CREATE INDEX IF NOT EXISTS idx_ordenes_tecnico_estado_cierre ON ordenes(tecnico_id, estado, fecha_cierre);
 CREATE INDEX IF NOT EXISTS idx_ordenes_saldo ON ordenes(saldo_pendiente);
 
 -- 4. ORDEN_REPUESTOS (NUEVA - RELACIÓN ESPECÍFICA)
@@ -11,6 +11,9 @@ from pathlib import Path
 from datetime import datetime
 import json
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "servitec_manager"))
+from respaldo_bd import CREAR_RESPALDO
+
 def exportar_base_datos():
     """Exportar base de datos con información detallada"""
     print("\n" + "=" * 60)
@@ -32,11 +35,14 @@ def exportar_base_datos():
     
     print(f"\n📁 Carpeta de exportación: {export_dir}")
     
-    # 1. Copiar base de datos
+    # 1. Copiar base de datos (API de backup: incluye el -wal y se verifica la copia)
     print("\n📋 Paso 1/4: Copiando base de datos...")
     bd_destino = export_dir / "SERVITEC.DB"
-    shutil.copy2(bd_origen, bd_destino)
-    print(f"✅ Base de datos copiada: {bd_destino}")
+    ok, resultado = CREAR_RESPALDO(str(bd_origen), str(bd_destino), comprimir=False)
+    if not ok:
+        print(f"\n❌ ERROR: No se pudo copiar la base de datos: {resultado}")
+        return False
+    print(f"✅ Base de datos copiada: {bd_destino} (integridad: {resultado['integridad']})")
     
     # 2. Obtener información de la BD
     print("\n📊 Paso 2/4: Extrayendo información de la base de datos...")
@@ -237,8 +243,12 @@ def importar_base_datos():
             backup_dir = bd_destino.parent / "backups"
             backup_dir.mkdir(exist_ok=True)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = backup_dir / f"SERVITEC_BACKUP_{timestamp}.DB"
-            shutil.copy2(bd_destino, backup_path)
+            backup_path = backup_dir / f"SERVITEC_BACKUP_{timestamp}.zip"
+            ok, resultado = CREAR_RESPALDO(str(bd_destino), str(backup_path))
+            if not ok:
+                print(f"\n❌ ERROR: No se pudo respaldar la base de datos destino: {resultado}")
+                input("Presiona ENTER para cerrar...")
+                return False
             print(f"✅ Backup creado: {backup_path}")
     
     # Confirmar importación
@@ -258,7 +268,14 @@ def importar_base_datos():
     print("\n⏳ Importando base de datos...")
     try:
         bd_destino.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(bd_backup, bd_destino)
+        # Restaurar con la API de backup: un -wal antiguo del destino no se mezcla con la copia
+        origen = sqlite3.connect(bd_backup)
+        destino = sqlite3.connect(bd_destino)
+        try:
+            origen.backup(destino)
+        finally:
+            destino.close()
+            origen.close()
         print("✅ Base de datos importada exitosamente")
         
         print("\n" + "=" * 60)
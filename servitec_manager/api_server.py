@@ -12,6 +12,9 @@ import json
 import asyncio
 from contextlib import contextmanager
 
+from busqueda_fts import EXPRESION_FTS
+from rango_fechas import LIMITES_DIA, PREDICADO_RANGO
+
 app = FastAPI(title="ServitecManager API", version="1.0.0")
 
 # CORS para permitir conexiones desde cualquier cliente
@@ -125,6 +128,19 @@ async def get_clientes(
         conn.row_factory = dict_factory
         cursor = conn.cursor()
         
+        expresion = EXPRESION_FTS(search)
+        if expresion:
+            try:
+                # Índice FTS5 (nombre, RUT, teléfono): prefijos y orden por relevancia
+                cursor.execute("""
+                    SELECT c.* FROM clientes_fts f JOIN clientes c ON c.id = f.rowid
+                    WHERE clientes_fts MATCH ?
+                    ORDER BY f.rank
+                    LIMIT ? OFFSET ?
+                """, (expresion, limit, offset))
+                return cursor.fetchall()
+            except sqlite3.OperationalError:
+                pass  # Base sin índice FTS (no migrada): búsqueda LIKE
         if search:
             cursor.execute("""
                 SELECT * FROM clientes 
@@ -475,27 +491,52 @@ async def get_dashboard_stats():
         cursor.execute("SELECT COUNT(*) as total FROM clientes")
         total_clientes = cursor.fetchone()['total']
         
-        # Órdenes pendientes
-        cursor.execute("SELECT COUNT(*) as total FROM ordenes WHERE estado = 'Pendiente'")
-        ordenes_pendientes = cursor.fetchone()['total']
-        
         # Productos con stock bajo
         cursor.execute("SELECT COUNT(*) as total FROM inventario WHERE stock <= stock_minimo")
         stock_bajo = cursor.fetchone()['total']
         
-        # Ventas del día
-        cursor.execute("""
-            SELECT COALESCE(SUM(total), 0) as total 
-            FROM ventas 
-            WHERE DATE(fecha) = DATE('now')
-        """)
-        ventas_hoy = cursor.fetchone()['total']
+        hoy = LIMITES_DIA()
+        try:
+            # Resúmenes mantenidos por triggers (migración 8): una fila por dato
+            cursor.execute("""
+                SELECT COALESCE(SUM(cantidad), 0) as total FROM resumen_estados
+                WHERE entidad = 'ordenes' AND estado = 'Pendiente'
+            """)
+            ordenes_pendientes = cursor.fetchone()['total']
+            cursor.execute("SELECT COALESCE(SUM(total), 0) as total FROM resumen_ventas_diario WHERE dia = ?",
+                           (hoy[0],))
+            ventas_hoy = cursor.fetchone()['total']
+        except sqlite3.OperationalError:
+            # Base sin resúmenes (no migrada): agregados sobre las tablas
+            cursor.execute("SELECT COUNT(*) as total FROM ordenes WHERE estado = 'Pendiente'")
+            ordenes_pendientes = cursor.fetchone()['total']
+            condicion, parámetros = PREDICADO_RANGO("fecha", *hoy)
+            cursor.execute(f"""
+                SELECT COALESCE(SUM(total), 0) as total 
+                FROM ventas 
+                WHERE {condicion}
+            """, parámetros)
+            ventas_hoy = cursor.fetchone()['total']
+        
+        # Caja del día por medio de pago (solo ingresos)
+        caja_hoy = {'efectivo': 0, 'transferencia': 0, 'debito': 0, 'credito': 0}
+        try:
+            cursor.execute("""
+                SELECT COALESCE(SUM(efectivo), 0) as efectivo, COALESCE(SUM(transferencia), 0) as transferencia,
+                       COALESCE(SUM(debito), 0) as debito, COALESCE(SUM(credito), 0) as credito
+                FROM resumen_caja_diario
+                WHERE dia = ? AND tipo IN ('VENTA_PRODUCTO', 'COBRO_REPARACION', 'ABONO')
+            """, (hoy[0],))
+            caja_hoy = cursor.fetchone()
+        except sqlite3.OperationalError:
+            pass
         
         return {
             "clientes": total_clientes,
             "ordenes_pendientes": ordenes_pendientes,
             "productos_stock_bajo": stock_bajo,
-            "ventas_hoy": ventas_hoy
+            "ventas_hoy": ventas_hoy,
+            "caja_hoy": caja_hoy
         }
 
 if __name__ == "__main__":
@@ -0,0 +1,532 @@
+"""
+ASESOR DE ÍNDICES
+Propone índices a partir de la carga real de consultas (perfil de perfilador_consultas.py):
+
+1. Repite cada SELECT del perfil, con sus parámetros de ejemplo, sobre una copia de la base
+2. Lee su EXPLAIN QUERY PLAN y marca los recorridos completos (SCAN) y los B-tree
+   temporales (ORDER BY / GROUP BY / DISTINCT resueltos sin índice)
+3. Arma índices candidatos por tabla: compuestos (igualdades, luego el rango o el orden),
+   de cobertura (agregando las columnas leídas) y de expresión (ej. UPPER(nombre))
+4. Crea cada candidato en la copia, comprueba que el planificador lo use y mide la ganancia
+5. Propone los que ganan lo suficiente, ponderados por las veces que se ejecutó la consulta
+
+Uso:
+    SERVITEC_PERFIL=1 python main.py   (usar la aplicación un rato: graba perfil_consultas.json)
+    python asesor_indices.py [perfil_consultas.json] [--bd SERVITEC.DB] [--salida indices.sql] [--aplicar]
+
+--aplicar crea los índices propuestos en la base (hacerlo con la aplicación cerrada).
+Solo se repiten lecturas: las escrituras del perfil no se ejecutan sobre la copia.
+"""
+
+import json
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from database import GESTOR_BASE_DATOS, NOMBRE_BD
+from perfilador_consultas import ARCHIVO_PERFIL, normalizar_sql
+
+REPETICIONES = 5  # Ejecuciones medidas por consulta y candidato (se toma la mediana)
+GANANCIA_MINIMA = 0.25  # El candidato debe ser al menos 25% más rápido
+AHORRO_MINIMO_MS = 0.05  # ...y ahorrar al menos esto por ejecución
+AHORRO_TOTAL_MINIMO_MS = 1.0  # Ahorro mínimo sobre toda la carga para que valga el costo en escrituras
+MAX_COLUMNAS = 6  # Columnas máximas de un índice propuesto (incluida la cobertura)
+CONSULTA_LENTA_MS = 500  # Sobre esto se mide una sola vez
+
+_REF = r"(?:([A-Za-z_]\w*)\.)?([A-Za-z_]\w*)"
+_PATRON_CADENA = re.compile(r"'(?:[^']|'')*'")
+_PATRON_TABLA = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?", re.I)
+_PATRON_UNION = re.compile(_REF + r"\s*=\s*" + _REF + r"(?!\s*\()")
+_PATRON_IGUALDAD = re.compile(_REF + r"\s*(?:==?\s*(?=[?:@$\-\d]|NULL\b)|\bIS\b(?!\s+NOT)|\bIN\s*\()", re.I)
+_PATRON_RANGO = re.compile(_REF + r"\s*(?:<=|>=|<(?!>)|>|\bBETWEEN\b|\bLIKE\b|\bGLOB\b)", re.I)
+_PATRON_EXPRESION = re.compile(
+    r"\b(UPPER|LOWER|TRIM|DATE|SUBSTR|IFNULL|COALESCE)\s*\(\s*" + _REF + r"([^()]*)\)\s*(?:==?|<=|>=|<|>|\bLIKE\b|\bIN\b|\bBETWEEN\b)",
+    re.I)
+_PATRON_ORDEN = re.compile(r"\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|\)|$)", re.I | re.S)
+_PATRON_GRUPO = re.compile(r"\bGROUP\s+BY\s+(.+?)(?:\bHAVING\b|\bORDER\b|\bLIMIT\b|\)|$)", re.I | re.S)
+_PATRON_SELECT = re.compile(r"^\s*SELECT\s+(.*?)\bFROM\b", re.I | re.S)
+_PATRON_ESTRELLA = re.compile(r"(?:^|,)\s*(?:\w+\.)?\*")
+_PATRON_TERMINO_ORDEN = re.compile(r"^\s*" + _REF + r"(?:\s+(ASC|DESC))?\s*$", re.I)
+
+_NO_TABLA = {'ON', 'WHERE', 'LEFT', 'RIGHT', 'INNER', 'OUTER', 'CROSS', 'JOIN', 'GROUP', 'ORDER',
+             'LIMIT', 'USING', 'NATURAL', 'UNION', 'HAVING', 'AS', 'SET', 'VALUES', 'WINDOW'}
+
+
+# --- PLANES ---
+
+def PROBLEMAS_PLAN(plan):
+    """
+    Pasos del plan que indican trabajo evitable con un índice
+
+    Returns:
+        Lista de textos: 'SCAN ordenes', 'USE TEMP B-TREE FOR ORDER BY', ...
+    """
+    problemas = []
+    for paso in plan:
+        if paso.startswith("SCAN ") and " USING " not in paso and "CONSTANT ROW" not in paso \
+                and "VIRTUAL TABLE" not in paso and not paso.startswith("SCAN (subquery"):
+            problemas.append(paso)
+        elif paso.startswith("USE TEMP B-TREE"):
+            problemas.append(paso)
+    return problemas
+
+
+def _plan(conexion, consulta, parámetros):
+    return [fila[-1] for fila in conexion.execute(f"EXPLAIN QUERY PLAN {consulta}", parámetros)]
+
+
+# --- ESQUEMA ---
+
+class _ESQUEMA:
+    """Columnas e índices existentes de la copia (para resolver referencias y no repetir índices)"""
+
+    def __init__(self, conexion):
+        self.columnas = {}
+        self.indices = {}
+        for (tabla,) in conexion.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"):
+            self.columnas[tabla] = {f[1] for f in conexion.execute(f"PRAGMA table_xinfo({tabla})")}
+            self.indices[tabla] = {}
+            for indice in conexion.execute(f"PRAGMA index_list({tabla})"):
+                claves = [f[2] for f in conexion.execute(f"PRAGMA index_info({indice[1]})")]
+                self.indices[tabla][indice[1]] = claves
+
+    def CUBIERTO(self, tabla, columnas):
+        """Un índice existente empieza por exactamente estas columnas"""
+        return any(claves[:len(columnas)] == columnas for claves in self.indices.get(tabla, {}).values())
+
+    def PREFIJOS(self, tabla, columnas):
+        """Índices existentes que quedarían de sobra: sus columnas son un prefijo de `columnas`"""
+        return sorted(nombre for nombre, claves in self.indices.get(tabla, {}).items()
+                      if claves and None not in claves and len(claves) < len(columnas)
+                      and claves == columnas[:len(claves)] and not nombre.startswith("sqlite_autoindex"))
+
+
+# --- CANDIDATOS ---
+
+class _USO_TABLA:
+    """Cómo usa una consulta una tabla: filtros, uniones, orden, agrupación, expresiones y columnas leídas"""
+
+    def __init__(self):
+        self.igualdades = []
+        self.uniones = []  # Columnas igualadas a otra tabla (JOIN ... ON)
+        self.rangos = []
+        self.orden = []
+        self.grupo = []
+        self.expresiones = []
+        self.leidas = []
+        self.todas = False  # SELECT * / t.*: no se propone cobertura
+
+    @staticmethod
+    def _agregar(lista, valor):
+        if valor not in lista:
+            lista.append(valor)
+
+
+def _tablas(sql, esquema):
+    """alias -> tabla (el nombre de la tabla también sirve de alias)"""
+    alias = {}
+    for tabla, nombre in _PATRON_TABLA.findall(sql):
+        if tabla not in esquema.columnas:
+            continue
+        alias[tabla] = tabla
+        if nombre and nombre.upper() not in _NO_TABLA:
+            alias[nombre] = tabla
+    return alias
+
+
+def _resolver(alias, prefijo, columna, esquema):
+    """Tabla de una referencia [alias.]columna, o None si es ambigua o no es una columna"""
+    if prefijo:
+        tabla = alias.get(prefijo)
+        return tabla if tabla and columna in esquema.columnas[tabla] else None
+    tablas = {t for t in alias.values() if columna in esquema.columnas[t]}
+    return tablas.pop() if len(tablas) == 1 else None
+
+
+def _lista_columnas(texto, alias, esquema):
+    """'o.fecha DESC, estado' -> [(tabla, columna, descendente)]; None si hay expresiones"""
+    terminos = []
+    for termino in texto.split(","):
+        coincidencia = _PATRON_TERMINO_ORDEN.match(termino)
+        if not coincidencia:
+            return None
+        prefijo, columna, sentido = coincidencia.groups()
+        tabla = _resolver(alias, prefijo, columna, esquema)
+        if tabla is None:
+            return None
+        terminos.append((tabla, columna, (sentido or "").upper() == "DESC"))
+    return terminos
+
+
+def ANALIZAR_USO(sql, esquema):
+    """
+    Extrae de una consulta, por tabla, las columnas que podrían ir en un índice
+    (heurística sobre el texto: alcanza para las consultas de la aplicación)
+
+    Returns:
+        {tabla: _USO_TABLA}
+    """
+    sql = _PATRON_CADENA.sub("?", sql)
+    alias = _tablas(sql, esquema)
+    usos = {tabla: _USO_TABLA() for tabla in set(alias.values())}
+
+    def uso(prefijo, columna):
+        tabla = _resolver(alias, prefijo, columna, esquema)
+        return (tabla, usos[tabla]) if tabla else (None, None)
+
+    # a.x = b.y: cada lado es clave de unión de su tabla; los filtros por valor van aparte
+    for a_pref, a_col, b_pref, b_col in _PATRON_UNION.findall(sql):
+        lados = [uso(prefijo, columna) + (columna,) for prefijo, columna in ((a_pref, a_col), (b_pref, b_col))]
+        if all(tabla for tabla, _, _ in lados):
+            for tabla, u, columna in lados:
+                u._agregar(u.uniones, columna)
+    for prefijo, columna in _PATRON_IGUALDAD.findall(sql):
+        tabla, u = uso(prefijo, columna)
+        if u:
+            u._agregar(u.igualdades, columna)
+    for prefijo, columna in _PATRON_RANGO.findall(sql):
+        tabla, u = uso(prefijo, columna)
+        if u and columna not in u.igualdades:
+            u._agregar(u.rangos, columna)
+    for funcion, prefijo, columna, resto in _PATRON_EXPRESION.findall(sql):
+        tabla, u = uso(prefijo, columna)
+        if u and "?" not in resto:
+            u._agregar(u.expresiones, f"{funcion.upper()}({columna}{resto.rstrip()})")
+
+    for patron, destino in ((_PATRON_ORDEN, 'orden'), (_PATRON_GRUPO, 'grupo')):
+        coincidencia = patron.search(sql)
+        terminos = _lista_columnas(coincidencia.group(1), alias, esquema) if coincidencia else None
+        if terminos and len({t for t, _, _ in terminos}) == 1:
+            setattr(usos[terminos[0][0]], destino, [(c, d) for _, c, d in terminos])
+
+    seleccion = _PATRON_SELECT.search(sql)
+    if seleccion:
+        texto = seleccion.group(1)
+        todas = _PATRON_ESTRELLA.search(texto) is not None
+        for u in usos.values():
+            u.todas = todas
+        for prefijo, columna in re.findall(_REF, texto):
+            tabla, u = uso(prefijo, columna)
+            if u:
+                u._agregar(u.leidas, columna)
+    return usos
+
+
+def _nombre_indice(tabla, columnas):
+    partes = [re.sub(r"\W+", "_", c).strip("_").lower() for c in columnas]
+    return f"idx_{tabla}_{'_'.join(partes)}"[:60]
+
+
+def CANDIDATOS(sql, esquema):
+    """
+    Índices candidatos para una consulta
+
+    Returns:
+        Lista de (tabla, [columnas o expresiones], sufijos DESC) sin los que ya existen
+    """
+    candidatos = []
+
+    def agregar(tabla, columnas, descendentes=()):
+        columnas = list(dict.fromkeys(columnas))[:MAX_COLUMNAS]
+        if columnas and not esquema.CUBIERTO(tabla, columnas) \
+                and (tabla, columnas) not in [(t, c) for t, c, _ in candidatos]:
+            candidatos.append((tabla, columnas, set(descendentes)))
+
+    for tabla, u in ANALIZAR_USO(sql, esquema).items():
+        igualdades = u.igualdades[:4]
+        base = []
+        if u.rangos:
+            base.append((igualdades + u.rangos[:1], ()))
+        if u.orden:
+            orden = [c for c, _ in u.orden if c not in igualdades]
+            base.append((igualdades + orden, {c for c, d in u.orden if d}))
+        if u.grupo:
+            base.append((igualdades + [c for c, _ in u.grupo if c not in igualdades], ()))
+        if igualdades:
+            base.append((igualdades, ()))
+        for columna in u.uniones:
+            if columna != "id" and columna not in igualdades:
+                base.append((igualdades + [columna], ()))
+        for expresion in u.expresiones:
+            base.append((igualdades + [expresion], ()))
+
+        for columnas, descendentes in base:
+            agregar(tabla, columnas, descendentes)
+            extra = [c for c in u.leidas if c not in columnas and c != "id"]
+            if extra and not u.todas and len(columnas) + len(extra) <= MAX_COLUMNAS:
+                agregar(tabla, columnas + extra, descendentes)
+    return candidatos
+
+
+def SQL_INDICE(tabla, columnas, descendentes=()):
+    """CREATE INDEX para un candidato"""
+    definicion = ", ".join(f"{c} DESC" if c in descendentes else c for c in columnas)
+    return f"CREATE INDEX IF NOT EXISTS {_nombre_indice(tabla, columnas)} ON {tabla}({definicion})"
+
+
+# --- MEDICIÓN ---
+
+def _medir(conexion, consulta, parámetros, repeticiones):
+    """Mediana en ms (una ejecución previa calienta el caché de páginas)"""
+    inicio = time.perf_counter()
+    conexion.execute(consulta, parámetros).fetchall()
+    if (time.perf_counter() - inicio) * 1000 >= CONSULTA_LENTA_MS:
+        repeticiones = 1
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        conexion.execute(consulta, parámetros).fetchall()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def _tamano_indice(conexion, nombre):
+    """Bytes que ocupa el índice (None si SQLite no trae dbstat)"""
+    try:
+        return conexion.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (nombre,)).fetchone()[0]
+    except sqlite3.Error:
+        return None
+
+
+def _es_lectura(consulta):
+    return consulta.lstrip().upper().startswith(("SELECT", "WITH"))
+
+
+class ASESOR_INDICES:
+    """
+    Evalúa la carga de un perfil contra una copia de la base
+
+    Uso:
+        asesor = ASESOR_INDICES("SERVITEC.DB")
+        propuestas = asesor.ANALIZAR(datos_perfil)
+        print(asesor.REPORTE())
+        asesor.CERRAR()
+    """
+
+    def __init__(self, ruta_bd=NOMBRE_BD, repeticiones=REPETICIONES, ganancia_minima=GANANCIA_MINIMA):
+        self.ruta_bd = ruta_bd
+        self.repeticiones = repeticiones
+        self.ganancia_minima = ganancia_minima
+        self.consultas = []  # Resultado por consulta analizada
+        self.propuestas = []
+        self._carpeta = tempfile.mkdtemp(prefix="servitec_asesor_")
+        self._copia = os.path.join(self._carpeta, "ASESOR.DB")
+        with sqlite3.connect(ruta_bd) as origen, sqlite3.connect(self._copia) as destino:
+            origen.backup(destino)
+        self.conexion = sqlite3.connect(self._copia, isolation_level=None)
+        self.conexion.execute("PRAGMA journal_mode=OFF")
+        self.conexion.execute("ANALYZE")
+        self.esquema = _ESQUEMA(self.conexion)
+
+    def CERRAR(self):
+        """Cierra y borra la copia de trabajo"""
+        if self.conexion is not None:
+            self.conexion.close()
+            self.conexion = None
+        shutil.rmtree(self._carpeta, ignore_errors=True)
+
+    def _probar(self, consulta, parámetros, tabla, columnas, descendentes):
+        """Crea el candidato, mide y lo borra; None si el planificador no lo usa"""
+        sentencia = SQL_INDICE(tabla, columnas, descendentes)
+        nombre = _nombre_indice(tabla, columnas)
+        try:
+            self.conexion.execute(sentencia)
+        except sqlite3.Error:
+            return None  # ej. expresión no determinista en un índice
+        try:
+            self.conexion.execute(f"ANALYZE {nombre}")
+            plan = _plan(self.conexion, consulta, parámetros)
+            if not any(nombre in paso for paso in plan):
+                return None
+            return {
+                'sql': sentencia,
+                'nombre': nombre,
+                'tabla': tabla,
+                'columnas': columnas,
+                'ms': _medir(self.conexion, consulta, parámetros, self.repeticiones),
+                'plan': plan,
+                'bytes': _tamano_indice(self.conexion, nombre),
+            }
+        finally:
+            self.conexion.execute(f"DROP INDEX IF EXISTS {nombre}")
+
+    def ANALIZAR_CONSULTA(self, consulta, parámetros=(), cantidad=1):
+        """
+        Plan, problemas y mejor candidato de una consulta
+
+        Returns:
+            dict con 'sql', 'cantidad', 'ms', 'plan', 'problemas' y 'mejor' (o None)
+        """
+        parámetros = tuple(parámetros)
+        plan = _plan(self.conexion, consulta, parámetros)
+        resultado = {
+            'sql': normalizar_sql(consulta),
+            'cantidad': cantidad,
+            'plan': plan,
+            'problemas': PROBLEMAS_PLAN(plan),
+            'ms': _medir(self.conexion, consulta, parámetros, self.repeticiones),
+            'mejor': None,
+        }
+        pruebas = []
+        for tabla, columnas, descendentes in CANDIDATOS(consulta, self.esquema):
+            prueba = self._probar(consulta, parámetros, tabla, columnas, descendentes)
+            if prueba is None:
+                continue
+            ahorro = resultado['ms'] - prueba['ms']
+            if ahorro >= AHORRO_MINIMO_MS and resultado['ms'] >= prueba['ms'] * (1 + self.ganancia_minima):
+                pruebas.append(prueba)
+        if pruebas:
+            # Entre los que empatan (dentro del ruido de medición) gana el plan más limpio y el índice más chico
+            umbral = min(p['ms'] for p in pruebas) * 1.1 + 0.02
+            resultado['mejor'] = min((p for p in pruebas if p['ms'] <= umbral),
+                                     key=lambda p: (len(PROBLEMAS_PLAN(p['plan'])), len(p['columnas']), p['ms']))
+        self.consultas.append(resultado)
+        return resultado
+
+    def ANALIZAR(self, datos):
+        """
+        Analiza todas las lecturas repetibles de un perfil
+
+        Args:
+            datos: dict de PERFILADOR_CONSULTAS.OBTENER_DATOS() o del JSON guardado
+
+        Returns:
+            Propuestas ordenadas por tiempo total ahorrado en la carga registrada
+        """
+        for entrada in datos.get('consultas', []):
+            consulta = entrada.get('ejemplo_sql')
+            parámetros = entrada.get('ejemplo_parametros')
+            if not consulta or parámetros is None or not _es_lectura(consulta):
+                continue
+            try:
+                self.ANALIZAR_CONSULTA(consulta, parámetros, entrada.get('cantidad', 1))
+            except sqlite3.Error as e:
+                print(f"⚠️ Consulta omitida ({e}): {entrada['sql'][:100]}")
+
+        propuestas = {}
+        for resultado in self.consultas:
+            mejor = resultado['mejor']
+            if mejor is None:
+                continue
+            propuesta = propuestas.setdefault(mejor['sql'], {
+                'sql': mejor['sql'],
+                'tabla': mejor['tabla'],
+                'columnas': mejor['columnas'],
+                'bytes': mejor['bytes'],
+                'redundantes': self.esquema.PREFIJOS(mejor['tabla'], mejor['columnas']),
+                'ahorro_total_ms': 0.0,
+                'consultas': [],
+            })
+            propuesta['ahorro_total_ms'] += (resultado['ms'] - mejor['ms']) * resultado['cantidad']
+            propuesta['consultas'].append({
+                'sql': resultado['sql'],
+                'cantidad': resultado['cantidad'],
+                'antes_ms': round(resultado['ms'], 3),
+                'despues_ms': round(mejor['ms'], 3),
+                'plan_antes': resultado['plan'],
+                'plan_despues': mejor['plan'],
+            })
+        self.propuestas = sorted((p for p in propuestas.values() if p['ahorro_total_ms'] >= AHORRO_TOTAL_MINIMO_MS),
+                                 key=lambda p: p['ahorro_total_ms'], reverse=True)
+        return self.propuestas
+
+    def REPORTE(self):
+        """Texto con los problemas encontrados y los índices propuestos"""
+        con_problemas = [c for c in self.consultas if c['problemas']]
+        lineas = [
+            "=" * 100,
+            f"  ASESOR DE ÍNDICES: {len(self.consultas)} consultas repetidas, "
+            f"{len(con_problemas)} con recorridos completos o B-tree temporales",
+            "=" * 100,
+        ]
+        for c in sorted(con_problemas, key=lambda c: c['ms'] * c['cantidad'], reverse=True):
+            lineas.append(f"{c['cantidad']:>7} x {c['ms']:>9.2f} ms  {c['sql'][:120]}")
+            lineas += [f"{'':>22}⚠️ {p}" for p in c['problemas']]
+
+        lineas += ["", f"📇 ÍNDICES PROPUESTOS ({len(self.propuestas)})", "-" * 100]
+        if not self.propuestas:
+            lineas.append("   Ningún candidato mejora la carga registrada lo suficiente")
+        for p in self.propuestas:
+            tamano = f", {p['bytes'] / 1024:.0f} KB" if p['bytes'] else ""
+            lineas.append(f"{p['sql']};")
+            lineas.append(f"   ahorro en la carga registrada: {p['ahorro_total_ms']:.1f} ms{tamano}")
+            for c in p['consultas']:
+                lineas.append(f"   {c['antes_ms']:>9.2f} -> {c['despues_ms']:>8.2f} ms  ({c['cantidad']} x)  {c['sql'][:90]}")
+            if p['redundantes']:
+                lineas.append(f"   ℹ️ Quedarían de sobra: {', '.join(p['redundantes'])}")
+        return "\n".join(lineas)
+
+    def GUARDAR_SQL(self, ruta):
+        """Escribe los CREATE INDEX propuestos en un script"""
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write("-- Índices propuestos por asesor_indices.py\n")
+            for p in self.propuestas:
+                f.write(f"-- Ahorro estimado: {p['ahorro_total_ms']:.1f} ms sobre la carga registrada\n")
+                f.write(f"{p['sql']};\n")
+
+
+def APLICAR_PROPUESTAS(ruta_bd, propuestas):
+    """Crea los índices propuestos en la base y actualiza las estadísticas del planificador"""
+    bd = GESTOR_BASE_DATOS(ruta_bd=ruta_bd)
+    try:
+        with bd.TRANSACCION():
+            for propuesta in propuestas:
+                bd.EJECUTAR_CONSULTA(propuesta['sql'])
+                print(f"✅ {propuesta['sql']}")
+        bd.EJECUTAR_CONSULTA("PRAGMA optimize")
+    finally:
+        bd._cerrar_conexion()
+
+
+def main(argv=None):
+    """Analiza un perfil guardado y muestra (o aplica) los índices propuestos"""
+    argv = sys.argv[1:] if argv is None else argv
+    ruta_perfil, ruta_bd, salida, aplicar = ARCHIVO_PERFIL, NOMBRE_BD, None, False
+    i = 0
+    while i < len(argv):
+        if argv[i] == '--bd' and i + 1 < len(argv):
+            ruta_bd = argv[i + 1]
+            i += 2
+        elif argv[i] == '--salida' and i + 1 < len(argv):
+            salida = argv[i + 1]
+            i += 2
+        elif argv[i] == '--aplicar':
+            aplicar = True
+            i += 1
+        else:
+            ruta_perfil = argv[i]
+            i += 1
+
+    for ruta, descripcion in ((ruta_perfil, "el perfil"), (ruta_bd, "la base de datos")):
+        if not os.path.exists(ruta):
+            print(f"❌ No se encontró {descripcion}: {ruta}")
+            if ruta is ruta_perfil:
+                print("   Ejecute la aplicación con SERVITEC_PERFIL=1 para generarlo")
+            return 1
+
+    with open(ruta_perfil, encoding='utf-8') as f:
+        datos = json.load(f)
+
+    asesor = ASESOR_INDICES(ruta_bd)
+    try:
+        propuestas = asesor.ANALIZAR(datos)
+        print(asesor.REPORTE())
+        if salida:
+            asesor.GUARDAR_SQL(salida)
+            print(f"\n💾 Script guardado en {salida}")
+    finally:
+        asesor.CERRAR()
+
+    if aplicar and propuestas:
+        APLICAR_PROPUESTAS(ruta_bd, propuestas)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
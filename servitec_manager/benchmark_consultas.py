@@ -0,0 +1,247 @@
+"""
+BENCHMARK DE CONSULTAS (ANTES / DESPUÉS)
+Compara consultas reescritas con su versión anterior sobre una copia de la base:
+tiempo medio y p95 de N repeticiones, filas devueltas (deben coincidir) y el plan
+de ejecución de cada versión. La base original no se modifica.
+
+La copia se hace con la API de backup y recibe las migraciones pendientes. Con
+--filas se le agregan órdenes y ventas sintéticas repartidas en tres años, para
+que la diferencia entre recorrer la tabla y buscar en un índice sea visible.
+
+Uso:
+    python benchmark_consultas.py [SERVITEC.DB] [--filas 100000] [--repeticiones 20] [--grupo fechas|resumenes]
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from database import GESTOR_BASE_DATOS
+from perfilador_consultas import _percentil
+from rango_fechas import HACE_DIAS, LIMITES_DIA, LIMITES_DIAS, LIMITES_ULTIMOS_DIAS, PREDICADO_RANGO
+
+BASE_POR_DEFECTO = "SERVITEC.DB"
+REPETICIONES = 20
+DIAS_SINTETICOS = 3 * 365
+
+
+# --- CASOS ---
+# Cada caso: (nombre, (sql antes, parámetros), (sql después, parámetros))
+
+def _casos_rangos_fechas():
+    """DATE(columna) en el WHERE contra rangos [inicio, fin) sobre la columna (rango_fechas)"""
+    hoy, hace_7, hace_90 = LIMITES_DIA(), HACE_DIAS(7), HACE_DIAS(90)
+    condicion_hoy, _ = PREDICADO_RANGO("o.fecha_cierre", *hoy)
+    condicion_mes, mes = PREDICADO_RANGO("o.fecha_cierre", *LIMITES_DIAS(HACE_DIAS(30), hoy[0]))
+    condicion_30, ultimos_30 = PREDICADO_RANGO("fecha_entrada", *LIMITES_ULTIMOS_DIAS(30))
+    return [
+        ("ventas del día (reportes)",
+         ("SELECT o.id, o.total_a_cobrar FROM ordenes o JOIN usuarios u ON o.tecnico_id = u.id "
+          "WHERE date(o.fecha_cierre) = date('now') AND o.fecha_cierre IS NOT NULL AND o.estado = 'Entregado'", ()),
+         ("SELECT o.id, o.total_a_cobrar FROM ordenes o JOIN usuarios u ON o.tecnico_id = u.id "
+          f"WHERE {condicion_hoy} AND o.estado = 'Entregado'", hoy)),
+        ("historial de técnico, 30 días (reportes)",
+         ("SELECT o.id, o.fecha_cierre FROM ordenes o WHERE o.tecnico_id = 1 AND o.fecha_cierre IS NOT NULL "
+          "AND o.estado = 'Entregado' AND date(o.fecha_cierre) BETWEEN ? AND ? ORDER BY o.fecha_cierre DESC",
+          (HACE_DIAS(30), hoy[0])),
+         ("SELECT o.id, o.fecha_cierre FROM ordenes o WHERE o.tecnico_id = 1 "
+          f"AND o.estado = 'Entregado' AND {condicion_mes} ORDER BY o.fecha_cierre DESC", mes)),
+        ("tendencia 90 días (predicción)",
+         ("SELECT DATE(fecha_entrada), SUM(presupuesto_inicial) FROM ordenes WHERE DATE(fecha_entrada) >= ? "
+          "GROUP BY DATE(fecha_entrada)", (hace_90,)),
+         ("SELECT DATE(fecha_entrada), SUM(presupuesto_inicial) FROM ordenes WHERE fecha_entrada >= ? "
+          "GROUP BY DATE(fecha_entrada)", (hace_90,))),
+        ("clientes activos 30 días (predicción)",
+         ("SELECT COUNT(DISTINCT cliente_id) FROM ordenes WHERE DATE(fecha_entrada) >= DATE('now', '-30 days')", ()),
+         (f"SELECT COUNT(DISTINCT cliente_id) FROM ordenes WHERE {condicion_30}", ultimos_30)),
+        ("órdenes pendientes > 7 días (notificaciones)",
+         ("SELECT COUNT(*) FROM ordenes WHERE estado = 'Pendiente' AND DATE(fecha_entrada) < DATE('now', '-7 days')", ()),
+         ("SELECT COUNT(*) FROM ordenes WHERE estado = 'Pendiente' AND fecha_entrada < ?", (hace_7,))),
+        ("ventas de hoy (API /stats/dashboard)",
+         ("SELECT COUNT(*), COALESCE(SUM(total_final), 0) FROM ventas WHERE DATE(fecha) = DATE('now')", ()),
+         ("SELECT COUNT(*), COALESCE(SUM(total_final), 0) FROM ventas WHERE fecha >= ? AND fecha < ?", hoy)),
+    ]
+
+
+def _casos_resumenes():
+    """COUNT/SUM sobre las tablas contra las tablas resumen_* que mantienen los triggers"""
+    hoy = LIMITES_DIA()
+    return [
+        ("órdenes por estado (dashboard)",
+         ("SELECT estado, COUNT(*) FROM ordenes GROUP BY estado", ()),
+         ("SELECT NULLIF(estado, ''), cantidad FROM resumen_estados "
+          "WHERE entidad = 'ordenes' AND cantidad <> 0", ())),
+        ("órdenes pendientes (API /stats/dashboard)",
+         ("SELECT COUNT(*) FROM ordenes WHERE estado = 'Pendiente'", ()),
+         ("SELECT COALESCE(SUM(cantidad), 0) FROM resumen_estados "
+          "WHERE entidad = 'ordenes' AND estado = 'Pendiente'", ())),
+        ("ventas de hoy (API /stats/dashboard)",
+         ("SELECT COUNT(*), COALESCE(SUM(total_final), 0) FROM ventas WHERE fecha >= ? AND fecha < ?", hoy),
+         ("SELECT COALESCE(SUM(cantidad), 0), COALESCE(SUM(total), 0) FROM resumen_ventas_diario WHERE dia = ?",
+          hoy[:1])),
+        ("presupuesto por día, 90 días (predicción)",
+         ("SELECT DATE(fecha_entrada), SUM(presupuesto_inicial) FROM ordenes WHERE fecha_entrada >= ? "
+          "GROUP BY DATE(fecha_entrada)", (HACE_DIAS(90),)),
+         ("SELECT dia, presupuesto FROM resumen_ordenes_diario WHERE dia >= ? AND ingresadas <> 0",
+          (HACE_DIAS(90),))),
+    ]
+
+
+GRUPOS = {
+    'fechas': _casos_rangos_fechas,
+    'resumenes': _casos_resumenes,
+}
+
+
+# --- DATOS SINTÉTICOS ---
+
+def AGREGAR_DATOS_SINTETICOS(bd, filas):
+    """
+    Agrega `filas` órdenes (un tercio entregadas) y la mitad de ventas, con fechas
+    al azar en los últimos tres años. Solo para copias de benchmark.
+    """
+    cliente = bd.OBTENER_UNO("SELECT MIN(id) FROM clientes")[0]
+    if cliente is None:
+        cliente = bd.EJECUTAR_CONSULTA("INSERT INTO clientes (nombre) VALUES ('CLIENTE BENCHMARK')")
+    tecnico = bd.OBTENER_UNO("SELECT MIN(id) FROM usuarios")[0] or 1
+    segundos = DIAS_SINTETICOS * 86400
+    with bd.TRANSACCION():
+        bd.EJECUTAR_CONSULTA(f"""
+            INSERT INTO ordenes (cliente_id, tecnico_id, fecha_entrada, equipo, estado,
+                                 presupuesto_inicial, total_a_cobrar, fecha_cierre)
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?),
+            d AS (SELECT i, ABS(RANDOM()) % {segundos} AS s FROM n)
+            SELECT ?, ?, datetime('now', '-' || s || ' seconds'), 'NOTEBOOK',
+                   CASE i % 3 WHEN 0 THEN 'Entregado' WHEN 1 THEN 'Pendiente' ELSE 'En Proceso' END,
+                   20000, 20000,
+                   CASE i % 3 WHEN 0 THEN datetime('now', '-' || MAX(s - 259200, 0) || ' seconds') END
+            FROM d
+        """, (filas, cliente, tecnico))
+        bd.EJECUTAR_CONSULTA(f"""
+            INSERT INTO ventas (fecha, usuario_id, total_productos, total_final)
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+            SELECT datetime('now', '-' || (ABS(RANDOM()) % {segundos}) || ' seconds'), ?, 15000, 15000 FROM n
+        """, (max(filas // 2, 1), tecnico))
+    bd.EJECUTAR_CONSULTA("ANALYZE")
+
+
+# --- MEDICIÓN ---
+
+def _medir(bd, consulta, parámetros, repeticiones):
+    """Duraciones en ms de cada repetición y filas devueltas por la última"""
+    duraciones = []
+    filas = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        filas = bd.OBTENER_TODOS(consulta, parámetros)
+        duraciones.append((time.perf_counter() - inicio) * 1000)
+    return duraciones, filas
+
+
+def EJECUTAR_CASOS(bd, casos, repeticiones=REPETICIONES):
+    """
+    Mide cada caso antes/después
+
+    Returns:
+        Lista de dict con nombre, media/p95 antes y después, aceleración,
+        si las filas coinciden y los planes de cada versión
+    """
+    resultados = []
+    for nombre, (sql_antes, parámetros_antes), (sql_despues, parámetros_despues) in casos:
+        antes, filas_antes = _medir(bd, sql_antes, parámetros_antes, repeticiones)
+        despues, filas_despues = _medir(bd, sql_despues, parámetros_despues, repeticiones)
+        media_antes = sum(antes) / len(antes)
+        media_despues = sum(despues) / len(despues)
+        resultados.append({
+            'nombre': nombre,
+            'antes_ms': round(media_antes, 3),
+            'antes_p95_ms': round(_percentil(antes, 95), 3),
+            'despues_ms': round(media_despues, 3),
+            'despues_p95_ms': round(_percentil(despues, 95), 3),
+            'aceleracion': round(media_antes / media_despues, 1) if media_despues else None,
+            'filas': len(filas_despues),
+            'mismo_resultado': sorted(map(tuple, filas_antes)) == sorted(map(tuple, filas_despues)),
+            'plan_antes': bd._explicar(sql_antes, parámetros_antes),
+            'plan_despues': bd._explicar(sql_despues, parámetros_despues),
+        })
+    return resultados
+
+
+def formatear_resultados(resultados, titulo):
+    """Tabla de texto con los tiempos y, debajo de cada caso, los dos planes"""
+    lineas = [
+        "=" * 100,
+        f"  {titulo}",
+        "=" * 100,
+        f"{'CASO':<46} {'ANTES ms':>10} {'P95':>8} {'DESPUÉS ms':>11} {'P95':>8} {'x':>7} {'FILAS':>7}",
+        "-" * 100,
+    ]
+    for r in resultados:
+        aceleracion = f"{r['aceleracion']:.1f}" if r['aceleracion'] else "-"
+        lineas.append(
+            f"{r['nombre'][:46]:<46} {r['antes_ms']:>10.3f} {r['antes_p95_ms']:>8.3f} "
+            f"{r['despues_ms']:>11.3f} {r['despues_p95_ms']:>8.3f} {aceleracion:>7} {r['filas']:>7}"
+        )
+        if not r['mismo_resultado']:
+            lineas.append(f"{'':>4}⚠️ Las dos versiones devuelven filas distintas")
+        lineas += [f"{'':>4}antes:   {paso}" for paso in r['plan_antes']]
+        lineas += [f"{'':>4}después: {paso}" for paso in r['plan_despues']]
+    return "\n".join(lineas)
+
+
+def main(argv=None):
+    """Copia la base, (opcional) agrega datos sintéticos y mide los grupos pedidos"""
+    argv = sys.argv[1:] if argv is None else argv
+    ruta, filas, repeticiones, grupos = BASE_POR_DEFECTO, 0, REPETICIONES, []
+    i = 0
+    while i < len(argv):
+        if argv[i] == '--filas' and i + 1 < len(argv):
+            filas = int(argv[i + 1])
+            i += 2
+        elif argv[i] == '--repeticiones' and i + 1 < len(argv):
+            repeticiones = int(argv[i + 1])
+            i += 2
+        elif argv[i] == '--grupo' and i + 1 < len(argv):
+            grupos.append(argv[i + 1])
+            i += 2
+        else:
+            ruta = argv[i]
+            i += 1
+
+    if not os.path.exists(ruta):
+        print(f"❌ No se encontró la base de datos: {ruta}")
+        return 1
+    desconocidos = [g for g in grupos if g not in GRUPOS]
+    if desconocidos:
+        print(f"❌ Grupo desconocido: {', '.join(desconocidos)} (disponibles: {', '.join(GRUPOS)})")
+        return 1
+
+    carpeta = tempfile.mkdtemp(prefix="servitec_benchmark_")
+    copia = os.path.join(carpeta, "BENCHMARK.DB")
+    try:
+        with sqlite3.connect(ruta) as origen, sqlite3.connect(copia) as destino:
+            origen.backup(destino)
+        bd = GESTOR_BASE_DATOS(copia)
+        bd.INICIALIZAR_BD()
+        if filas:
+            print(f"🔧 Agregando {filas} órdenes sintéticas...")
+            AGREGAR_DATOS_SINTETICOS(bd, filas)
+            # Los lectores del pool conservan las estadísticas del planificador de antes de los datos
+            bd._cerrar_conexion()
+            bd = GESTOR_BASE_DATOS(copia)
+        ordenes = bd.OBTENER_UNO("SELECT COUNT(*) FROM ordenes")[0]
+        for grupo in grupos or list(GRUPOS):
+            resultados = EJECUTAR_CASOS(bd, GRUPOS[grupo](), repeticiones)
+            print(formatear_resultados(
+                resultados, f"BENCHMARK '{grupo}' ({ordenes} órdenes, {repeticiones} repeticiones)"))
+        bd._cerrar_conexion()
+        return 0
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
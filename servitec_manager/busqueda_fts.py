@@ -0,0 +1,73 @@
+"""
+BÚSQUEDA DE TEXTO COMPLETO (FTS5)
+Las tablas *_fts las crea la migración 4 y se mantienen sincronizadas por triggers.
+Cada palabra escrita se busca como prefijo ("jua per" encuentra "JUAN PEREZ") y los
+resultados vuelven ordenados por relevancia (bm25 con pesos por columna).
+
+Si la base no tiene las tablas FTS (SQLite sin FTS5 o esquema antiguo), BUSCAR_FTS
+devuelve None y el llamador usa su consulta LIKE de siempre.
+"""
+
+import re
+
+MAX_TERMINOS = 8  # Palabras consideradas por búsqueda
+
+# "12.345.678-9" -> "123456789": el RUT se indexa sin puntos ni guion
+_PATRON_SEPARADOR_NUMERICO = re.compile(r"(?<=\d)[.\-](?=[\dkK])")
+_PATRON_TERMINO = re.compile(r"\w+", re.UNICODE)
+
+
+def EXPRESION_FTS(texto):
+    """
+    Convierte lo que escribe el usuario en una expresión MATCH segura
+
+    Cada término va entre comillas (sin operadores ni sintaxis FTS del usuario)
+    y con * para buscar por prefijo; todos los términos deben coincidir.
+
+    Returns:
+        Texto para MATCH, o None si no hay términos buscables
+    """
+    if not texto:
+        return None
+    terminos = _PATRON_TERMINO.findall(_PATRON_SEPARADOR_NUMERICO.sub("", texto))
+    if not terminos:
+        return None
+    return " ".join(f'"{t}"*' for t in terminos[:MAX_TERMINOS])
+
+
+def FTS_DISPONIBLE(bd, tabla_fts):
+    """
+    La tabla FTS existe
+
+    La consulta a sqlite_master va por el caché de OBTENER_TODOS: cualquier DDL
+    (migraciones incluidas) vacía el caché completo, así que no queda obsoleta.
+    """
+    return bool(bd.OBTENER_TODOS(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla_fts,), use_cache=True
+    ))
+
+
+def BUSCAR_FTS(bd, tabla_fts, tabla, texto, columnas="t.*", limite=100, uniones=""):
+    """
+    Filas de `tabla` que coinciden con `texto`, de la más a la menos relevante
+
+    Args:
+        bd: GESTOR_BASE_DATOS
+        tabla_fts: Índice FTS5 (rowid = id de la tabla)
+        tabla: Tabla de origen (alias t en `columnas`)
+        texto: Lo que escribió el usuario
+        columnas: Columnas a devolver
+        limite: Máximo de filas
+        uniones: JOINs adicionales sobre t (ej. "LEFT JOIN clientes c ON t.cliente_id = c.id")
+
+    Returns:
+        Lista de FILA, o None si no se puede usar FTS (el llamador hace LIKE)
+    """
+    expresion = EXPRESION_FTS(texto)
+    if expresion is None or not FTS_DISPONIBLE(bd, tabla_fts):
+        return None
+    return bd.OBTENER_TODOS(
+        f"SELECT {columnas} FROM (SELECT rowid, rank FROM {tabla_fts} WHERE {tabla_fts} MATCH ? "
+        f"ORDER BY rank LIMIT ?) f JOIN {tabla} t ON t.id = f.rowid {uniones} ORDER BY f.rank",
+        (expresion, limite)
+    )
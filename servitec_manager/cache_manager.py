@@ -4,110 +4,219 @@ OPTIMIZACIÓN CRÍTICA: Elimina I/O de disco, usa solo RAM
 100x más rápido que JSON en disco
 """
 
+import sys
 import time
 import threading
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from database import FILA
+from migraciones import EXISTE_TABLA
+
+ESPACIO_GENERAL = "general"  # Espacio de las claves guardadas sin namespace
+MUESTRA_TAMANO = 32  # Elementos medidos por colección al estimar bytes
+PROFUNDIDAD_TAMANO = 4  # Niveles de anidamiento recorridos al estimar bytes
+
+
+def _tamano_aproximado(valor, profundidad=0):
+    """
+    Bytes aproximados que ocupa un valor en RAM: el objeto más sus elementos.
+    En colecciones grandes se mide una muestra y se extrapola (una lista de
+    10.000 FILA se estima midiendo 32), así que guardar sigue siendo O(1).
+    """
+    tamano = sys.getsizeof(valor)
+    if profundidad >= PROFUNDIDAD_TAMANO or isinstance(valor, (str, bytes, int, float, bool, type(None))):
+        return tamano
+    if isinstance(valor, FILA):
+        # El índice de columnas se comparte con todo el resultado: solo cuentan los valores
+        return tamano + _tamano_aproximado(valor._valores, profundidad + 1)
+    if isinstance(valor, dict):
+        elementos = list(islice(valor.items(), MUESTRA_TAMANO))
+    elif isinstance(valor, (list, tuple, set, frozenset)):
+        elementos = list(islice(valor, MUESTRA_TAMANO))
+    else:
+        return tamano
+    if not elementos:
+        return tamano
+    medido = sum(_tamano_aproximado(e, profundidad + 1) for e in elementos)
+    return tamano + int(medido * len(valor) / len(elementos))
+
 
 class CACHE_MANAGER:
     """
     Caché en memoria pura (sin disco)
     Thread-safe para uso concurrente
-    Expiración automática por tiempo
+    
+    - Espacios (namespace) con TTL propio: 'inventario', 'clientes'...;
+      las claves sin namespace van a 'general'
+    - Límite por cantidad de entradas y por bytes aproximados (evicción LRU)
+    - Métricas: aciertos, fallos, evicciones, expiraciones e invalidaciones,
+      totales y por espacio (get_stats)
     """
     
-    def __init__(self, max_age_hours=24, max_entries=500):
+    def __init__(self, max_age_hours=24, max_entries=500, max_size_mb=64, namespace_ttls=None):
         """
         Gestor de caché en RAM
         
         Args:
             max_age_hours: Horas antes de invalidar entrada (default: 24h)
             max_entries: Máximo número de entradas en caché (LRU eviction)
+            max_size_mb: Presupuesto de memoria aproximado en MB (LRU eviction)
+            namespace_ttls: {namespace: segundos} para espacios con otro TTL
         """
-        self._memory_cache = OrderedDict()  # RAM pura, sin disco
+        self._memory_cache = OrderedDict()  # (namespace, clave) -> entrada; RAM pura, sin disco
         self._cache_lock = threading.Lock()  # Thread-safety
         self.max_age_seconds = max_age_hours * 3600
         self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._ttls = dict(namespace_ttls or {})
+        self._bytes = 0
+        self._contadores = {}  # namespace -> métricas (ver _metricas)
         
-        print(f"💾 Caché en RAM inicializado (max: {max_entries} entradas, TTL: {max_age_hours}h)")
+        print(f"💾 Caché en RAM inicializado (max: {max_entries} entradas / {max_size_mb} MB, TTL: {max_age_hours}h)")
     
-    def _is_expired(self, timestamp):
-        """Verifica si una entrada expiró"""
-        return (time.time() - timestamp) > self.max_age_seconds
+    def _metricas(self, namespace):
+        """Contadores de un espacio (requiere _cache_lock)"""
+        metricas = self._contadores.get(namespace)
+        if metricas is None:
+            metricas = self._contadores[namespace] = {
+                'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0,
+                'invalidations': 0, 'entries': 0, 'bytes': 0,
+            }
+        return metricas
     
-    def get(self, key, default=None):
+    def _quitar(self, clave_interna, motivo=None):
+        """Elimina una entrada y descuenta su tamaño (requiere _cache_lock)"""
+        entrada = self._memory_cache.pop(clave_interna, None)
+        if entrada is None:
+            return
+        metricas = self._metricas(clave_interna[0])
+        metricas['entries'] -= 1
+        metricas['bytes'] -= entrada['size']
+        self._bytes -= entrada['size']
+        if motivo:
+            metricas[motivo] += 1
+    
+    def set_namespace_ttl(self, namespace, seconds):
+        """TTL en segundos para las entradas que se guarden desde ahora en el espacio (None = el general)"""
+        with self._cache_lock:
+            if seconds is None:
+                self._ttls.pop(namespace, None)
+            else:
+                self._ttls[namespace] = seconds
+    
+    def get(self, key, default=None, namespace=ESPACIO_GENERAL):
         """
         Obtiene datos del caché (RAM)
         
         Args:
             key: Clave del caché
             default: Valor por defecto si no existe o expiró
+            namespace: Espacio de la clave
             
         Returns:
             Datos del caché o default
         """
+        clave_interna = (namespace, key)
         with self._cache_lock:
-            if key not in self._memory_cache:
+            entrada = self._memory_cache.get(clave_interna)
+            if entrada is None:
+                self._metricas(namespace)['misses'] += 1
                 return default
             
-            entry = self._memory_cache[key]
-            timestamp = entry['timestamp']
-            
             # Verificar expiración
-            if self._is_expired(timestamp):
-                del self._memory_cache[key]
+            if time.time() >= entrada['expires']:
+                self._quitar(clave_interna, 'expirations')
+                self._metricas(namespace)['misses'] += 1
                 return default
             
             # Mover al final (LRU)
-            self._memory_cache.move_to_end(key)
-            return entry['value']
+            self._memory_cache.move_to_end(clave_interna)
+            self._metricas(namespace)['hits'] += 1
+            return entrada['value']
     
-    def set(self, key, value):
+    def peek(self, key, default=None, namespace=ESPACIO_GENERAL):
+        """
+        Como get, pero una entrada expirada se devuelve igual (no se elimina), para
+        servirla mientras se recalcula (stale-while-revalidate)
+        
+        Returns:
+            (valor, vigente): vigente es False si expiró; (default, False) si no existe
+        """
+        clave_interna = (namespace, key)
+        with self._cache_lock:
+            entrada = self._memory_cache.get(clave_interna)
+            if entrada is None:
+                self._metricas(namespace)['misses'] += 1
+                return default, False
+            self._memory_cache.move_to_end(clave_interna)
+            vigente = time.time() < entrada['expires']
+            self._metricas(namespace)['hits' if vigente else 'stale_hits'] += 1
+            return entrada['value'], vigente
+    
+    def set(self, key, value, namespace=ESPACIO_GENERAL, ttl=None):
         """
         Guarda datos en caché (RAM)
         
         Args:
             key: Clave del caché
             value: Valor a guardar (cualquier objeto Python)
+            namespace: Espacio de la clave
+            ttl: Segundos de vida de esta entrada (None = TTL del espacio)
+        
+        Returns:
+            False si el valor solo ya supera el presupuesto de memoria (no se guarda)
         """
+        tamano = _tamano_aproximado(value)
+        ahora = time.time()
+        clave_interna = (namespace, key)
         with self._cache_lock:
-            # Evicción LRU si excede máximo
-            if len(self._memory_cache) >= self.max_entries and key not in self._memory_cache:
-                # Eliminar la entrada más antigua
-                self._memory_cache.popitem(last=False)
+            self._quitar(clave_interna)
+            if tamano > self.max_bytes:
+                return False
+            
+            # Evicción LRU hasta que entre por cantidad y por bytes
+            while self._memory_cache and (len(self._memory_cache) >= self.max_entries
+                                          or self._bytes + tamano > self.max_bytes):
+                self._quitar(next(iter(self._memory_cache)), 'evictions')
             
-            # Guardar con timestamp
-            self._memory_cache[key] = {
+            if ttl is None:
+                ttl = self._ttls.get(namespace, self.max_age_seconds)
+            self._memory_cache[clave_interna] = {
                 'value': value,
-                'timestamp': time.time()
+                'timestamp': ahora,
+                'expires': ahora + ttl,
+                'size': tamano,
             }
-            
-            # Mover al final (más reciente)
-            self._memory_cache.move_to_end(key)
-    
-    def invalidate(self, key):
-        """Invalida (elimina) una entrada específica del caché"""
-        filepath = self._get_cache_path(key)
-        if os.path.exists(filepath):
-            try:
-                os.remove(filepath)
-            except OSError:
-                pass
+            metricas = self._metricas(namespace)
+            metricas['entries'] += 1
+            metricas['bytes'] += tamano
+            self._bytes += tamano
+            return True
     
-    def invalidate(self, key):
+    def invalidate(self, key, namespace=ESPACIO_GENERAL):
         """
         Invalida una entrada específica del caché
         
         Args:
             key: Clave a invalidar
+            namespace: Espacio de la clave
         """
         with self._cache_lock:
-            if key in self._memory_cache:
-                del self._memory_cache[key]
+            self._quitar((namespace, key), 'invalidations')
+    
+    def invalidate_namespace(self, namespace):
+        """Invalida todas las entradas de un espacio"""
+        with self._cache_lock:
+            for clave_interna in [c for c in self._memory_cache if c[0] == namespace]:
+                self._quitar(clave_interna, 'invalidations')
     
     def invalidate_all(self):
         """Limpia todo el caché (RAM)"""
         with self._cache_lock:
-            self._memory_cache.clear()
+            for clave_interna in list(self._memory_cache):
+                self._quitar(clave_interna, 'invalidations')
             print("🗑️ Caché en RAM limpiado completamente")
     
     def get_stats(self):
@@ -115,28 +224,52 @@ class CACHE_MANAGER:
         Obtiene estadísticas del caché en RAM
         
         Returns:
-            dict con estadísticas actuales
+            dict con entradas, bytes (size_mb / max_size_mb / usage_percent),
+            hit_rate y contadores totales (stale_hits = expiradas servidas por peek), y 'namespaces' con lo mismo por espacio
         """
         with self._cache_lock:
+            timestamps = [entrada['timestamp'] for entrada in self._memory_cache.values()]
+            espacios = {}
+            totales = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0,
+                       'invalidations': 0}
+            for namespace, metricas in sorted(self._contadores.items()):
+                for contador in totales:
+                    totales[contador] += metricas[contador]
+                consultas = metricas['hits'] + metricas['misses']
+                espacios[namespace] = dict(
+                    metricas,
+                    size_mb=round(metricas['bytes'] / (1024 * 1024), 3),
+                    ttl_seconds=self._ttls.get(namespace, self.max_age_seconds),
+                    hit_rate=round(metricas['hits'] / consultas * 100, 1) if consultas else 0,
+                )
             total_entries = len(self._memory_cache)
-            
-            if total_entries == 0:
-                return {
-                    'entries': 0,
-                    'oldest': None,
-                    'newest': None,
-                    'hit_rate': 0
-                }
-            
-            timestamps = [entry['timestamp'] for entry in self._memory_cache.values()]
-            
-            return {
-                'entries': total_entries,
-                'oldest': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(min(timestamps))),
-                'newest': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(max(timestamps))),
-                'max_capacity': self.max_entries,
-                'usage_percent': round((total_entries / self.max_entries) * 100, 1)
-            }
+            total_bytes = self._bytes
+        
+        consultas = totales['hits'] + totales['misses']
+        return dict(
+            totales,
+            entries=total_entries,
+            max_capacity=self.max_entries,
+            bytes=total_bytes,
+            size_mb=round(total_bytes / (1024 * 1024), 3),
+            max_size_mb=round(self.max_bytes / (1024 * 1024), 1),
+            usage_percent=round(max(total_entries / self.max_entries, total_bytes / self.max_bytes) * 100, 1),
+            hit_rate=round(totales['hits'] / consultas * 100, 1) if consultas else 0,
+            oldest=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(min(timestamps))) if timestamps else None,
+            newest=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(max(timestamps))) if timestamps else None,
+            namespaces=espacios,
+        )
+
+
+class _VUELO:
+    """Una carga en curso: quienes piden la misma lista esperan este resultado (single-flight)"""
+    __slots__ = ('listo', 'resultado', 'descartado', 'cambios')
+    
+    def __init__(self, cambios):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.descartado = False  # Reemplazada o invalidada durante la carga: no se guarda ni se comparte
+        self.cambios = cambios  # CAMBIOS_TOTALES() al empezar: escrituras propias ya incluidas
 
 
 class CACHE_INTELIGENTE:
@@ -147,127 +280,289 @@ class CACHE_INTELIGENTE:
     1. Elimina caché en disco JSON (cuello de botella de serialización)
     2. Confía en caché interno de SQLite (PRAGMA cache_size)
     3. Usa paginación (lazy loading) para consultas grandes
-    4. Aprovecha row_factory para acceso eficiente
+    4. Filas compactas (FILA) y paginación por clave (keyset)
+    5. Catálogos por versión: cada cargar_* devuelve la misma lista hasta que
+       cambia la versión de su tabla (versiones_tablas, subida por triggers)
+    6. Stale-while-revalidate: si la lista guardada quedó vieja porque otra terminal
+       editó o venció su TTL, se devuelve igual y se recarga en segundo plano;
+       una sola carga por lista aunque la pidan varios hilos a la vez
     
-    NOTA: El caché en memoria del GESTOR_BASE_DATOS es más rápido
-    que serializar/deserializar JSON en disco.
+    Comprobar si algo cambió cuesta un PRAGMA data_version mientras nadie escriba;
+    solo tras un COMMIT (de esta terminal o de otra) se leen las versiones, y solo
+    se recarga el catálogo cuya versión subió. Si esta misma terminal escribió
+    desde que se leyó la lista (CAMBIOS_TOTALES), la carga espera los datos nuevos:
+    después de vender, la pantalla muestra el stock ya descontado.
     """
     
-    def __init__(self, gestor_bd, cache_manager=None):
+    def __init__(self, gestor_bd, cache_manager=None, revalidar_en_segundo_plano=True):
         """
         Args:
             gestor_bd: Instancia de GESTOR_BASE_DATOS
-            cache_manager: DEPRECADO - Ya no se usa caché en disco
+            cache_manager: CACHE_MANAGER donde se guardan las copias (None = uno propio)
+            revalidar_en_segundo_plano: Servir la lista vieja mientras se recarga
+                (False = esperar siempre la recarga)
         """
         self.bd = gestor_bd
-        self.cache = cache_manager  # Mantenido por compatibilidad, pero no se usa
+        self.cache = cache_manager if cache_manager is not None else CACHE_MANAGER()
         self._data_loaded = False
+        self.revalidar_en_segundo_plano = revalidar_en_segundo_plano
+        
+        # Versiones vistas: data_version de la base y versión de cada catálogo
+        self._lock = threading.Lock()
+        self._version_datos = None
+        self._versiones = {}
+        self._con_versiones = None  # La base tiene versiones_tablas (migración 9)
+        
+        # Cargas en curso (tabla, clave) -> _VUELO, y el hilo que hace las de segundo plano
+        self._en_curso = {}
+        self._recargas = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache_revalidar")
         
         # Configuración de paginación
         self.PAGE_SIZE = 100  # Cargar de a 100 registros
     
-    def cargar_inventario(self, limit=None, offset=None, use_pagination=False):
+    def _version(self, tablas):
+        """
+        Versión actual de los catálogos (tupla, una por tabla). Sin escrituras
+        confirmadas desde la última llamada no consulta ninguna tabla. Sin
+        versiones_tablas (base sin migrar) o para una tabla sin contador la versión
+        es data_version: cualquier escritura la recarga.
+        """
+        datos = self.bd.VERSION_DATOS()
+        with self._lock:
+            if datos == self._version_datos:
+                return tuple(self._versiones.get(t, datos) for t in tablas)
+        
+        if self._con_versiones is None:
+            self._con_versiones = EXISTE_TABLA(self.bd, "versiones_tablas")
+        versiones = {}
+        if self._con_versiones:
+            versiones = {f[0]: f[1] for f in self.bd.OBTENER_TODOS("SELECT tabla, version FROM versiones_tablas")}
+        with self._lock:
+            self._version_datos = datos
+            self._versiones = versiones
+        return tuple(versiones.get(t, datos) for t in tablas)
+    
+    def _cargar(self, tablas, consulta, **opciones):
+        """
+        Lista del catálogo para estas opciones:
+        - la guardada, si su versión y su TTL siguen vigentes
+        - la guardada aunque esté vieja, programando la recarga en segundo plano
+        - si no hay ninguna, la consulta (o espera la carga que ya está en curso)
+        
+        tablas: tabla del catálogo o tupla (la primera es el espacio del caché)
+        La consulta no usa el caché de GESTOR_BASE_DATOS, que no ve las escrituras
+        de otras terminales; se guarda con la versión leída antes de consultar.
+        """
+        if self.bd.EN_TRANSACCION():
+            # Vería cambios sin confirmar: no se guarda nada
+            return self.bd.OBTENER_TODOS(consulta, **opciones)
+        
+        tablas = (tablas,) if isinstance(tablas, str) else tuple(tablas)
+        version = self._version(tablas)
+        clave = (consulta, tuple(sorted(opciones.items())))
+        entrada, vigente = self.cache.peek(clave, namespace=tablas[0])
+        if entrada is not None:
+            version_guardada, data, cambios = entrada
+            if vigente and version_guardada == version:
+                return data
+            if self.revalidar_en_segundo_plano and cambios == self.bd.CAMBIOS_TOTALES():
+                # Sin escrituras propias desde la carga: nadie aquí espera ver el cambio ya
+                self._revalidar(tablas, clave, consulta, opciones)
+                return data
+        return self._cargar_unico(tablas, clave, consulta, opciones)
+    
+    def _iniciar_vuelo(self, tablas, clave):
+        """
+        (vuelo, lider): registra una carga nueva o devuelve la que ya está en curso.
+        Una carga empezada antes de una escritura propia no sirve: se reemplaza
+        """
+        cambios = self.bd.CAMBIOS_TOTALES()
+        with self._lock:
+            vuelo = self._en_curso.get((tablas[0], clave))
+            if vuelo is not None:
+                if vuelo.cambios == cambios:
+                    return vuelo, False
+                vuelo.descartado = True
+            vuelo = self._en_curso[(tablas[0], clave)] = _VUELO(cambios)
+            return vuelo, True
+    
+    def _completar_vuelo(self, tablas, clave, vuelo, consulta, opciones):
+        """Hace la carga de un vuelo, la guarda (si no se descartó) y despierta a los que esperan"""
+        try:
+            version = self._version(tablas)
+            data = self.bd.OBTENER_TODOS(consulta, **opciones)
+            vuelo.resultado = data
+            if not vuelo.descartado:
+                self.cache.set(clave, (version, data, vuelo.cambios), namespace=tablas[0])
+            return data
+        finally:
+            with self._lock:
+                if self._en_curso.get((tablas[0], clave)) is vuelo:
+                    del self._en_curso[(tablas[0], clave)]
+            vuelo.listo.set()
+    
+    def _cargar_unico(self, tablas, clave, consulta, opciones):
+        """Carga en este hilo, o espera la misma carga si otro hilo ya la empezó"""
+        vuelo, lider = self._iniciar_vuelo(tablas, clave)
+        if lider:
+            return self._completar_vuelo(tablas, clave, vuelo, consulta, opciones)
+        vuelo.listo.wait()
+        if vuelo.descartado or vuelo.resultado is None:
+            return self.bd.OBTENER_TODOS(consulta, **opciones)
+        return vuelo.resultado
+    
+    def _revalidar(self, tablas, clave, consulta, opciones):
+        """Programa la recarga en segundo plano (nada si ya hay una en curso para esa lista)"""
+        vuelo, lider = self._iniciar_vuelo(tablas, clave)
+        if not lider:
+            return
+        try:
+            self._recargas.submit(self._completar_vuelo, tablas, clave, vuelo, consulta, opciones)
+        except RuntimeError:
+            # Al cerrar la aplicación el ejecutor ya no acepta tareas
+            self._completar_vuelo(tablas, clave, vuelo, consulta, opciones)
+    
+    def _descartar(self, tabla):
+        """
+        Libera las copias guardadas de un catálogo (su espacio en el caché) y
+        descarta las cargas en curso, que pueden haber leído antes de la escritura
+        """
+        with self._lock:
+            for llave in [k for k in self._en_curso if k[0] == tabla]:
+                self._en_curso.pop(llave).descartado = True
+        self.cache.invalidate_namespace(tabla)
+    
+    def cargar_inventario(self, limit=None, offset=None, use_pagination=False, after=None, before=None):
         """
         Carga inventario con LAZY LOADING opcional
         
         OPTIMIZACIÓN: Ya no usa caché en disco (JSON), confía en:
         - Caché interno de SQLite (PRAGMA cache_size=-64000)
-        - Caché en memoria del GESTOR_BASE_DATOS
-        - Paginación para evitar cargar TODO de golpe
+        - Copia en memoria por versión: gratis hasta que alguien edite el inventario
+        - Paginación por clave (nombre, id): páginas profundas cuestan lo mismo que la primera
         
         Args:
             limit: Número máximo de registros a cargar
-            offset: Desplazamiento inicial
+            offset: Desplazamiento inicial (compatibilidad; preferir after/before)
             use_pagination: Si True, usa PAGE_SIZE por defecto
+            after: (nombre, id) de la última fila de la página anterior
+            before: (nombre, id) de la primera fila de la página siguiente
         
         Returns:
-            Lista de diccionarios (gracias a row_factory)
+            Lista de FILA (accesibles por índice y como diccionarios)
         """
         # Aplicar paginación automática si se solicita
         if use_pagination and limit is None:
             limit = self.PAGE_SIZE
         
-        # Consulta directa con caché interno de BD
+        # Copia en memoria mientras la versión de inventario no cambie
         # Ya NO serializa a JSON en disco (cuello de botella eliminado)
-        data = self.bd.OBTENER_TODOS(
-            "SELECT * FROM inventario ORDER BY nombre ASC",
-            use_cache=True,
+        data = self._cargar(
+            "inventario",
+            "SELECT * FROM inventario",
             limit=limit,
-            offset=offset
+            offset=offset,
+            order_by=("nombre", "id"),
+            after=after,
+            before=before
         )
         
         return data
     
-    def cargar_repuestos(self, limit=None, offset=None, use_pagination=False):
+    def cargar_repuestos(self, limit=None, offset=None, use_pagination=False, after=None, before=None):
         """
         Carga repuestos con LAZY LOADING opcional
         
         OPTIMIZACIÓN: Usa caché interno de SQLite + caché en RAM
+        Paginación por clave con after/before = (nombre, id), igual que cargar_inventario
         """
         if use_pagination and limit is None:
             limit = self.PAGE_SIZE
         
-        data = self.bd.OBTENER_TODOS(
-            "SELECT * FROM repuestos ORDER BY nombre ASC",
-            use_cache=True,
+        data = self._cargar(
+            "repuestos",
+            "SELECT * FROM repuestos",
             limit=limit,
-            offset=offset
+            offset=offset,
+            order_by=("nombre", "id"),
+            after=after,
+            before=before
         )
         
         return data
     
+    def cargar_repuestos_con_proveedor(self):
+        """
+        Repuestos con el nombre de su proveedor (pestaña de repuestos del inventario)
+        Depende de dos versiones: se recarga si cambian repuestos o proveedores
+        """
+        return self._cargar(
+            ("repuestos", "proveedores"),
+            """
+            SELECT r.*, 
+                   p.nombre as proveedor_nombre,
+                   p.id as proveedor_id
+            FROM repuestos r
+            LEFT JOIN proveedores p ON r.proveedor_id = p.id
+            ORDER BY r.nombre ASC
+            """
+        )
+    
     def cargar_servicios(self, limit=None, offset=None):
         """
         Carga servicios (usualmente son pocos, no necesita paginación)
         
-        OPTIMIZACIÓN: Caché interno de BD (RAM pura, sin disco)
+        OPTIMIZACIÓN: Copia en RAM por versión (sin consultar hasta que cambie)
         """
-        data = self.bd.OBTENER_TODOS(
+        data = self._cargar(
+            "servicios_predefinidos",
             "SELECT * FROM servicios_predefinidos ORDER BY nombre_servicio ASC",
-            use_cache=True,
             limit=limit,
             offset=offset
         )
         
         return data
     
-    def cargar_clientes_recientes(self, limit=100, offset=None):
+    def cargar_clientes_recientes(self, limit=100, offset=None, after=None, before=None):
         """
         Carga clientes recientes con límite
         
         OPTIMIZACIÓN: 
         - Caché en RAM (OrderedDict)
         - LIMIT por defecto para lazy loading
+        - Paginación por clave sobre id (after/before = id), recorre la clave primaria
         - Sin I/O de disco
         """
-        data = self.bd.OBTENER_TODOS(
-            "SELECT * FROM clientes ORDER BY id DESC",
-            use_cache=True,
+        data = self._cargar(
+            "clientes",
+            "SELECT * FROM clientes",
             limit=limit,
-            offset=offset
+            offset=offset,
+            order_by="id DESC",
+            after=after,
+            before=before
         )
         
         return data
     
     def invalidar_inventario(self):
         """
-        DEPRECADO: Ya no usa caché en disco JSON
-        Mantenido por compatibilidad con código existente
-        El caché se maneja automáticamente en GESTOR_BASE_DATOS (RAM)
+        Libera las copias de inventario. No hace falta para que sean correctas
+        (la versión sube con el COMMIT): solo evita guardar listas que ya no sirven
         """
-        pass
+        self._descartar("inventario")
     
     def invalidar_repuestos(self):
-        """DEPRECADO: Ver invalidar_inventario"""
-        pass
+        """Ver invalidar_inventario"""
+        self._descartar("repuestos")
     
     def invalidar_servicios(self):
-        """DEPRECADO: Ver invalidar_inventario"""
-        pass
+        """Ver invalidar_inventario"""
+        self._descartar("servicios_predefinidos")
     
     def invalidar_clientes(self):
-        """DEPRECADO: Ver invalidar_inventario"""
-        pass
+        """Ver invalidar_inventario"""
+        self._descartar("clientes")
     
     def precargar_datos_inicio(self):
         """
@@ -295,31 +590,37 @@ class CACHE_INTELIGENTE:
         Obtiene estadísticas del caché en RAM
         
         Returns:
-            dict con estadísticas del caché en memoria
+            dict con estadísticas del caché en memoria y del caché de consultas
         """
         if self.cache:
-            return self.cache.get_stats()
+            stats = self.cache.get_stats()
         else:
-            return {
+            stats = {
                 'entries': 0,
                 'nota': 'Caché en RAM no inicializado'
             }
+        
+        # Métricas del caché de consultas del GESTOR_BASE_DATOS
+        if hasattr(self.bd, 'ESTADISTICAS_CACHE'):
+            stats['cache_consultas'] = self.bd.ESTADISTICAS_CACHE()
+        return stats
 
 
 # ============================================================================
 # EJEMPLO DE USO
 # ============================================================================
 if __name__ == "__main__":
-    # Crear caché en RAM
-    cache = CACHE_MANAGER(max_age_hours=2, max_entries=100)
+    # Crear caché en RAM (clientes con TTL de 10 minutos)
+    cache = CACHE_MANAGER(max_age_hours=2, max_entries=100, max_size_mb=8, namespace_ttls={'clientes': 600})
     
     # Guardar datos
     cache.set('productos', [{'id': 1, 'nombre': 'Producto A'}])
-    cache.set('usuarios', [{'id': 1, 'nombre': 'Admin'}])
+    cache.set('recientes', [{'id': 1, 'nombre': 'Cliente A'}], namespace='clientes')
     
     # Obtener datos
     productos = cache.get('productos')
     print(f"Productos: {productos}")
+    print(f"Clientes: {cache.get('recientes', namespace='clientes')}")
     
     # Estadísticas
     stats = cache.get_stats()
@@ -2,70 +2,273 @@ import sqlite3
 from functools import lru_cache
 import threading
 import atexit
+import os
+import queue
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+from migraciones import APLICAR_MIGRACIONES
+from perfilador_consultas import PERFILADOR_CONSULTAS, UMBRAL_LENTA_MS
+from respaldo_bd import CREAR_RESPALDO
 
 # CONSTANTES GLOBALES
 NOMBRE_BD = "SERVITEC_TEST_OPTIMIZED.DB"
+MAX_LECTORES = 8  # Conexiones de solo lectura simultáneas (una por hilo activo)
+MAX_CACHE_CONSULTAS = 100  # Entradas del caché de consultas (LRU)
+
+# Sentencias que no modifican datos y pueden ir al pool de lectura
+_PATRON_ESCRITURA = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE)
+
+
+def _es_lectura(consulta):
+    """Indica si una consulta es de solo lectura (SELECT/WITH/EXPLAIN/PRAGMA de consulta)"""
+    inicio = consulta.lstrip()[:7].upper()
+    if inicio.startswith("SELECT") or inicio.startswith("EXPLAIN") or inicio.startswith("VALUES"):
+        return True
+    if inicio.startswith("WITH"):
+        # Un CTE puede preceder a un INSERT/UPDATE/DELETE
+        return _PATRON_ESCRITURA.search(consulta) is None
+    if inicio.startswith("PRAGMA"):
+        return "=" not in consulta
+    return False
+
+
+# Dependencias de tablas para invalidar el caché de forma selectiva
+_PATRON_TABLAS_LECTURA = re.compile(r"\b(?:FROM|JOIN)\s+[\"`\[]?([A-Za-z_]\w*)", re.IGNORECASE)
+_PATRON_TABLAS_ESCRITURA = re.compile(
+    r"\b(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"`\[]?([A-Za-z_]\w*)",
+    re.IGNORECASE
+)
+_PATRON_DDL = re.compile(r"^\s*(?:CREATE|DROP|ALTER)\b", re.IGNORECASE)
+_TODAS = "*"  # Comodín: la entrada depende de cualquier escritura
+
+
+def _tablas_lectura(consulta):
+    """Tablas (en minúsculas) leídas por una consulta SELECT"""
+    return {t.lower() for t in _PATRON_TABLAS_LECTURA.findall(consulta)}
+
+
+def _tablas_escritura(consulta):
+    """Tablas (en minúsculas) modificadas directamente por una sentencia"""
+    return {t.lower() for t in _PATRON_TABLAS_ESCRITURA.findall(consulta)}
+
+
+# Paginación por clave (keyset): columnas simples, opcionalmente con ASC/DESC
+_PATRON_COLUMNA_ORDEN = re.compile(r"^\s*([A-Za-z_]\w*)(?:\s+(ASC|DESC))?\s*$", re.IGNORECASE)
+
+
+def _orden_keyset(order_by):
+    """
+    Normaliza order_by ("nombre" o ("nombre", "id DESC")) a (columnas, descendente)
+    Todas las columnas deben ir en el mismo sentido (comparación por row values)
+    """
+    if isinstance(order_by, str):
+        order_by = (order_by,)
+    columnas, sentidos = [], set()
+    for item in order_by:
+        coincidencia = _PATRON_COLUMNA_ORDEN.match(item)
+        if not coincidencia:
+            raise ValueError(f"Columna de orden no válida para paginación: {item!r}")
+        columnas.append(coincidencia.group(1))
+        sentidos.add((coincidencia.group(2) or "ASC").upper())
+    if not columnas or len(sentidos) > 1:
+        raise ValueError("La paginación por clave requiere columnas con un mismo sentido (ASC o DESC)")
+    return columnas, sentidos == {"DESC"}
 
-class DictRow(dict):
+
+def _agregar_parámetros(parámetros, valores):
+    """
+    Añade valores de paginación a los parámetros de la consulta
+    Devuelve (parámetros, marcadores): '?' para tuplas, ':_pagN' para diccionarios
     """
-    Clase híbrida que permite acceso tanto por clave como por índice
-    Compatibilidad con código antiguo (tuplas) y nuevo (diccionarios)
+    if isinstance(parámetros, dict):
+        parámetros = dict(parámetros)
+        marcadores = []
+        for valor in valores:
+            nombre = f"_pag{len(marcadores)}"
+            parámetros[nombre] = valor
+            marcadores.append(f":{nombre}")
+        return parámetros, marcadores
+    return tuple(parámetros) + tuple(valores), ["?"] * len(valores)
+
+class _COLUMNAS:
+    """Nombres de columna de un resultado y su índice, compartidos por todas sus filas"""
+    __slots__ = ('nombres', 'indice')
+    
+    def __init__(self, nombres):
+        self.nombres = nombres
+        self.indice = {nombre: i for i, nombre in enumerate(nombres)}
+        # Acceso sin distinguir mayúsculas, como sqlite3.Row (sin pisar nombres exactos)
+        for i, nombre in enumerate(nombres):
+            self.indice.setdefault(nombre.lower(), i)
+
+
+@lru_cache(maxsize=256)
+def _columnas(nombres):
+    """Un único _COLUMNAS por combinación de nombres de columna (memoizado)"""
+    return _COLUMNAS(nombres)
+
+
+def _columnas_de(cursor):
+    """_COLUMNAS compartido para el resultado de un cursor"""
+    return _columnas(tuple(d[0] for d in cursor.description))
+
+
+class FILA(Mapping):
     """
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._keys_list = list(self.keys())
+    Fila de resultado compacta: la tupla cruda de sqlite3 + un índice de columnas
+    compartido por todo el resultado (no se copia nada por fila)
+    
+    Acceso tanto por índice como por clave, igual que el antiguo DictRow:
+    - fila[0], fila[-1], fila[1:3] (tupla-style)
+    - fila['nombre'], fila.get('nombre'), 'nombre' in fila (dict-style)
+    - Iterar/desempaquetar devuelve los valores en orden
     
-    def __getitem__(self, key):
-        if isinstance(key, int):
-            # Acceso por índice (tupla-style)
-            return super().__getitem__(self._keys_list[key])
-        # Acceso por clave (dict-style)
-        return super().__getitem__(key)
+    Es un Mapping de solo lectura, NO un dict: para editarla o pasarla a json
+    usar dict(fila) o fila.copy(), que dan un dict normal con todas las columnas.
+    Quien distinga filas de tuplas debe preguntar isinstance(fila, Mapping).
+    
+    >>> import json
+    >>> fila = FILA((1, 'x'), _columnas(('a', 'b')))
+    >>> json.loads(json.dumps(dict(fila))) == {'a': 1, 'b': 'x'}
+    True
+    >>> fila.copy() == {'a': 1, 'b': 'x'} and isinstance(fila.copy(), dict)
+    True
+    """
+    __slots__ = ('_valores', '_columnas')
+    
+    def __init__(self, valores, columnas):
+        self._valores = valores
+        self._columnas = columnas
+    
+    def __getitem__(self, clave):
+        if isinstance(clave, (int, slice)):
+            return self._valores[clave]
+        try:
+            return self._valores[self._columnas.indice[clave]]
+        except KeyError:
+            if isinstance(clave, str):
+                indice = self._columnas.indice.get(clave.lower())
+                if indice is not None:
+                    return self._valores[indice]
+            raise
+    
+    def get(self, clave, defecto=None):
+        try:
+            return self[clave]
+        except (KeyError, IndexError):
+            return defecto
+    
+    def __contains__(self, clave):
+        return clave in self._columnas.indice or (
+            isinstance(clave, str) and clave.lower() in self._columnas.indice)
     
     def __iter__(self):
         # Al iterar (para desempaquetar), devolver valores en orden, no claves
-        for key in self._keys_list:
-            yield super().__getitem__(key)
+        return iter(self._valores)
     
     def __len__(self):
-        return super().__len__()
+        return len(self._valores)
+    
+    def __eq__(self, otro):
+        if isinstance(otro, FILA):
+            return self._valores == otro._valores and self._columnas.nombres == otro._columnas.nombres
+        if isinstance(otro, tuple):
+            return self._valores == otro
+        if isinstance(otro, dict):
+            return dict(self.items()) == otro
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def keys(self):
+        return list(self._columnas.nombres)
+    
+    def values(self):
+        return list(self._valores)
+    
+    def items(self):
+        return list(zip(self._columnas.nombres, self._valores))
+    
+    def __repr__(self):
+        return f"FILA({dict(self.items())!r})"
+    
+    def copy(self):
+        """dict normal y editable con las columnas de la fila"""
+        return dict(self.items())
+    
+    def __reduce__(self):
+        return (FILA, (self._valores, self._columnas))
+
 
 class GESTOR_BASE_DATOS:
     """
     Gestor de Base de Datos con Conexión Persistente (Singleton Pattern)
     Optimizado para rendimiento con:
-    - Conexión única reutilizable
-    - Row factory para acceso tipo diccionario
+    - Una conexión escritora única, protegida por lock
+    - Pool acotado de conexiones de solo lectura (WAL permite lectores concurrentes)
+    - Filas compactas (FILA) con acceso por índice y por clave
     - Caché interno de consultas
     """
     
-    def __init__(self, ruta_bd=None, nombre_bd=NOMBRE_BD):
+    def __init__(self, ruta_bd=None, nombre_bd=NOMBRE_BD, max_lectores=MAX_LECTORES,
+                 max_cache_consultas=MAX_CACHE_CONSULTAS):
         if isinstance(ruta_bd, str):
             self.nombre_bd = ruta_bd
         else:
             self.nombre_bd = nombre_bd
         
-        # Caché de consultas en memoria
+        # Caché de consultas en memoria (LRU, invalidación por tabla)
         self._cache_enabled = True
-        self._query_cache = {}
+        self._query_cache = OrderedDict()  # clave -> (filas, tablas leídas)
+        self._cache_por_tabla = {}  # tabla -> claves que dependen de ella
         self._cache_lock = threading.Lock()
+        self._max_cache_consultas = max_cache_consultas
+        self._cache_generacion = 0  # Evita guardar lecturas que compitieron con una escritura
+        self._cache_stats = {'hits': 0, 'misses': 0, 'invalidaciones': 0, 'evicciones': 0}
+        self._dependencias = None  # Triggers y vistas: se cargan al primer uso
         
-        # Conexión persistente (Singleton)
+        # Conexión escritora persistente (Singleton)
         self.conexion = None
-        self._conexion_lock = threading.Lock()
+        self._conexion_lock = threading.RLock()
+        
+        # Pool de lectores: una conexión por hilo mientras dura la consulta
+        # Una BD en memoria no se comparte entre conexiones: lee por la escritora
+        self._usar_pool = max_lectores > 0 and ":memory:" not in self.nombre_bd
+        self._max_lectores = max_lectores
+        self._lectores_libres = queue.LifoQueue()
+        self._lectores = []
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()
+        
+        # Conexión propia para PRAGMA data_version (ver VERSION_DATOS)
+        self._monitor = None
+        self._monitor_lock = threading.Lock()
+        
+        # Perfilador de consultas (desactivado: costo cero salvo una comprobación)
+        self._perfilador = None
         
         # Conectar y configurar
         self._conectar()
         
         # Registrar cierre automático al finalizar
         atexit.register(self._cerrar_conexion)
+        
+        # SERVITEC_PERFIL=1 activa el perfilador desde el inicio y guarda el perfil al salir
+        if os.environ.get("SERVITEC_PERFIL", "") not in ("", "0"):
+            umbral = float(os.environ.get("SERVITEC_PERFIL_UMBRAL_MS", UMBRAL_LENTA_MS))
+            self.ACTIVAR_PERFILADOR(umbral_ms=umbral)
+            atexit.register(self._perfilador.GUARDAR)
     
     def _conectar(self):
         """
         Establece una conexión persistente a la base de datos
         Optimizaciones aplicadas:
         - check_same_thread=False para uso en múltiples hilos
-        - row_factory=sqlite3.Row para acceso tipo diccionario
+        - Sin row_factory: las filas llegan como tuplas y se envuelven en FILA
         - PRAGMAs de rendimiento configurados
         """
         if self.conexion is None:
@@ -78,9 +281,6 @@ class GESTOR_BASE_DATOS:
                         isolation_level=None  # Autocommit mode para mejor rendimiento
                     )
                     
-                    # OPTIMIZACIÓN: Row factory para acceso tipo diccionario
-                    self.conexion.row_factory = sqlite3.Row
-                    
                     # Configurar PRAGMAs de optimización
                     cursor = self.conexion.cursor()
                     cursor.execute("PRAGMA journal_mode=WAL")
@@ -91,8 +291,90 @@ class GESTOR_BASE_DATOS:
                     cursor.execute("PRAGMA page_size=4096")
                     cursor.close()
     
+    def _abrir_lector(self):
+        """
+        Abre una conexión de solo lectura para el pool
+        query_only impide escrituras accidentales; en WAL no bloquea al escritor
+        """
+        conexion = sqlite3.connect(
+            self.nombre_bd,
+            timeout=30.0,
+            check_same_thread=False,  # El pool la entrega a distintos hilos
+            isolation_level=None
+        )
+        cursor = conexion.cursor()
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.execute("PRAGMA cache_size=-16000")  # 16MB por lector
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")  # El mapa se comparte entre conexiones
+        cursor.close()
+        return conexion
+    
+    def _tomar_lector(self):
+        """Obtiene un lector libre, crea uno nuevo si no se alcanzó el máximo o espera"""
+        try:
+            return self._lectores_libres.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._pool_lock:
+            crear = len(self._lectores) < self._max_lectores
+            if crear:
+                conexion = self._abrir_lector()
+                self._lectores.append(conexion)
+                return conexion
+        
+        try:
+            return self._lectores_libres.get(timeout=30.0)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Pool de lectura agotado (timeout)")
+    
+    @contextmanager
+    def _lector(self):
+        """
+        Entrega una conexión de lectura para el hilo actual
+        - Reentrante: consultas anidadas del mismo hilo reutilizan la misma conexión
+        - Sin pool (BD en memoria) o dentro de TRANSACCION(): usa la conexión escritora
+        """
+        conexion = getattr(self._local, 'lector', None)
+        if conexion is not None:
+            yield conexion
+            return
+        
+        if not self._usar_pool or self.EN_TRANSACCION():
+            # Dentro de TRANSACCION() hay que leer lo escrito y aún no confirmado
+            with self._conexion_lock:
+                self._asegurar_conexion()
+                yield self.conexion
+            return
+        
+        conexion = self._tomar_lector()
+        self._local.lector = conexion
+        try:
+            yield conexion
+        finally:
+            self._local.lector = None
+            self._lectores_libres.put(conexion)
+    
     def _cerrar_conexion(self):
-        """Cierra la conexión persistente al finalizar"""
+        """Cierra la conexión persistente y los lectores del pool al finalizar"""
+        with self._pool_lock:
+            for lector in self._lectores:
+                try:
+                    lector.close()
+                except:
+                    pass
+            self._lectores = []
+            self._lectores_libres = queue.LifoQueue()
+        
+        with self._monitor_lock:
+            if self._monitor is not None:
+                try:
+                    self._monitor.close()
+                except:
+                    pass
+                self._monitor = None
+        
         if self.conexion:
             try:
                 self.conexion.close()
@@ -101,416 +383,638 @@ class GESTOR_BASE_DATOS:
                 pass
     
     def _asegurar_conexion(self):
-        """Verifica que la conexión esté activa, reconecta si es necesario"""
+        """
+        Verifica que la conexión esté activa, reconecta si es necesario
+        Sin ejecutar SQL: leer total_changes falla si la conexión está cerrada
+        """
         try:
-            if self.conexion:
-                # Test de conexión
-                self.conexion.execute("SELECT 1")
+            if self.conexion is not None:
+                self.conexion.total_changes
+                return
         except sqlite3.Error:
             # Reconectar si la conexión está cerrada
             self.conexion = None
-            self._conectar()
+        self._conectar()
 
     def INICIALIZAR_BD(self):
-        """INICIALIZA LA BASE DE DATOS CON TODAS LAS TABLAS NECESARIAS"""
-        consultas = [
-            """CREATE TABLE IF NOT EXISTS usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT UNIQUE,
-                password TEXT,
-                rol TEXT,
-                porcentaje_comision REAL DEFAULT 50
-            )""",
-            """CREATE TABLE IF NOT EXISTS clientes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cedula TEXT UNIQUE,
-                nombre TEXT,
-                telefono TEXT,
-                email TEXT,
-                fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""",
-            """CREATE TABLE IF NOT EXISTS categorias (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT UNIQUE NOT NULL,
-                tipo TEXT CHECK(tipo IN ('PRODUCTO', 'REPUESTO')) NOT NULL
-            )""",
-            """CREATE TABLE IF NOT EXISTS inventario (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT UNIQUE,
-                categoria TEXT,
-                costo REAL,
-                precio REAL,
-                stock INTEGER,
-                proveedor_id INTEGER NOT NULL DEFAULT 0,
-                FOREIGN KEY (proveedor_id) REFERENCES proveedores (id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS repuestos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT UNIQUE,
-                categoria TEXT,
-                costo REAL,
-                precio_sugerido REAL,
-                stock INTEGER,
-                proveedor_id INTEGER NOT NULL DEFAULT 0,
-                FOREIGN KEY (proveedor_id) REFERENCES proveedores (id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS servicios_predefinidos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre_servicio TEXT UNIQUE,
-                categoria TEXT,
-                costo_mano_obra REAL
-            )""",
-            """CREATE TABLE IF NOT EXISTS ordenes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cliente_id INTEGER NOT NULL,
-                tecnico_id INTEGER,
-                
-                -- INFORMACIÓN DEL EQUIPO
-                fecha_entrada TEXT DEFAULT CURRENT_TIMESTAMP,
-                fecha_entrega TEXT,
-                equipo TEXT,
-                marca TEXT,
-                modelo TEXT,
-                serie TEXT,
-                observacion TEXT,
-                accesorios TEXT,
-                riesgoso INTEGER DEFAULT 0,
-                
-                -- ESTADOS
-                estado TEXT CHECK(estado IN ('Pendiente', 'En Proceso', 'Reparado', 'Entregado', 'Sin solución')) DEFAULT 'Pendiente',
-                condicion TEXT CHECK(condicion IN ('PENDIENTE', 'SOLUCIONADO', 'SIN SOLUCIÓN')) DEFAULT 'PENDIENTE',
-                
-                -- FINANZAS INTEGRADAS (TODO EN UNA TABLA)
-                presupuesto_inicial REAL DEFAULT 0,
-                costo_total_repuestos REAL DEFAULT 0,
-                costo_total_servicios REAL DEFAULT 0,
-                costo_envio REAL DEFAULT 0,
-                descuento REAL DEFAULT 0,
-                total_a_cobrar REAL DEFAULT 0,
-                abono REAL DEFAULT 0,
-                saldo_pendiente REAL DEFAULT 0,
-                utilidad_bruta REAL DEFAULT 0,
-                comision_tecnico REAL DEFAULT 0,
-                
-                -- MÉTODOS DE PAGO (PARA REPARACIONES)
-                pago_efectivo REAL DEFAULT 0,
-                pago_transferencia REAL DEFAULT 0,
-                pago_debito REAL DEFAULT 0,
-                pago_credito REAL DEFAULT 0,
-                
-                -- AUDITORÍA
-                fecha_cierre TEXT,
-                usuario_cierre_id INTEGER,
-                
-                FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE RESTRICT,
-                FOREIGN KEY (tecnico_id) REFERENCES usuarios(id) ON DELETE SET NULL,
-                FOREIGN KEY (usuario_cierre_id) REFERENCES usuarios(id) ON DELETE SET NULL
-            )""",
-            """CREATE TABLE IF NOT EXISTS caja_sesiones (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                usuario_id INTEGER,
-                fecha_apertura TEXT,
-                fecha_cierre TEXT,
-                monto_inicial REAL,
-                monto_final_sistema REAL,
-                monto_final_real REAL,
-                real_efectivo REAL DEFAULT 0,
-                real_transferencia REAL DEFAULT 0,
-                real_debito REAL DEFAULT 0,
-                real_credito REAL DEFAULT 0,
-                total_gastos REAL DEFAULT 0,
-                diferencia REAL,
-                estado TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS gastos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sesion_id INTEGER,
-                descripcion TEXT,
-                monto REAL,
-                fecha TEXT,
-                FOREIGN KEY(sesion_id) REFERENCES caja_sesiones(id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS modelos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tipo_dispositivo TEXT,
-                marca TEXT,
-                modelo TEXT,
-                UNIQUE(tipo_dispositivo, marca, modelo)
-            )""",
-            """CREATE TABLE IF NOT EXISTS marcas_personalizadas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT UNIQUE,
-                fecha_creacion TEXT DEFAULT (DATETIME('NOW'))
-            )""",
-            """CREATE TABLE IF NOT EXISTS ventas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                usuario_id INTEGER,
-                cliente_id INTEGER,
-                fecha TEXT,
-                total REAL,
-                descuento REAL DEFAULT 0,
-                pago_efectivo REAL DEFAULT 0,
-                pago_transferencia REAL DEFAULT 0,
-                pago_debito REAL DEFAULT 0,
-                pago_credito REAL DEFAULT 0
-            )""",
-            """CREATE TABLE IF NOT EXISTS detalle_ventas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                venta_id INTEGER,
-                producto_id INTEGER,
-                orden_id INTEGER,
-                cantidad INTEGER,
-                precio_unitario REAL,
-                subtotal REAL,
-                FOREIGN KEY(venta_id) REFERENCES ventas(id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS proveedores (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT UNIQUE,
-                telefono TEXT,
-                email TEXT,
-                direccion TEXT,
-                saldo_pendiente REAL DEFAULT 0
-            )""",
-            """CREATE TABLE IF NOT EXISTS precios_proveedor (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                proveedor_id INTEGER,
-                repuesto_id INTEGER,
-                precio REAL,
-                fecha_actualizacion TEXT DEFAULT (DATETIME('NOW')),
-                FOREIGN KEY(proveedor_id) REFERENCES proveedores(id),
-                FOREIGN KEY(repuesto_id) REFERENCES repuestos(id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS compras (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                proveedor_id INTEGER,
-                fecha TEXT,
-                total REAL,
-                estado TEXT,
-                tipo_documento TEXT,
-                numero_documento TEXT,
-                observacion TEXT,
-                FOREIGN KEY(proveedor_id) REFERENCES proveedores(id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS detalle_compras (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                compra_id INTEGER,
-                producto_id INTEGER,
-                tipo_producto TEXT,
-                cantidad INTEGER,
-                costo_unitario REAL,
-                subtotal REAL,
-                FOREIGN KEY(compra_id) REFERENCES compras(id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS pedidos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                orden_id INTEGER,
-                producto_id INTEGER,
-                repuesto_id INTEGER,
-                proveedor_id INTEGER NOT NULL,
-                cantidad INTEGER NOT NULL,
-                estado TEXT DEFAULT 'PENDIENTE',
-                fecha_solicitud TEXT,
-                fecha_pedido TEXT,
-                fecha_recepcion TEXT,
-                notas TEXT,
-                usuario_solicita TEXT,
-                FOREIGN KEY(orden_id) REFERENCES ordenes(id),
-                FOREIGN KEY(producto_id) REFERENCES inventario(id),
-                FOREIGN KEY(repuesto_id) REFERENCES repuestos(id),
-                FOREIGN KEY(proveedor_id) REFERENCES proveedores(id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS pagos_proveedor (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                proveedor_id INTEGER,
-                fecha TEXT,
-                monto REAL,
-                metodo_pago TEXT,
-                referencia TEXT,
-                observacion TEXT,
-                FOREIGN KEY(proveedor_id) REFERENCES proveedores(id)
-            )"""
-        ]
-        
-        # ÍNDICES PARA OPTIMIZACIÓN DE CONSULTAS
-        indices = [
-            "CREATE INDEX IF NOT EXISTS idx_clientes_cedula ON clientes(cedula)",
-            "CREATE INDEX IF NOT EXISTS idx_clientes_nombre ON clientes(nombre)",
-            "CREATE INDEX IF NOT EXISTS idx_ordenes_cliente ON ordenes(cliente_id)",
-            "CREATE INDEX IF NOT EXISTS idx_ordenes_estado ON ordenes(estado)",
-            "CREATE INDEX IF NOT EXISTS idx_ordenes_fecha ON ordenes(fecha)",
-            "CREATE INDEX IF NOT EXISTS idx_ordenes_tecnico ON ordenes(tecnico_id)",
-            "CREATE INDEX IF NOT EXISTS idx_ventas_usuario ON ventas(usuario_id)",
-            "CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas(fecha)",
-            "CREATE INDEX IF NOT EXISTS idx_detalle_ventas_venta ON detalle_ventas(venta_id)",
-            "CREATE INDEX IF NOT EXISTS idx_precios_proveedor_repuesto ON precios_proveedor(repuesto_id)",
-            "CREATE INDEX IF NOT EXISTS idx_precios_proveedor_proveedor ON precios_proveedor(proveedor_id)",
-            "CREATE INDEX IF NOT EXISTS idx_compras_proveedor ON compras(proveedor_id)",
-            "CREATE INDEX IF NOT EXISTS idx_compras_fecha ON compras(fecha)",
-            "CREATE INDEX IF NOT EXISTS idx_detalle_compras_compra ON detalle_compras(compra_id)",
-            "CREATE INDEX IF NOT EXISTS idx_pagos_proveedor_proveedor ON pagos_proveedor(proveedor_id)",
-            "CREATE INDEX IF NOT EXISTS idx_gastos_sesion ON gastos(sesion_id)",
-            "CREATE INDEX IF NOT EXISTS idx_caja_sesiones_usuario ON caja_sesiones(usuario_id)",
-            "CREATE INDEX IF NOT EXISTS idx_modelos_lookup ON modelos(tipo_dispositivo, marca)",
-            # ÍNDICES CRÍTICOS PARA INVENTARIO Y REPUESTOS (OPTIMIZACIÓN DE BÚSQUEDAS)
-            "CREATE INDEX IF NOT EXISTS idx_inventario_nombre ON inventario(nombre)",
-            "CREATE INDEX IF NOT EXISTS idx_inventario_categoria ON inventario(categoria)",
-            "CREATE INDEX IF NOT EXISTS idx_repuestos_nombre ON repuestos(nombre)",
-            "CREATE INDEX IF NOT EXISTS idx_repuestos_categoria ON repuestos(categoria)",
-            "CREATE INDEX IF NOT EXISTS idx_servicios_nombre ON servicios_predefinidos(nombre_servicio)"
-        ]
+        """
+        INICIALIZA LA BASE DE DATOS CON TODAS LAS TABLAS NECESARIAS
         
+        Aplica solo las migraciones pendientes (ver migraciones.py, PRAGMA user_version).
+        Con el esquema al día no ejecuta DDL ni ANALYZE: el arranque queda en una lectura.
+        """
+        try:
+            aplicadas = APLICAR_MIGRACIONES(self)
+            if aplicadas:
+                # Actualizar estadísticas del planificador solo si el esquema cambió
+                self.EJECUTAR_CONSULTA("ANALYZE")
+                print(f"✅ Esquema actualizado a la versión {aplicadas[-1]}")
+        except sqlite3.Error as error:
+            print(f"ERROR BD: {error}")
+
+    def ACTIVAR_PERFILADOR(self, umbral_ms=UMBRAL_LENTA_MS, explicar=True):
+        """
+        Activa el perfilador de consultas (métricas por SQL normalizado y log de lentas)
+        
+        Args:
+            umbral_ms: Desde cuántos ms una consulta se considera lenta
+            explicar: Capturar EXPLAIN QUERY PLAN de las consultas lentas
+        
+        Returns:
+            La instancia de PERFILADOR_CONSULTAS (se conserva si ya estaba activo)
+        """
+        if self._perfilador is None:
+            self._perfilador = PERFILADOR_CONSULTAS(umbral_ms=umbral_ms, explicar=explicar)
+        else:
+            self._perfilador.umbral_ms = umbral_ms
+            self._perfilador.explicar = explicar
+        return self._perfilador
+
+    def DESACTIVAR_PERFILADOR(self):
+        """Detiene la medición (las métricas acumuladas se descartan)"""
+        self._perfilador = None
+
+    def PERFILADOR_ACTIVO(self):
+        return self._perfilador is not None
+
+    def REPORTE_PERFIL(self, orden='total', top=25):
+        """Reporte de texto del perfilador (orden: total, media, p95, cantidad, filas)"""
+        if self._perfilador is None:
+            return "Perfilador de consultas desactivado"
+        return self._perfilador.REPORTE(orden=orden, top=top)
+
+    def REINICIAR_PERFIL(self):
+        """Descarta las métricas acumuladas sin desactivar el perfilador"""
+        if self._perfilador is not None:
+            self._perfilador.REINICIAR()
+
+    def GUARDAR_PERFIL(self, ruta=None):
+        """Guarda el perfil en JSON (ver con: python perfilador_consultas.py ruta)"""
+        if self._perfilador is None:
+            return False
+        return self._perfilador.GUARDAR(ruta) if ruta else self._perfilador.GUARDAR()
+
+    def _explicar(self, consulta, parámetros):
+        """EXPLAIN QUERY PLAN de una sentencia (no la ejecuta)"""
+        with self._lector() as conexion:
+            cursor = conexion.cursor()
+            try:
+                cursor.execute(f"EXPLAIN QUERY PLAN {consulta}", parámetros)
+                return [fila[-1] for fila in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+    def EJECUTAR_PRAGMA(self, pragma, espera=None, busy_timeout_ms=None):
+        """
+        EJECUTA UN PRAGMA DE MANTENIMIENTO EN LA CONEXIÓN ESCRITORA
+        (optimize, wal_checkpoint, incremental_vacuum...) y consume todas sus filas
+        
+        Args:
+            pragma: Sentencia completa, ej. "PRAGMA wal_checkpoint(PASSIVE)"
+            espera: Segundos máximos para tomar el lock de escritura (None = sin límite)
+            busy_timeout_ms: busy_timeout temporal (ej. para que un checkpoint no espere a los lectores)
+        
+        Returns:
+            Lista de filas (tuplas), o None si el lock estaba ocupado
+        """
+        if not self._conexion_lock.acquire(timeout=-1 if espera is None else espera):
+            return None
         try:
-            # Usar conexión persistente
             self._asegurar_conexion()
-            cursor = self.conexion.cursor()
-            
-            # Crear tablas
-            for consulta in consultas:
-                cursor.execute(consulta)
-            
-            # Crear índices
-            for indice in indices:
-                cursor.execute(indice)
+            if busy_timeout_ms is not None:
+                anterior = self.conexion.execute("PRAGMA busy_timeout").fetchone()[0]
+                self.conexion.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            try:
+                return self.conexion.execute(pragma).fetchall()
+            finally:
+                if busy_timeout_ms is not None:
+                    self.conexion.execute(f"PRAGMA busy_timeout={anterior}")
+        finally:
+            self._conexion_lock.release()
+
+    def RESPALDAR(self, destino, **opciones):
+        """
+        RESPALDO EN CALIENTE DE ESTA BASE (ver respaldo_bd.CREAR_RESPALDO)
+        Se copia desde una conexión propia: la aplicación puede seguir escribiendo
+        
+        Returns:
+            (True, info) o (False, mensaje de error)
+        """
+        if self._usar_pool:
+            return CREAR_RESPALDO(self.nombre_bd, destino, **opciones)
+        # Base en memoria: solo la conexión escritora ve los datos
+        with self._conexion_lock:
+            self._asegurar_conexion()
+            return CREAR_RESPALDO(self.conexion, destino, **opciones)
+
+    def CAMBIOS_TOTALES(self):
+        """Filas modificadas por esta instancia desde que abrió (señal barata de actividad)"""
+        conexion = self.conexion
+        return conexion.total_changes if conexion is not None else 0
+
+    def VERSION_DATOS(self):
+        """
+        Número que cambia con cada escritura confirmada en la base, de esta instancia
+        o de otro proceso (otra terminal): PRAGMA data_version sobre una conexión
+        que nunca escribe, así que cuenta los COMMIT de todas las demás.
+        Sirve para saber, sin consultar tablas, que nada cambió desde la última vez.
+        """
+        if not self._usar_pool:
+            # Base en memoria: una sola conexión, nadie más escribe
+            return self.CAMBIOS_TOTALES()
+        with self._monitor_lock:
+            if self._monitor is None:
+                self._monitor = self._abrir_lector()
+            return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def LECTURAS_ACTIVAS(self):
+        """Conexiones del pool de lectura actualmente en uso"""
+        return len(self._lectores) - self._lectores_libres.qsize()
+
+    def EN_TRANSACCION(self):
+        """Indica si el hilo actual tiene abierta una TRANSACCION()"""
+        return getattr(self._local, 'tx_profundidad', 0) > 0
+    
+    @contextmanager
+    def TRANSACCION(self):
+        """
+        UNIDAD DE TRABAJO: agrupa varias escrituras en un solo COMMIT
+        
+        - Mantiene el lock de escritura durante todo el bloque (un solo escritor)
+        - BEGIN IMMEDIATE en el nivel externo; los bloques anidados usan SAVEPOINT
+        - Si el bloque lanza una excepción se revierte (todo o solo el savepoint) y se relanza
+        - Dentro del bloque los errores SQL se propagan en vez de devolver None/[],
+          y las lecturas del mismo hilo usan la conexión escritora (ven lo no confirmado)
+        - El caché se invalida una sola vez, al confirmar
+        
+        Uso:
+            with bd.TRANSACCION():
+                bd.EJECUTAR_CONSULTA(...)
+                bd.EJECUTAR_CONSULTA(...)
+        """
+        with self._conexion_lock:
+            self._asegurar_conexion()
+            profundidad = getattr(self._local, 'tx_profundidad', 0)
+            savepoint = f"sp_servitec_{profundidad}"
             
-            # Optimizar base de datos
-            cursor.execute("ANALYZE")
+            if profundidad == 0:
+                self.conexion.execute("BEGIN IMMEDIATE")
+                self._local.tx_tablas = set()
+            else:
+                self.conexion.execute(f"SAVEPOINT {savepoint}")
+            self._local.tx_profundidad = profundidad + 1
             
-            # Insertar categorías por defecto si no existen
-            categorias_default = [
-                # Categorías de PRODUCTOS
-                ("FUNDAS", "PRODUCTO"),
-                ("CARGADORES", "PRODUCTO"),
-                ("MICAS", "PRODUCTO"),
-                ("AUDIFONOS", "PRODUCTO"),
-                ("CABLES", "PRODUCTO"),
-                ("OTROS", "PRODUCTO"),
-                # Categorías de REPUESTOS
-                ("PANTALLAS", "REPUESTO"),
-                ("BATERIAS", "REPUESTO"),
-                ("PINES CARGA", "REPUESTO"),
-                ("FLEX", "REPUESTO"),
-                ("CAMARAS", "REPUESTO"),
-                ("OTROS", "REPUESTO")
-            ]
+            try:
+                yield self
+            except BaseException:
+                self._local.tx_profundidad = profundidad
+                if profundidad == 0:
+                    self._local.tx_tablas = set()
+                    if self.conexion.in_transaction:
+                        self.conexion.execute("ROLLBACK")
+                elif self.conexion.in_transaction:
+                    self.conexion.execute(f"ROLLBACK TO {savepoint}")
+                    self.conexion.execute(f"RELEASE {savepoint}")
+                raise
             
-            for nombre, tipo in categorias_default:
-                try:
-                    cursor.execute("INSERT OR IGNORE INTO categorias (nombre, tipo) VALUES (?, ?)", (nombre, tipo))
-                except:
-                    pass
+            self._local.tx_profundidad = profundidad
+            if profundidad > 0:
+                self.conexion.execute(f"RELEASE {savepoint}")
+                return
             
-            cursor.close()
-        except Exception as error:
-            print(f"ERROR BD: {error}")
+            try:
+                self.conexion.execute("COMMIT")
+            except sqlite3.Error:
+                if self.conexion.in_transaction:
+                    self.conexion.execute("ROLLBACK")
+                raise
+            finally:
+                tablas, self._local.tx_tablas = self._local.tx_tablas, set()
+            self._invalidar_tablas(tablas)
 
     def EJECUTAR_CONSULTA(self, consulta, parámetros=()):
         """
         EJECUTA UNA CONSULTA DE MODIFICACIÓN (INSERT/UPDATE/DELETE)
         Usa conexión persistente para mejor rendimiento
         """
+        perfilador = self._perfilador
+        inicio = time.perf_counter() if perfilador else 0.0
         try:
-            self._asegurar_conexion()
-            
             with self._conexion_lock:
+                self._asegurar_conexion()
                 cursor = self.conexion.cursor()
                 cursor.execute(consulta, parámetros)
                 last_id = cursor.lastrowid
+                afectadas = cursor.rowcount
                 cursor.close()
                 
-                # Limpiar caché después de modificaciones
-                with self._cache_lock:
-                    self._query_cache.clear()
-                
-                return last_id
+                # Invalidar solo las consultas cacheadas que leen las tablas modificadas
+                self._invalidar_cache(consulta)
+            
+            if perfilador:
+                perfilador.REGISTRAR(consulta, time.perf_counter() - inicio, afectadas, parámetros, self._explicar)
+            return last_id
         except sqlite3.Error as e:
             print(f"Error en EJECUTAR_CONSULTA: {e}")
+            if self.EN_TRANSACCION():
+                raise  # Que TRANSACCION() revierta el bloque
+            return None
+
+    def _cargar_dependencias(self):
+        """
+        Construye el mapa de dependencias del esquema:
+        - triggers: tabla -> tablas que sus triggers modifican
+        - vistas: vista -> tablas que lee
+        """
+        triggers = {}
+        vistas = {}
+        with self._lector() as conexion:
+            filas = conexion.execute(
+                "SELECT type, name, tbl_name, sql FROM sqlite_master WHERE type IN ('trigger', 'view') AND sql IS NOT NULL"
+            ).fetchall()
+        for tipo, nombre, tabla, sql in filas:
+            if tipo == 'trigger':
+                cuerpo = sql[sql.upper().find("BEGIN"):]
+                triggers.setdefault(tabla.lower(), set()).update(_tablas_escritura(cuerpo))
+            else:
+                vistas[nombre.lower()] = _tablas_lectura(sql)
+        return {'triggers': triggers, 'vistas': vistas}
+    
+    def _obtener_dependencias(self):
+        if self._dependencias is None:
+            try:
+                self._dependencias = self._cargar_dependencias()
+            except sqlite3.Error:
+                return {'triggers': {}, 'vistas': {}}
+        return self._dependencias
+    
+    def _tablas_afectadas(self, consulta):
+        """
+        Tablas que una sentencia de escritura puede cambiar, incluyendo
+        las modificadas en cascada por triggers. None = no se pudo determinar
+        """
+        directas = _tablas_escritura(consulta)
+        if not directas or _PATRON_DDL.match(consulta):
+            return None
+        triggers = self._obtener_dependencias()['triggers']
+        afectadas = set()
+        pendientes = list(directas)
+        while pendientes:
+            tabla = pendientes.pop()
+            if tabla not in afectadas:
+                afectadas.add(tabla)
+                pendientes.extend(triggers.get(tabla, ()))
+        return afectadas
+    
+    def _dependencias_lectura(self, consulta):
+        """Tablas de las que depende una consulta cacheada (las vistas se expanden)"""
+        tablas = _tablas_lectura(consulta)
+        if not tablas:
+            return {_TODAS}
+        vistas = self._obtener_dependencias()['vistas']
+        for vista in tablas & vistas.keys():
+            tablas |= vistas[vista]
+        return tablas
+    
+    def _invalidar_cache(self, consulta):
+        """Invalida solo las entradas del caché que dependen de las tablas escritas"""
+        tablas = self._tablas_afectadas(consulta)
+        if tablas is None and _PATRON_DDL.match(consulta):
+            self._dependencias = None  # El esquema cambió: recargar triggers/vistas
+        
+        if self.EN_TRANSACCION():
+            # Diferir hasta el COMMIT: antes de eso nadie más ve los cambios
+            if tablas is None:
+                self._local.tx_tablas = None
+            elif self._local.tx_tablas is not None:
+                self._local.tx_tablas.update(tablas)
+            return
+        self._invalidar_tablas(tablas)
+    
+    def _invalidar_tablas(self, tablas):
+        """Elimina del caché las entradas que leen alguna de las tablas (None = todas)"""
+        with self._cache_lock:
+            self._cache_generacion += 1
+            if tablas is None:
+                # Sentencia desconocida o DDL: invalidar todo
+                self._cache_stats['invalidaciones'] += len(self._query_cache)
+                self._query_cache.clear()
+                self._cache_por_tabla.clear()
+                return
+            
+            claves = set(self._cache_por_tabla.get(_TODAS, ()))
+            for tabla in tablas:
+                claves.update(self._cache_por_tabla.get(tabla, ()))
+            for clave in claves:
+                self._quitar_de_cache(clave)
+            self._cache_stats['invalidaciones'] += len(claves)
+    
+    def _quitar_de_cache(self, clave):
+        """Elimina una entrada y sus referencias en el índice por tabla (requiere _cache_lock)"""
+        entrada = self._query_cache.pop(clave, None)
+        if entrada is None:
+            return
+        for tabla in entrada[1]:
+            dependientes = self._cache_por_tabla.get(tabla)
+            if dependientes is not None:
+                dependientes.discard(clave)
+                if not dependientes:
+                    del self._cache_por_tabla[tabla]
+    
+    def _guardar_en_cache(self, clave, filas, tablas, generacion):
+        with self._cache_lock:
+            if generacion != self._cache_generacion:
+                return  # Hubo una escritura mientras se leía: el resultado puede estar obsoleto
+            self._quitar_de_cache(clave)
+            self._query_cache[clave] = (filas, tablas)
+            for tabla in tablas:
+                self._cache_por_tabla.setdefault(tabla, set()).add(clave)
+            while len(self._query_cache) > self._max_cache_consultas:
+                # Evicción LRU: la entrada usada hace más tiempo
+                self._quitar_de_cache(next(iter(self._query_cache)))
+                self._cache_stats['evicciones'] += 1
+    
+    def ESTADISTICAS_CACHE(self):
+        """Devuelve métricas del caché de consultas (hits, misses, invalidaciones, evicciones)"""
+        with self._cache_lock:
+            stats = dict(self._cache_stats)
+            stats['entries'] = len(self._query_cache)
+            stats['max_entries'] = self._max_cache_consultas
+        consultas = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / consultas * 100, 1) if consultas else 0
+        return stats
+    
+    def LIMPIAR_CACHE(self):
+        """Vacía el caché de consultas completo"""
+        with self._cache_lock:
+            self._cache_generacion += 1
+            self._query_cache.clear()
+            self._cache_por_tabla.clear()
+
+    def EJECUTAR_MUCHOS(self, consulta, filas):
+        """
+        EJECUTA UNA SENTENCIA DE MODIFICACIÓN PARA MUCHAS FILAS (executemany)
+        
+        - Todas las filas en una sola transacción (o savepoint si ya hay una abierta)
+        - Un solo lock, una sola verificación de conexión y una sola invalidación de caché
+        - filas puede ser cualquier iterable/generador de tuplas: se consume en streaming
+        
+        Returns:
+            Número de filas afectadas, o None si falló (se revierte el lote completo)
+        """
+        perfilador = self._perfilador
+        inicio = time.perf_counter() if perfilador else 0.0
+        try:
+            with self.TRANSACCION():
+                cursor = self.conexion.cursor()
+                cursor.executemany(consulta, filas)
+                afectadas = cursor.rowcount
+                cursor.close()
+                self._invalidar_cache(consulta)
+            if perfilador:
+                # Sin plan: las filas ya se consumieron (pueden venir de un generador)
+                perfilador.REGISTRAR(consulta, time.perf_counter() - inicio, afectadas)
+            return afectadas
+        except sqlite3.Error as e:
+            print(f"Error en EJECUTAR_MUCHOS: {e}")
+            if self.EN_TRANSACCION():
+                raise
             return None
 
-    def OBTENER_TODOS(self, consulta, parámetros=(), use_cache=False, limit=None, offset=None):
+    def _consultar(self, consulta, parámetros, solo_uno=False):
+        """
+        Ejecuta una consulta y devuelve sus filas (FILA) enrutando según el tipo:
+        - Lecturas: pool de conexiones de solo lectura (no esperan al escritor)
+        - Cualquier otra sentencia: conexión escritora (con lock) y limpieza de caché
+        """
+        perfilador = self._perfilador
+        inicio = time.perf_counter() if perfilador else 0.0
+        
+        if _es_lectura(consulta):
+            with self._lector() as conexion:
+                resultado = self._leer_filas(conexion.cursor(), consulta, parámetros, solo_uno)
+        else:
+            with self._conexion_lock:
+                self._asegurar_conexion()
+                resultado = self._leer_filas(self.conexion.cursor(), consulta, parámetros, solo_uno)
+                self._invalidar_cache(consulta)
+        
+        if perfilador:
+            filas = (1 if resultado is not None else 0) if solo_uno else len(resultado)
+            perfilador.REGISTRAR(consulta, time.perf_counter() - inicio, filas, parámetros, self._explicar)
+        return resultado
+
+    @staticmethod
+    def _leer_filas(cursor, consulta, parámetros, solo_uno):
+        """Ejecuta en el cursor y envuelve las tuplas en FILA con un índice de columnas compartido"""
+        try:
+            cursor.execute(consulta, parámetros)
+            if cursor.description is None:
+                return None if solo_uno else []
+            columnas = _columnas_de(cursor)
+            if solo_uno:
+                valores = cursor.fetchone()
+                return FILA(valores, columnas) if valores is not None else None
+            return [FILA(valores, columnas) for valores in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def OBTENER_TODOS(self, consulta, parámetros=(), use_cache=False, limit=None, offset=None,
+                      order_by=None, after=None, before=None):
         """
         OBTIENE TODOS LOS REGISTROS DE UNA CONSULTA
         
         OPTIMIZACIONES:
-        - Usa conexión persistente (no abre/cierra cada vez)
-        - row_factory=sqlite3.Row para acceso tipo diccionario
-        - Caché opcional en memoria
-        - Paginación con LIMIT/OFFSET para lazy loading
+        - Usa conexiones persistentes (no abre/cierra cada vez)
+        - Lecturas concurrentes por el pool de solo lectura
+        - Filas FILA: tupla cruda + índice de columnas compartido (accesibles por índice y clave)
+        - Caché opcional en memoria (LRU, se invalida solo al escribir en las tablas leídas)
+        - LIMIT/OFFSET como parámetros (el texto SQL no cambia entre páginas)
+        - Paginación por clave (keyset): cada página cuesta lo mismo sin importar su profundidad
         
         Args:
             consulta: SQL query
             parámetros: Parámetros de la consulta
             use_cache: Si usar caché en memoria
             limit: Número máximo de registros (paginación)
-            offset: Desplazamiento inicial (paginación)
+            offset: Desplazamiento inicial (paginación clásica, O(offset))
+            order_by: Columnas de orden para paginación por clave, ej. ("nombre", "id")
+                      La consulta NO debe llevar su propio ORDER BY en ese caso
+            after: Valores de order_by de la última fila de la página anterior
+            before: Valores de order_by de la primera fila de la página siguiente
         
         Returns:
-            Lista de sqlite3.Row (accesibles como diccionarios)
+            Lista de FILA (accesibles por índice y como diccionarios)
+        
+        Ejemplo:
+            pagina = bd.OBTENER_TODOS("SELECT * FROM inventario", order_by=("nombre", "id"), limit=100)
+            siguiente = bd.OBTENER_TODOS("SELECT * FROM inventario", order_by=("nombre", "id"), limit=100,
+                                         after=(pagina[-1]['nombre'], pagina[-1]['id']))
         """
-        # Aplicar paginación si se especifica
+        invertir = False
+        if order_by is not None:
+            consulta, parámetros, invertir = self._con_keyset(consulta, parámetros, order_by, after, before)
+        elif after is not None or before is not None:
+            raise ValueError("after/before requieren order_by")
+        
+        # Aplicar paginación si se especifica (parametrizada, no concatenada)
         if limit is not None:
-            consulta_original = consulta
-            consulta = f"{consulta_original} LIMIT {limit}"
+            valores = (limit,) if offset is None else (limit, offset)
+            parámetros, marcadores = _agregar_parámetros(parámetros, valores)
+            consulta = f"{consulta} LIMIT {marcadores[0]}"
             if offset is not None:
-                consulta = f"{consulta} OFFSET {offset}"
+                consulta = f"{consulta} OFFSET {marcadores[1]}"
         
-        # Verificar caché
+        # Verificar caché (no dentro de una transacción: vería/guardaría datos sin confirmar)
+        use_cache = use_cache and not self.EN_TRANSACCION()
         if use_cache:
-            cache_key = (consulta, parámetros)
+            if isinstance(parámetros, dict):
+                cache_key = (consulta, tuple(sorted(parámetros.items())))
+            else:
+                cache_key = (consulta, tuple(parámetros))
             with self._cache_lock:
-                if cache_key in self._query_cache:
-                    return self._query_cache[cache_key]
+                entrada = self._query_cache.get(cache_key)
+                if entrada is not None:
+                    self._query_cache.move_to_end(cache_key)  # LRU
+                    self._cache_stats['hits'] += 1
+                    return entrada[0]
+                self._cache_stats['misses'] += 1
+                generacion = self._cache_generacion
         
         try:
-            self._asegurar_conexion()
-            
-            with self._conexion_lock:
-                cursor = self.conexion.cursor()
-                cursor.execute(consulta, parámetros)
-                resultado = cursor.fetchall()
-                cursor.close()
+            resultado_lista = self._consultar(consulta, parámetros)
+            if invertir:
+                # "before" se consulta en sentido inverso; se devuelve en el orden normal
+                resultado_lista.reverse()
             
-            # Convertir sqlite3.Row a DictRow (accesible por índice y clave)
-            resultado_lista = [DictRow(dict(row)) for row in resultado]
-            
-            # Guardar en caché si está habilitado
-            if use_cache:
-                with self._cache_lock:
-                    self._query_cache[cache_key] = resultado_lista
-                    # Limitar tamaño del caché (max 100 consultas)
-                    if len(self._query_cache) > 100:
-                        # Eliminar la entrada más antigua (FIFO)
-                        self._query_cache.pop(next(iter(self._query_cache)))
+            # Guardar en caché con las tablas de las que depende
+            if use_cache and _es_lectura(consulta):
+                tablas = self._dependencias_lectura(consulta)
+                self._guardar_en_cache(cache_key, resultado_lista, tablas, generacion)
             
             return resultado_lista
             
         except sqlite3.Error as e:
             print(f"Error en OBTENER_TODOS: {e}")
             print(f"Query que falló: {consulta}")
+            if self.EN_TRANSACCION():
+                raise
             import traceback
             traceback.print_exc()
             return []
 
+    @staticmethod
+    def _con_keyset(consulta, parámetros, order_by, after, before):
+        """
+        Envuelve la consulta para paginar por clave:
+            SELECT * FROM (consulta) WHERE (c1, c2) > (?, ?) ORDER BY c1, c2
+        SQLite aplana la subconsulta, así que el filtro usa el índice de las columnas de orden
+        
+        Returns:
+            (consulta, parámetros, invertir): invertir indica que el resultado
+            viene en sentido inverso (página "before") y hay que darlo vuelta
+        """
+        if after is not None and before is not None:
+            raise ValueError("Use after o before, no ambos")
+        columnas, descendente = _orden_keyset(order_by)
+        
+        invertir = before is not None
+        if invertir != descendente:
+            sentido, operador = "DESC", "<"
+        else:
+            sentido, operador = "ASC", ">"
+        
+        filtro = ""
+        ancla = after if after is not None else before
+        if ancla is not None:
+            if not isinstance(ancla, (tuple, list)):
+                ancla = (ancla,)
+            if len(ancla) != len(columnas):
+                raise ValueError("after/before debe tener un valor por cada columna de order_by")
+            parámetros, marcadores = _agregar_parámetros(parámetros, ancla)
+            filtro = f" WHERE ({', '.join(columnas)}) {operador} ({', '.join(marcadores)})"
+        
+        orden = ", ".join(f"{columna} {sentido}" for columna in columnas)
+        return f"SELECT * FROM ({consulta}){filtro} ORDER BY {orden}", parámetros, invertir
+
     def OBTENER_UNO(self, consulta, parámetros=()):
         """
         OBTIENE UN ÚNICO REGISTRO DE UNA CONSULTA
-        Usa conexión persistente para mejor rendimiento
+        Usa el pool de lectura (o la conexión escritora si la sentencia modifica datos)
         
         Returns:
-            dict o None (gracias a row_factory)
+            FILA (accesible por índice y clave) o None
         """
         try:
-            self._asegurar_conexion()
-            
-            with self._conexion_lock:
-                cursor = self.conexion.cursor()
-                cursor.execute(consulta, parámetros)
-                resultado = cursor.fetchone()
-                cursor.close()
-            
-            # Convertir sqlite3.Row a DictRow (accesible por índice y clave)
-            return DictRow(resultado) if resultado else None
+            return self._consultar(consulta, parámetros, solo_uno=True)
             
         except sqlite3.Error as e:
             print(f"Error en OBTENER_UNO: {e}")
+            if self.EN_TRANSACCION():
+                raise
             return None
+
+    def ITERAR(self, consulta, parámetros=(), batch=500):
+        """
+        RECORRE UNA CONSULTA GRANDE SIN MATERIALIZARLA (generador)
+        
+        - Trae las filas por bloques con fetchmany(batch): memoria constante
+        - Usa una conexión de lectura dedicada del pool, devuelta al terminar
+          o al cerrar el generador (break, excepción o recolección)
+        - Sin pool (BD en memoria), dentro de TRANSACCION() o para sentencias
+          que modifican datos, cae a una lectura completa normal
+        
+        Uso:
+            for fila in bd.ITERAR("SELECT ... FROM ordenes ORDER BY id DESC"):
+                ...
+        
+        Yields:
+            FILA (accesible por índice y clave)
+        """
+        if not self._usar_pool or self.EN_TRANSACCION() or not _es_lectura(consulta):
+            try:
+                filas = self._consultar(consulta, parámetros)
+            except sqlite3.Error as e:
+                print(f"Error en ITERAR: {e}")
+                if self.EN_TRANSACCION():
+                    raise
+                return
+            yield from filas
+            return
+        
+        perfilador = self._perfilador
+        duración, total_filas = 0.0, 0
+        
+        conexion = self._tomar_lector()
+        cursor = conexion.cursor()
+        try:
+            inicio = time.perf_counter()
+            try:
+                cursor.execute(consulta, parámetros)
+            except sqlite3.Error as e:
+                print(f"Error en ITERAR: {e}")
+                print(f"Query que falló: {consulta}")
+                return
+            if cursor.description is None:
+                return
+            columnas = _columnas_de(cursor)
+            cursor.arraysize = batch
+            while True:
+                bloque = cursor.fetchmany()
+                # Solo se mide el trabajo de SQLite, no el tiempo que el consumidor tarda por fila
+                duración += time.perf_counter() - inicio
+                if not bloque:
+                    break
+                total_filas += len(bloque)
+                for valores in bloque:
+                    yield FILA(valores, columnas)
+                inicio = time.perf_counter()
+        finally:
+            cursor.close()
+            self._lectores_libres.put(conexion)
+            if perfilador and total_filas:
+                perfilador.REGISTRAR(consulta, duración, total_filas, parámetros, self._explicar)
+
+    # Compatibilidad (reportes avanzados, predicción y notificaciones)
+    fetch_all = OBTENER_TODOS
+    fetch_one = OBTENER_UNO
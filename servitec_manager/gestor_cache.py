@@ -24,23 +24,33 @@ def ver_estadisticas(cache_manager):
     
     print("\n📊 ESTADÍSTICAS DEL CACHÉ")
     print("-" * 60)
-    print(f"  Archivos en caché: {stats['files']}")
-    print(f"  Tamaño total: {stats['size_mb']} MB")
+    print(f"  Entradas en caché: {stats['entries']}/{stats['max_capacity']}")
+    print(f"  Tamaño aproximado: {stats['size_mb']} MB de {stats['max_size_mb']} MB")
     
     if stats['oldest']:
-        print(f"  Archivo más antiguo: {stats['oldest']}")
+        print(f"  Entrada más antigua: {stats['oldest']}")
     if stats['newest']:
-        print(f"  Archivo más reciente: {stats['newest']}")
+        print(f"  Entrada más reciente: {stats['newest']}")
     
-    # Calcular porcentaje de uso
-    max_size_mb = 5
-    porcentaje = (stats['size_mb'] / max_size_mb) * 100
-    print(f"  Uso del caché: {porcentaje:.1f}% ({stats['size_mb']}/{max_size_mb} MB)")
+    print(f"  Aciertos: {stats['hits']}  Fallos: {stats['misses']}  Tasa de aciertos: {stats['hit_rate']}%")
+    print(f"  Vencidas servidas mientras se recargaban: {stats['stale_hits']}")
+    print(f"  Evicciones: {stats['evictions']}  Expiradas: {stats['expirations']}  "
+          f"Invalidadas: {stats['invalidations']}")
+    
+    # Porcentaje de uso (el mayor entre entradas y memoria)
+    porcentaje = stats['usage_percent']
+    print(f"  Uso del caché: {porcentaje:.1f}%")
     
     # Barra visual
-    barras = int(porcentaje / 5)
+    barras = min(int(porcentaje / 5), 20)
     print(f"  [{'█' * barras}{'░' * (20 - barras)}] {porcentaje:.1f}%")
     
+    if stats['namespaces']:
+        print(f"\n  {'ESPACIO':<24} {'ENTRADAS':>8} {'MB':>8} {'ACIERTOS':>9} {'TTL':>7}")
+        for nombre, espacio in stats['namespaces'].items():
+            print(f"  {nombre[:24]:<24} {espacio['entries']:>8} {espacio['size_mb']:>8} "
+                  f"{espacio['hit_rate']:>8}% {int(espacio['ttl_seconds']):>6}s")
+    
     print("-" * 60)
 
 def limpiar_cache(cache_manager):
@@ -51,12 +61,12 @@ def limpiar_cache(cache_manager):
     
     # Verificar
     stats = cache_manager.get_stats()
-    if stats['files'] == 0:
-        print(f"   {stats['files']} archivos restantes")
+    if stats['entries'] == 0:
+        print(f"   {stats['entries']} entradas restantes")
     else:
-        print(f"⚠  Advertencia: {stats['files']} archivos no se pudieron eliminar")
+        print(f"⚠  Advertencia: {stats['entries']} entradas no se pudieron eliminar")
 
-def regenerar_cache():
+def regenerar_cache(cache_manager):
     """Regenera el caché completo desde la base de datos"""
     print("\n🔄 Regenerando caché...")
     
@@ -64,8 +74,7 @@ def regenerar_cache():
         # Conectar a BD
         bd = GESTOR_BASE_DATOS()
         
-        # Crear caché nuevo
-        cache_manager = CACHE_MANAGER(cache_dir=".cache", max_age_hours=24, max_size_mb=5)
+        # Caché del menú: las estadísticas muestran lo cargado
         cache_inteligente = CACHE_INTELIGENTE(bd, cache_manager)
         
         # Limpiar caché anterior
@@ -91,14 +100,14 @@ def regenerar_cache():
         
         # Mostrar estadísticas
         stats = cache_manager.get_stats()
-        print(f"   Total: {stats['files']} archivos, {stats['size_mb']} MB")
+        print(f"   Total: {stats['entries']} entradas, {stats['size_mb']} MB")
         
     except Exception as e:
         print(f"❌ Error al regenerar caché: {e}")
 
 def main():
     """Función principal"""
-    cache_manager = CACHE_MANAGER(cache_dir=".cache", max_age_hours=24, max_size_mb=5)
+    cache_manager = CACHE_MANAGER(max_age_hours=24, max_entries=500, max_size_mb=64)
     
     while True:
         mostrar_menu()
@@ -115,10 +124,11 @@ def main():
             elif opcion == "3":
                 confirmar = input("\n⚠️  ¿Regenerar caché completo? (s/n): ").strip().lower()
                 if confirmar == 's':
-                    regenerar_cache()
+                    regenerar_cache(cache_manager)
             elif opcion == "4":
                 stats = cache_manager.get_stats()
-                print(f"\n📁 Tamaño del caché: {stats['size_mb']} MB ({stats['files']} archivos)")
+                print(f"\n📁 Tamaño del caché: {stats['size_mb']} MB de {stats['max_size_mb']} MB "
+                      f"({stats['entries']} entradas)")
             elif opcion == "5":
                 print("\n👋 Saliendo...")
                 break
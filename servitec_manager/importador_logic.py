@@ -4,6 +4,12 @@ Importación de datos desde Excel, CSV y PDF
 Validación inteligente e inserción en base de datos
 """
 
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
 
 class IMPORTADOR_DATOS:
     """Importador inteligente de múltiples formatos de datos"""
@@ -105,6 +111,10 @@ class IMPORTADOR_DATOS:
             col_email = self._ENCONTRAR_COLUMNA(df, ["EMAIL", "CORREO", "MAIL"])
             col_ciudad = self._ENCONTRAR_COLUMNA(df, ["CIUDAD", "LOCALIDAD"])
             
+            # Una sola lectura de las cédulas existentes en vez de un SELECT por fila
+            existentes = {fila[0] for fila in self.db.OBTENER_TODOS("SELECT cedula FROM clientes")}
+            nuevos, actualizados = [], []
+            
             for idx, row in df.iterrows():
                 try:
                     rut = str(row[col_rut]).strip() if col_rut else ""
@@ -120,29 +130,28 @@ class IMPORTADOR_DATOS:
                         continue
                     
                     # Verificar si cliente existe
-                    existe = self.db.fetch_one(
-                        "SELECT id FROM clientes WHERE cedula = ?", 
-                        (rut,)
-                    )
-                    
-                    if existe:
+                    if rut in existentes:
                         self.advertencias.append(f"Cliente {rut} ya existe, ACTUALIZADO")
-                        self.db.execute(
-                            "UPDATE clientes SET nombre=?, telefono=?, email=?, ciudad=?, fecha_actualizacion=? WHERE cedula=?",
-                            (nombre, telefono, email, ciudad, datetime.now(), rut)
-                        )
+                        actualizados.append((nombre, telefono, email, ciudad, datetime.now(), rut))
                     else:
-                        self.db.execute(
-                            "INSERT INTO clientes (cedula, nombre, telefono, email, ciudad, fecha_creacion) VALUES (?, ?, ?, ?, ?, ?)",
-                            (rut, nombre, telefono, email, ciudad, datetime.now())
-                        )
+                        existentes.add(rut)
+                        nuevos.append((rut, nombre, telefono, email, ciudad, datetime.now()))
                         self.registros_procesados += 1
                         
                 except Exception as e:
                     self.advertencias.append(f"Fila {idx+1}: Error - {str(e)}")
                     self.registros_saltados += 1
             
-            self.db.commit()
+            # Inserción en lote: todo o nada, en una sola transacción
+            with self.db.TRANSACCION():
+                self.db.EJECUTAR_MUCHOS(
+                    "INSERT INTO clientes (cedula, nombre, telefono, email, ciudad, fecha_creacion) VALUES (?, ?, ?, ?, ?, ?)",
+                    nuevos
+                )
+                self.db.EJECUTAR_MUCHOS(
+                    "UPDATE clientes SET nombre=?, telefono=?, email=?, ciudad=?, fecha_actualizacion=? WHERE cedula=?",
+                    actualizados
+                )
             self.advertencias.append(f"Importación completada: {self.registros_procesados} nuevos, {self.registros_saltados} saltados")
             return True
             
@@ -165,6 +174,7 @@ class IMPORTADOR_DATOS:
             col_presupuesto = self._ENCONTRAR_COLUMNA(df, ["PRESUPUESTO", "PRECIO", "VALOR"])
             col_estado = self._ENCONTRAR_COLUMNA(df, ["ESTADO", "STATUS"])
             
+            nuevas = []
             for idx, row in df.iterrows():
                 try:
                     cliente_ref = str(row[col_cliente]).strip() if col_cliente else ""
@@ -181,7 +191,7 @@ class IMPORTADOR_DATOS:
                     estado = str(row[col_estado]).strip().upper() if col_estado else "PENDIENTE"
                     
                     # Validar cliente
-                    cliente = self.db.fetch_one(
+                    cliente = self.db.OBTENER_UNO(
                         "SELECT id FROM clientes WHERE cedula = ? OR nombre LIKE ?",
                         (cliente_ref, f"%{cliente_ref}%")
                     )
@@ -191,18 +201,19 @@ class IMPORTADOR_DATOS:
                         self.registros_saltados += 1
                         continue
                     
-                    # Insertar orden
-                    self.db.execute(
-                        "INSERT INTO ordenes (cliente_id, tipo, marca, modelo, observacion, presupuesto_inicial, estado, fecha_entrada) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                        (cliente[0], equipo, marca, modelo, falla, presupuesto, estado, datetime.now())
-                    )
+                    # Insertar orden (se acumula para el lote)
+                    nuevas.append((cliente[0], equipo, marca, modelo, falla, presupuesto, estado, datetime.now()))
                     self.registros_procesados += 1
                     
                 except Exception as e:
                     self.advertencias.append(f"Fila {idx+1}: Error - {str(e)}")
                     self.registros_saltados += 1
             
-            self.db.commit()
+            with self.db.TRANSACCION():
+                self.db.EJECUTAR_MUCHOS(
+                    "INSERT INTO ordenes (cliente_id, tipo, marca, modelo, observacion, presupuesto_inicial, estado, fecha_entrada) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    nuevas
+                )
             self.advertencias.append(f"Importación de órdenes completada: {self.registros_procesados} nuevas")
             return True
             
@@ -222,6 +233,9 @@ class IMPORTADOR_DATOS:
             col_cantidad = self._ENCONTRAR_COLUMNA(df, ["CANTIDAD", "STOCK", "EXISTENCIA"])
             col_categoria = self._ENCONTRAR_COLUMNA(df, ["CATEGORÍA", "CATEGORIA", "TIPO"])
             
+            existentes = {fila[0] for fila in self.db.OBTENER_TODOS("SELECT nombre FROM inventario")}
+            nuevos, actualizados = [], []
+            
             for idx, row in df.iterrows():
                 try:
                     producto = str(row[col_producto]).strip() if col_producto else ""
@@ -243,28 +257,26 @@ class IMPORTADOR_DATOS:
                     categoria = str(row[col_categoria]).strip() if col_categoria else "GENERAL"
                     
                     # Verificar si existe
-                    existe = self.db.fetch_one(
-                        "SELECT id FROM inventario WHERE nombre = ?",
-                        (producto,)
-                    )
-                    
-                    if existe:
-                        self.db.execute(
-                            "UPDATE inventario SET precio=?, cantidad=?, categoria=? WHERE nombre=?",
-                            (precio, cantidad, categoria, producto)
-                        )
+                    if producto in existentes:
+                        actualizados.append((precio, cantidad, categoria, producto))
                     else:
-                        self.db.execute(
-                            "INSERT INTO inventario (nombre, precio, cantidad, categoria) VALUES (?, ?, ?, ?)",
-                            (producto, precio, cantidad, categoria)
-                        )
+                        existentes.add(producto)
+                        nuevos.append((producto, precio, cantidad, categoria))
                         self.registros_procesados += 1
                         
                 except Exception as e:
                     self.advertencias.append(f"Fila {idx+1}: Error - {str(e)}")
                     self.registros_saltados += 1
             
-            self.db.commit()
+            with self.db.TRANSACCION():
+                self.db.EJECUTAR_MUCHOS(
+                    "INSERT INTO inventario (nombre, precio, cantidad, categoria) VALUES (?, ?, ?, ?)",
+                    nuevos
+                )
+                self.db.EJECUTAR_MUCHOS(
+                    "UPDATE inventario SET precio=?, cantidad=?, categoria=? WHERE nombre=?",
+                    actualizados
+                )
             return True
             
         except Exception as e:
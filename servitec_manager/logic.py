@@ -1,5 +1,9 @@
 from database import GESTOR_BASE_DATOS
+from busqueda_fts import BUSCAR_FTS, EXPRESION_FTS, FTS_DISPONIBLE
+from rango_fechas import LIMITES_DIA, LIMITES_DIAS, PREDICADO_RANGO
+from resumenes import CONTEO_ESTADOS, TOTALES_SESION_CAJA
 import sqlite3
+from collections.abc import Mapping
 try:
     from importador_logic import IMPORTADOR_DATOS
 except ImportError:
@@ -21,24 +25,78 @@ try:
 except ImportError:
     GESTOR_MENSAJERIA = None
 
+
+class STOCK_INSUFICIENTE(Exception):
+    """Venta que dejaría stock negativo; lleva la lista de (id, nombre, stock, pedido) faltantes"""
+    def __init__(self, faltantes):
+        self.faltantes = faltantes
+        super().__init__(", ".join(
+            f"#{pid} {nombre or '(no existe)'}: pedido {pedido}, hay {stock or 0}"
+            for pid, nombre, stock, pedido in faltantes
+        ))
+
+
 # --- GESTORES ---
 
 # GESTOR DE CLIENTES
 class GESTOR_CLIENTES:
     def __init__(self, gestor_bd):
         self.bd = gestor_bd
+
+    @staticmethod
+    def NORMALIZAR_RUT(rut):
+        """'012.345.678-k' -> '12345678K' (misma regla que la columna clientes.rut_normalizado)"""
+        if not rut:
+            return None
+        limpio = str(rut).strip().replace(".", "").replace("-", "").replace(" ", "").upper().lstrip("0")
+        return limpio or None
+
+    @staticmethod
+    def DIGITO_VERIFICADOR_RUT(cuerpo):
+        """Dígito verificador (módulo 11) del cuerpo numérico de un RUT"""
+        suma, factor = 0, 2
+        for digito in reversed(str(cuerpo)):
+            suma += int(digito) * factor
+            factor = 2 if factor == 7 else factor + 1
+        resto = 11 - suma % 11
+        return {11: "0", 10: "K"}.get(resto, str(resto))
+
+    @staticmethod
+    def VALIDAR_RUT(rut):
+        """True si el RUT tiene cuerpo numérico y su dígito verificador es correcto"""
+        normalizado = GESTOR_CLIENTES.NORMALIZAR_RUT(rut)
+        if not normalizado or len(normalizado) < 2 or not normalizado[:-1].isdigit():
+            return False
+        return GESTOR_CLIENTES.DIGITO_VERIFICADOR_RUT(normalizado[:-1]) == normalizado[-1]
+
     def AGREGAR_CLIENTE(self, rut, nombre, teléfono, correo):
         try: return self.bd.EJECUTAR_CONSULTA("INSERT INTO clientes (cedula, nombre, telefono, email) VALUES (?, ?, ?, ?)", (rut.upper(), nombre.upper(), teléfono, correo.upper()))
         except: return False
     def ACTUALIZAR_CLIENTE(self, rut, nombre, teléfono, correo):
         try:
-            self.bd.EJECUTAR_CONSULTA("UPDATE clientes SET nombre = ?, telefono = ?, email = ? WHERE cedula = ?", (nombre.upper(), teléfono, correo.upper(), rut.upper()))
+            self.bd.EJECUTAR_CONSULTA("UPDATE clientes SET nombre = ?, telefono = ?, email = ? WHERE rut_normalizado = ?", (nombre.upper(), teléfono, correo.upper(), self.NORMALIZAR_RUT(rut)))
             return True
         except: return False
-    def OBTENER_CLIENTE(self, rut): return self.bd.OBTENER_UNO("SELECT * FROM clientes WHERE cedula = ?", (rut.upper(),))
+    def OBTENER_CLIENTE(self, rut):
+        # Búsqueda exacta por el índice de rut_normalizado: el formato escrito no importa
+        return self.bd.OBTENER_UNO("SELECT * FROM clientes WHERE rut_normalizado = ?", (self.NORMALIZAR_RUT(rut),))
     def BUSCAR_CLIENTES(self, consulta):
-        q = consulta.upper(); qc = ''.join(filter(lambda x: x.isalnum(), q))
-        return self.bd.OBTENER_TODOS("SELECT * FROM clientes WHERE NOMBRE LIKE ? OR REPLACE(REPLACE(cedula, '.', ''), '-', '') LIKE ? LIMIT 50", (f"%{q}%", f"%{qc}%"))
+        # Un RUT completo y válido va directo al índice
+        if self.VALIDAR_RUT(consulta):
+            cliente = self.OBTENER_CLIENTE(consulta)
+            if cliente:
+                return [cliente]
+        # Índice FTS (nombre, RUT, teléfono) por prefijo y relevancia; LIKE si la base no lo tiene
+        filas = BUSCAR_FTS(self.bd, "clientes_fts", "clientes", consulta, limite=50)
+        if filas is not None:
+            return filas
+        qc = self.NORMALIZAR_RUT(consulta)
+        if qc and (qc.isdigit() or (qc[:-1].isdigit() and qc.endswith("K"))):
+            # Parece RUT: GLOB por prefijo usa el índice de rut_normalizado (LIKE no, por ser
+            # insensible a mayúsculas). Solo prefijo: un trozo del medio del RUT no coincide
+            return self.bd.OBTENER_TODOS("SELECT * FROM clientes WHERE rut_normalizado GLOB ? LIMIT 50", (f"{qc}*",))
+        # Nombre: '%...%' no puede usar índices y recorre la tabla
+        return self.bd.OBTENER_TODOS("SELECT * FROM clientes WHERE nombre LIKE ? LIMIT 50", (f"%{consulta.upper()}%",))
     BUSCAR_CLIENTE = OBTENER_CLIENTE
     # Compatibilidad
     add_client = AGREGAR_CLIENTE
@@ -108,13 +166,13 @@ class GESTOR_MODELOS:
             }
         }
         
-        for tipo, marcas in data.items():
-            for marca, modelos in marcas.items():
-                for modelo in modelos:
-                    self.bd.EJECUTAR_CONSULTA(
-                        "INSERT OR IGNORE INTO modelos (tipo_dispositivo, marca, modelo) VALUES (?, ?, ?)", 
-                        (tipo, marca, modelo)
-                    )
+        self.bd.EJECUTAR_MUCHOS(
+            "INSERT OR IGNORE INTO modelos (tipo_dispositivo, marca, modelo) VALUES (?, ?, ?)",
+            ((tipo, marca, modelo)
+             for tipo, marcas in data.items()
+             for marca, modelos in marcas.items()
+             for modelo in modelos)
+        )
     
     # Compatibilidad con código antiguo
     get_models_by_brand = OBTENER_MODELOS_POR_MARCA
@@ -197,6 +255,10 @@ class GESTOR_SERVICIOS:
         return result
     
     def BUSCAR_SERVICIO(self, consulta):
+        filas = BUSCAR_FTS(self.bd, "servicios_fts", "servicios_predefinidos", consulta,
+                           columnas="t.id, t.nombre_servicio, t.COSTO_MANO_OBRA")
+        if filas is not None:
+            return filas
         q = f"%{consulta.upper()}%"
         # Limitar resultados a 100 para evitar congelamiento
         return self.bd.OBTENER_TODOS("SELECT id, nombre_servicio, COSTO_MANO_OBRA FROM servicios_predefinidos WHERE NOMBRE_SERVICIO LIKE ? LIMIT 100", (q,))
@@ -225,6 +287,8 @@ class GESTOR_REPUESTOS:
     
     def OBTENER_TODOS_REPUESTOS_CON_PROVEEDOR(self):
         """Obtiene todos los repuestos con información del proveedor"""
+        if self._cache_inteligente:
+            return self._cache_inteligente.cargar_repuestos_con_proveedor()
         query = """
             SELECT r.*, 
                    p.nombre as proveedor_nombre,
@@ -243,6 +307,10 @@ class GESTOR_REPUESTOS:
         return self.bd.OBTENER_UNO("SELECT * FROM repuestos WHERE id = ?", (repuesto_id,))
     
     def BUSCAR_REPUESTO(self, consulta):
+        filas = BUSCAR_FTS(self.bd, "repuestos_fts", "repuestos", consulta,
+                           columnas="t.id, t.nombre, t.precio_sugerido, t.stock, t.categoria, t.costo")
+        if filas is not None:
+            return filas
         q = f"%{consulta.upper()}%"
         # Limitar resultados a 100 para evitar congelamiento
         return self.bd.OBTENER_TODOS("SELECT id, nombre, precio_sugerido, stock, categoria, costo FROM repuestos WHERE nombre LIKE ? LIMIT 100", (q,))
@@ -373,29 +441,48 @@ class GESTOR_PROVEEDORES:
         # items = [(prod_id, type, qty, cost), ...] where type is 'REPUESTO' or 'INVENTARIO'
         total = sum(item[2] * item[3] for item in items)
         
-        # 1. Crear Compra
-        compra_id = self.bd.EJECUTAR_CONSULTA(
-            "INSERT INTO compras (proveedor_id, fecha, total, estado, tipo_documento, numero_documento, observacion) VALUES (?, datetime('now'), ?, 'RECIBIDA', ?, ?, ?)",
-            (proveedor_id, total, tipo_doc, num_doc, observacion)
-        )
-        if not compra_id: return False
+        try:
+            with self.bd.TRANSACCION():
+                # 1. Crear Compra
+                compra_id = self.bd.EJECUTAR_CONSULTA(
+                    "INSERT INTO compras (proveedor_id, fecha, total, estado, tipo_documento, numero_documento, observacion) VALUES (?, datetime('now'), ?, 'RECIBIDA', ?, ?, ?)",
+                    (proveedor_id, total, tipo_doc, num_doc, observacion)
+                )
 
-        # 2. Registrar Detalle y Actualizar Stock/Costo
-        for prod_id, tipo_prod, cantidad, costo in items:
-            subtotal = cantidad * costo
-            self.bd.EJECUTAR_CONSULTA(
-                "INSERT INTO detalle_compras (compra_id, producto_id, tipo_producto, cantidad, costo_unitario, subtotal) VALUES (?, ?, ?, ?, ?, ?)",
-                (compra_id, prod_id, tipo_prod, cantidad, costo, subtotal)
-            )
+                # 2. Registrar Detalle (en lote)
+                self.bd.EJECUTAR_MUCHOS(
+                    "INSERT INTO detalle_compras (compra_id, producto_id, tipo_producto, cantidad, costo_unitario, subtotal) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(compra_id, prod_id, tipo_prod, cantidad, costo, cantidad * costo)
+                     for prod_id, tipo_prod, cantidad, costo in items]
+                )
             
-            # Actualizar Stock y Costo (Promedio o Último? Usaremos Último Costo por simplicidad MVP)
-            if tipo_prod == 'REPUESTO':
-                self.bd.EJECUTAR_CONSULTA("UPDATE repuestos SET stock = stock + ?, costo = ? WHERE id = ?", (cantidad, costo, prod_id))
-            elif tipo_prod == 'INVENTARIO':
-                self.bd.EJECUTAR_CONSULTA("UPDATE inventario SET stock = stock + ?, costo = ? WHERE id = ?", (cantidad, costo, prod_id))
+                # Actualizar Stock y Costo promedio ponderado: una fila por ítem aunque la factura lo repita
+                # costo = (stock * costo + cantidad comprada * costo compra) / (stock + cantidad comprada)
+                # (stock negativo cuenta como 0; si no queda nada en stock, se usa el último costo)
+                acumulado = {}
+                for prod_id, tipo_prod, cantidad, costo in items:
+                    cantidad_total, valor_total, _ = acumulado.get((tipo_prod, prod_id), (0, 0, 0))
+                    acumulado[(tipo_prod, prod_id)] = (cantidad_total + cantidad, valor_total + cantidad * float(costo), costo)
+                for tabla, tipo in (('repuestos', 'REPUESTO'), ('inventario', 'INVENTARIO')):
+                    filas = [(cantidad, valor, cantidad, ultimo_costo, cantidad, prod_id)
+                             for (tipo_prod, prod_id), (cantidad, valor, ultimo_costo) in acumulado.items()
+                             if tipo_prod == tipo]
+                    if filas:
+                        self.bd.EJECUTAR_MUCHOS(
+                            f"""UPDATE {tabla} SET
+                                costo = CASE WHEN MAX(stock, 0) + ? > 0
+                                             THEN (MAX(stock, 0) * COALESCE(costo, 0) + ?) / (MAX(stock, 0) + ?)
+                                             ELSE ? END,
+                                stock = stock + ?
+                                WHERE id = ?""",
+                            filas
+                        )
 
-        # 3. Actualizar Saldo Proveedor (Deuda aumenta)
-        self.bd.EJECUTAR_CONSULTA("UPDATE proveedores SET saldo_pendiente = saldo_pendiente + ? WHERE id = ?", (total, proveedor_id))
+                # 3. Actualizar Saldo Proveedor (Deuda aumenta)
+                self.bd.EJECUTAR_CONSULTA("UPDATE proveedores SET saldo_pendiente = saldo_pendiente + ? WHERE id = ?", (total, proveedor_id))
+        except sqlite3.Error as e:
+            print(f"Error al registrar compra (revertida): {e}")
+            return False
         
         return compra_id
 
@@ -650,30 +737,84 @@ class GESTOR_PEDIDOS:
         """
         Marca un pedido como RECIBIDO.
         Opcionalmente actualiza el stock del producto/repuesto.
+        Estado y stock se confirman juntos (o ninguno).
         """
-        if not self.ACTUALIZAR_ESTADO(pedido_id, 'RECIBIDO'):
-            return False
-        
-        if actualizar_stock:
-            pedido = self.bd.OBTENER_UNO("SELECT * FROM pedidos WHERE id = ?", (pedido_id,))
-            if pedido:
-                if pedido['producto_id']:
-                    self.bd.EJECUTAR_CONSULTA(
-                        "UPDATE inventario SET stock = stock + ? WHERE id = ?",
-                        (pedido['cantidad'], pedido['producto_id'])
-                    )
-                elif pedido['repuesto_id']:
-                    self.bd.EJECUTAR_CONSULTA(
-                        "UPDATE repuestos SET stock = stock + ? WHERE id = ?",
-                        (pedido['cantidad'], pedido['repuesto_id'])
-                    )
-        
-        return True
+        return self.RECIBIR_PEDIDOS([pedido_id], actualizar_stock)[pedido_id] == 'RECIBIDO'
     
     def CANCELAR_PEDIDO(self, pedido_id):
         """Cancela un pedido."""
         return self.ACTUALIZAR_ESTADO(pedido_id, 'CANCELADO')
     
+    def RECIBIR_PEDIDOS(self, lista_pedido_ids, actualizar_stock=True):
+        """
+        Recepción en bloque: unas pocas sentencias por conjunto en una sola transacción,
+        sin importar cuántos pedidos sean.
+        
+        - Un SELECT trae el estado y el ítem de todos los pedidos
+        - Un UPDATE marca RECIBIDO y pone fecha_recepcion a los que estaban PENDIENTE/PEDIDO
+        - Un executemany por tabla suma al stock la cantidad agregada por producto/repuesto
+        
+        Un pedido ya RECIBIDO o CANCELADO no se vuelve a recibir (ni suma stock otra vez).
+        
+        Returns:
+            dict {pedido_id: resultado}, con resultado 'RECIBIDO', 'YA_RECIBIDO',
+            'CANCELADO', 'NO_EXISTE' o 'ERROR' (si la transacción se revirtió)
+        """
+        from datetime import datetime
+        fecha_actual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        ids = list(dict.fromkeys(lista_pedido_ids))
+        resultados = dict.fromkeys(ids, 'NO_EXISTE')
+        if not ids:
+            return resultados
+        marcas = ', '.join('?' * len(ids))
+        
+        try:
+            with self.bd.TRANSACCION():
+                recibir = []
+                stock_productos = {}
+                stock_repuestos = {}
+                for pedido in self.bd.OBTENER_TODOS(
+                    f"SELECT id, estado, producto_id, repuesto_id, cantidad FROM pedidos WHERE id IN ({marcas})",
+                    tuple(ids)
+                ):
+                    estado = (pedido['estado'] or '').upper()
+                    if estado == 'RECIBIDO':
+                        resultados[pedido['id']] = 'YA_RECIBIDO'
+                        continue
+                    if estado == 'CANCELADO':
+                        resultados[pedido['id']] = 'CANCELADO'
+                        continue
+                    recibir.append(pedido['id'])
+                    if pedido['producto_id']:
+                        stock_productos[pedido['producto_id']] = stock_productos.get(pedido['producto_id'], 0) + pedido['cantidad']
+                    elif pedido['repuesto_id']:
+                        stock_repuestos[pedido['repuesto_id']] = stock_repuestos.get(pedido['repuesto_id'], 0) + pedido['cantidad']
+                
+                if recibir:
+                    self.bd.EJECUTAR_CONSULTA(
+                        f"UPDATE pedidos SET estado = 'RECIBIDO', fecha_recepcion = ? WHERE id IN ({', '.join('?' * len(recibir))})",
+                        (fecha_actual, *recibir)
+                    )
+                if actualizar_stock:
+                    if stock_productos:
+                        self.bd.EJECUTAR_MUCHOS(
+                            "UPDATE inventario SET stock = stock + ? WHERE id = ?",
+                            [(cantidad, item_id) for item_id, cantidad in stock_productos.items()]
+                        )
+                    if stock_repuestos:
+                        self.bd.EJECUTAR_MUCHOS(
+                            "UPDATE repuestos SET stock = stock + ? WHERE id = ?",
+                            [(cantidad, item_id) for item_id, cantidad in stock_repuestos.items()]
+                        )
+        except sqlite3.Error as e:
+            print(f"❌ Error al recibir {len(ids)} pedido(s) (revertido): {e}")
+            return dict.fromkeys(ids, 'ERROR')
+        
+        for pedido_id in recibir:
+            resultados[pedido_id] = 'RECIBIDO'
+        return resultados
+    
     def RECIBIR_LOTE_PEDIDOS(self, lista_pedido_ids, actualizar_stock=True):
         """
         Marca múltiples pedidos como RECIBIDOS y actualiza stock.
@@ -684,21 +825,14 @@ class GESTOR_PEDIDOS:
             
         Returns:
             Tuple (exitosos, errores) con cantidad de pedidos procesados
+            (el detalle por pedido está en RECIBIR_PEDIDOS)
         """
-        exitosos = 0
-        errores = 0
-        
-        for pedido_id in lista_pedido_ids:
-            try:
-                if self.MARCAR_COMO_RECIBIDO(pedido_id, actualizar_stock=actualizar_stock):
-                    exitosos += 1
-                else:
-                    errores += 1
-            except Exception as e:
-                print(f"Error recibiendo pedido {pedido_id}: {e}")
-                errores += 1
-        
-        return (exitosos, errores)
+        resultados = self.RECIBIR_PEDIDOS(lista_pedido_ids, actualizar_stock)
+        for pedido_id, resultado in resultados.items():
+            if resultado != 'RECIBIDO':
+                print(f"⚠️ Pedido {pedido_id} no recibido: {resultado}")
+        exitosos = sum(1 for resultado in resultados.values() if resultado == 'RECIBIDO')
+        return (exitosos, len(resultados) - exitosos)
     
     def OBTENER_PEDIDO(self, pedido_id):
         """Obtiene la información completa de un pedido."""
@@ -960,13 +1094,16 @@ class GESTOR_PEDIDOS:
             'cancelados': 0
         }
         
-        resultados = self.bd.OBTENER_TODOS(
-            "SELECT estado, COUNT(*) as total FROM pedidos GROUP BY estado"
-        )
+        # Conteo mantenido por triggers (resumen_estados); sin resumen se cuenta la tabla
+        resultados = CONTEO_ESTADOS(self.bd, 'pedidos')
+        if resultados is None:
+            resultados = self.bd.OBTENER_TODOS(
+                "SELECT estado, COUNT(*) as cantidad FROM pedidos GROUP BY estado"
+            )
         
         for row in resultados:
             estado = row['estado'].lower()
-            stats[estado] = row['total']
+            stats[estado] = row['cantidad']
         
         return stats
 
@@ -976,7 +1113,7 @@ class GESTOR_ORDENES:
     def __init__(self, gestor_bd): self.bd = gestor_bd
     def OBTENER_ÓRDENES_POR_TÉCNICO(self, datos_usuario):
         # Soporte para diferentes formatos de datos_usuario
-        if isinstance(datos_usuario, dict):
+        if isinstance(datos_usuario, Mapping):
             uid = datos_usuario['id']
             rol = datos_usuario['rol']
         else:
@@ -989,11 +1126,26 @@ class GESTOR_ORDENES:
              return self.bd.OBTENER_TODOS("SELECT o.*, c.nombre FROM ordenes o LEFT JOIN clientes c ON o.cliente_id = c.id WHERE UPPER(o.estado) != 'ENTREGADO' ORDER BY o.id DESC LIMIT 200")
         return self.bd.OBTENER_TODOS(sql, (uid,))
     def OBTENER_ORDEN_POR_ID(self, orden_id): return self.bd.OBTENER_UNO("SELECT o.*, c.nombre FROM ordenes o LEFT JOIN clientes c ON o.cliente_id = c.id WHERE o.id = ?", (orden_id,))
+    def BUSCAR_ORDENES(self, consulta, limite=100):
+        """Órdenes por equipo, marca, modelo, serie u observación (falla), por relevancia"""
+        filas = BUSCAR_FTS(self.bd, "ordenes_fts", "ordenes", consulta, columnas="t.*, c.nombre", limite=limite,
+                           uniones="LEFT JOIN clientes c ON t.cliente_id = c.id")
+        if filas is not None:
+            return filas
+        q = f"%{consulta.upper()}%"
+        return self.bd.OBTENER_TODOS(
+            "SELECT o.*, c.nombre FROM ordenes o LEFT JOIN clientes c ON o.cliente_id = c.id "
+            "WHERE o.equipo LIKE ? OR o.marca LIKE ? OR o.modelo LIKE ? OR o.serie LIKE ? OR o.observacion LIKE ? "
+            "ORDER BY o.id DESC LIMIT ?", (q, q, q, q, q, limite))
     def OBTENER_DATOS_TICKET(self, orden_id):
         return self.bd.OBTENER_UNO("SELECT o.*, c.cedula, c.nombre, c.telefono, c.email FROM ordenes o JOIN clientes c ON o.cliente_id = c.id WHERE o.id = ?", (orden_id,))
     def OBTENER_HISTORIAL_CLIENTE(self, cid): return self.bd.OBTENER_TODOS("SELECT * FROM ordenes WHERE CLIENTE_ID = ? ORDER BY ID DESC LIMIT 10", (cid,))
     def OBTENER_ÓRDENES_DASHBOARD(self): return self.bd.OBTENER_TODOS("SELECT o.id, o.equipo, o.modelo, o.estado, u.nombre AS tecnico, c.nombre AS cliente FROM ordenes o LEFT JOIN usuarios u ON o.tecnico_id = u.id LEFT JOIN clientes c ON o.cliente_id = c.id WHERE UPPER(o.estado) != 'ENTREGADO' ORDER BY o.id DESC LIMIT 100")
-    def OBTENER_ESTADÍSTICAS_ÓRDENES(self): return self.bd.OBTENER_TODOS("SELECT estado, COUNT(*) AS cantidad FROM ordenes GROUP BY ESTADO")
+    def OBTENER_ESTADÍSTICAS_ÓRDENES(self):
+        filas = CONTEO_ESTADOS(self.bd, 'ordenes')
+        if filas is not None:
+            return filas
+        return self.bd.OBTENER_TODOS("SELECT estado, COUNT(*) AS cantidad FROM ordenes GROUP BY ESTADO")
     def VERIFICAR_GARANTÍA(self, serie):
         if not serie: return []
         return self.bd.OBTENER_TODOS("SELECT o.*, c.nombre FROM ordenes o LEFT JOIN clientes c ON o.cliente_id = c.id WHERE o.serie = ? ORDER BY o.id DESC LIMIT 5", (serie.upper(),))
@@ -1092,6 +1244,7 @@ class GESTOR_ORDENES:
     # Compatibilidad
     get_orders_by_tech = OBTENER_ÓRDENES_POR_TÉCNICO
     get_order_by_id = OBTENER_ORDEN_POR_ID
+    search_orders = BUSCAR_ORDENES
     get_ticket_data = OBTENER_DATOS_TICKET
     get_client_history = OBTENER_HISTORIAL_CLIENTE
     get_dashboard_orders = OBTENER_ÓRDENES_DASHBOARD
@@ -1112,6 +1265,7 @@ class GESTOR_INVENTARIO:
         self._gestor_caja = gestor_caja  # Referencia al gestor de caja
         self._productos_cache = None
         self._cache_timestamp = 0
+        self._stock_por_trigger = None  # Se averigua en la primera venta
     
     def OBTENER_PRODUCTOS(self): 
         # Intentar caché persistente primero
@@ -1125,6 +1279,9 @@ class GESTOR_INVENTARIO:
     
     def OBTENER_PRODUCTOS_CON_PROVEEDOR(self):
         """Obtiene todos los productos con información del proveedor"""
+        if self._cache_inteligente:
+            # Misma lista que cargar_inventario (ORDER BY nombre, id)
+            return self._cache_inteligente.cargar_inventario()
         query = """
             SELECT * FROM inventario
             ORDER BY nombre ASC
@@ -1136,6 +1293,9 @@ class GESTOR_INVENTARIO:
         return self.OBTENER_PRODUCTOS_CON_PROVEEDOR()
     
     def BUSCAR_PRODUCTOS(self, consulta):
+        filas = BUSCAR_FTS(self.bd, "inventario_fts", "inventario", consulta)
+        if filas is not None:
+            return filas
         q = f"%{consulta.upper()}%"
         # Limitar resultados para evitar congelamiento
         return self.bd.OBTENER_TODOS("SELECT * FROM inventario WHERE nombre LIKE ? LIMIT 100", (q,))
@@ -1186,6 +1346,43 @@ class GESTOR_INVENTARIO:
         if self._cache_inteligente:
             self._cache_inteligente.invalidar_inventario()
         return result
+    def _STOCK_POR_TRIGGER(self):
+        """
+        True si la base descuenta el stock con un trigger sobre venta_detalles
+        (esquema optimizado: tr_venta_detalles_insert). En ese caso la venta no
+        hace su propio UPDATE, o el stock se descontaría dos veces.
+        """
+        if self._stock_por_trigger is None:
+            fila = self.bd.OBTENER_UNO(
+                """SELECT COUNT(*) FROM sqlite_master
+                   WHERE type = 'trigger' AND tbl_name = 'venta_detalles'
+                     AND sql LIKE '%AFTER INSERT%' AND sql LIKE '%UPDATE inventario%'"""
+            )
+            self._stock_por_trigger = bool(fila and fila[0])
+        return self._stock_por_trigger
+    
+    def _FALTANTES(self, cantidades):
+        """Productos del pedido {producto_id: cantidad} sin stock suficiente: lista de (id, nombre, stock, pedido)"""
+        valores = ', '.join(['(?, ?)'] * len(cantidades))
+        filas = self.bd.OBTENER_TODOS(
+            f"""WITH pedido(id, cantidad) AS (VALUES {valores})
+                SELECT p.id, i.nombre, i.stock, p.cantidad FROM pedido p
+                LEFT JOIN inventario i ON i.id = p.id
+                WHERE i.id IS NULL OR i.stock < p.cantidad""",
+            tuple(v for par in cantidades.items() for v in par)
+        )
+        return [tuple(f) for f in filas]
+    
+    def _VERIFICAR_STOCK(self, cantidades):
+        """
+        Control de stock de la venta en una sola consulta. Se llama dentro de la
+        transacción (BEGIN IMMEDIATE): nadie más puede vender entre el control y el descuento.
+        Lanza STOCK_INSUFICIENTE, que revierte la venta completa.
+        """
+        faltantes = self._FALTANTES(cantidades)
+        if faltantes:
+            raise STOCK_INSUFICIENTE(faltantes)
+    
     def PROCESAR_VENTA(self, usuario_id, carrito, pagos, total_venta, descuento):
         # Obtener sesión de caja activa (necesaria para transacciones)
         if not self._gestor_caja:
@@ -1202,92 +1399,118 @@ class GESTOR_INVENTARIO:
         total_productos = sum(item[2] * item[3] for item in carrito if not item[4])  # item[4] es es_servicio
         total_final = total_venta - descuento
         
-        # Crear registro de venta (sin transaccion_id por ahora)
-        venta_id = self.bd.EJECUTAR_CONSULTA(
-            "INSERT INTO ventas (usuario_id, fecha, total_productos, descuento, total_final) VALUES (?, datetime('now'), ?, ?, ?)", 
-            (usuario_id, total_productos, descuento, total_final)
-        )
-        if not venta_id: return False
-        
-        # Crear transacción de pago asociada (solo si hay montos > 0)
-        total_pago = pagos['efectivo'] + pagos['transferencia'] + pagos['debito'] + pagos['credito']
-        if total_pago > 0:
-            transaccion_id = self.bd.EJECUTAR_CONSULTA(
-                """INSERT INTO transacciones (
-                    tipo, monto_total, monto_final, 
-                    monto_efectivo, monto_transferencia, monto_debito, monto_credito, 
-                    usuario_id, sesion_caja_id, fecha, referencia_id, referencia_tipo
-                ) VALUES ('VENTA_PRODUCTO', ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), ?, 'venta')""",
-                (total_venta, total_final, 
-                 pagos['efectivo'], pagos['transferencia'], pagos['debito'], pagos['credito'], 
-                 usuario_id, sesion_id, venta_id)
-            )
-            # Enlazar transacción con venta
-            if transaccion_id:
-                self.bd.EJECUTAR_CONSULTA("UPDATE ventas SET transaccion_id = ? WHERE id = ?", (transaccion_id, venta_id))
-        
-        for item in carrito:
-            producto_id, nombre, cantidad, precio, es_servicio, detalles = item
-            subtotal = cantidad * precio
-            if not es_servicio:
-                # Es un producto del inventario
-                self.bd.EJECUTAR_CONSULTA("UPDATE inventario SET STOCK = STOCK - ? WHERE ID = ?", (cantidad, producto_id))
-                self.bd.EJECUTAR_CONSULTA("INSERT INTO venta_detalles (venta_id, producto_id, cantidad, precio_unitario, subtotal) VALUES (?, ?, ?, ?, ?)", (venta_id, producto_id, cantidad, precio, subtotal))
-            else:
-                # Es un servicio (orden) - NO se inserta en venta_detalles, solo se cierra la orden
-                orden_id = producto_id
-                
-                # Obtener datos del técnico para comisión
-                odata = self.bd.OBTENER_UNO("SELECT tecnico_id FROM ordenes WHERE id = ?", (orden_id,))
-                pct_tec = 0
-                if odata:
-                    tdata = self.bd.OBTENER_UNO("SELECT PORCENTAJE_COMISION FROM usuarios WHERE ID = ?", (odata[0],))
-                    if tdata: pct_tec = tdata[0]
-                
-                # ⚠️ CORRECCIÓN CRÍTICA: CERRAR ORDEN ACTUALIZANDO CAMPOS FINANCIEROS
-                # Los triggers calcularán automáticamente: total_a_cobrar, saldo_pendiente, utilidad_bruta
-                tot = precio
-                rep = detalles.get('rep', 0)
-                env = detalles.get('env', 0)
-                con_iva = detalles.get('iva', False)
-                con_tarjeta = detalles.get('card', False)
+        # Toda la venta en una sola transacción: un COMMIT en lugar de uno por sentencia
+        try:
+            with self.bd.TRANSACCION():
+                # Crear registro de venta (sin transaccion_id por ahora)
+                venta_id = self.bd.EJECUTAR_CONSULTA(
+                    "INSERT INTO ventas (usuario_id, fecha, total_productos, descuento, total_final) VALUES (?, datetime('now'), ?, ?, ?)", 
+                    (usuario_id, total_productos, descuento, total_final)
+                )
+        
+                # Crear transacción de pago asociada (solo si hay montos > 0)
+                total_pago = pagos['efectivo'] + pagos['transferencia'] + pagos['debito'] + pagos['credito']
+                if total_pago > 0:
+                    transaccion_id = self.bd.EJECUTAR_CONSULTA(
+                        """INSERT INTO transacciones (
+                            tipo, monto_total, monto_final, 
+                            monto_efectivo, monto_transferencia, monto_debito, monto_credito, 
+                            usuario_id, sesion_caja_id, fecha, referencia_id, referencia_tipo
+                        ) VALUES ('VENTA_PRODUCTO', ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), ?, 'venta')""",
+                        (total_venta, total_final, 
+                         pagos['efectivo'], pagos['transferencia'], pagos['debito'], pagos['credito'], 
+                         usuario_id, sesion_id, venta_id)
+                    )
+                    # Enlazar transacción con venta
+                    if transaccion_id:
+                        self.bd.EJECUTAR_CONSULTA("UPDATE ventas SET transaccion_id = ? WHERE id = ?", (transaccion_id, venta_id))
+        
+                # Productos del inventario: control de stock, descuento y detalle en lote
+                productos = [item for item in carrito if not item[4]]
+                if productos:
+                    cantidades = {}
+                    for producto_id, _, cantidad, _, _, _ in productos:
+                        cantidades[producto_id] = cantidades.get(producto_id, 0) + cantidad
+                    self._VERIFICAR_STOCK(cantidades)
+                    if not self._STOCK_POR_TRIGGER():
+                        # Descuento condicional: una fila sin stock suficiente no se actualiza
+                        afectadas = self.bd.EJECUTAR_MUCHOS(
+                            "UPDATE inventario SET stock = stock - ? WHERE id = ? AND stock >= ?",
+                            [(cantidad, producto_id, cantidad) for producto_id, cantidad in cantidades.items()]
+                        )
+                        if afectadas != len(cantidades):
+                            raise STOCK_INSUFICIENTE(self._FALTANTES(cantidades))
+                    self.bd.EJECUTAR_MUCHOS(
+                        "INSERT INTO venta_detalles (venta_id, producto_id, cantidad, precio_unitario, subtotal) VALUES (?, ?, ?, ?, ?)",
+                        [(venta_id, producto_id, cantidad, precio, cantidad * precio)
+                         for producto_id, _, cantidad, precio, _, _ in productos]
+                    )
+        
+                # Servicios (órdenes): NO van a venta_detalles, solo se cierra la orden
+                servicios = [item for item in carrito if item[4]]
+                if servicios:
+                    # Comisión de los técnicos de todas las órdenes en una sola consulta
+                    ids = [item[0] for item in servicios]
+                    comisiones = dict(self.bd.OBTENER_TODOS(
+                        f"""SELECT o.id, COALESCE(u.porcentaje_comision, 0) FROM ordenes o
+                            LEFT JOIN usuarios u ON u.id = o.tecnico_id
+                            WHERE o.id IN ({', '.join('?' * len(ids))})""",
+                        tuple(ids)
+                    ))
+                    cierres = []
+                    for orden_id, nombre, cantidad, precio, es_servicio, detalles in servicios:
+                        pct_tec = comisiones.get(orden_id, 0)
                 
-                # Calcular comisión técnico
-                m_tarjeta_calc = tot if con_tarjeta else 0
-                m_iva = tot * 0.19 if con_iva else 0
-                m_banco = m_tarjeta_calc * 0.0295
-                util = (tot - m_banco) - rep - env
-                util_com = util * 0.81 if con_iva else util
-                com_tec = max(0, util_com * (pct_tec / 100))
+                        # ⚠️ CORRECCIÓN CRÍTICA: CERRAR ORDEN ACTUALIZANDO CAMPOS FINANCIEROS
+                        # Los triggers calcularán automáticamente: total_a_cobrar, saldo_pendiente, utilidad_bruta
+                        tot = precio
+                        rep = detalles.get('rep', 0)
+                        env = detalles.get('env', 0)
+                        con_iva = detalles.get('iva', False)
+                        con_tarjeta = detalles.get('card', False)
                 
-                # Distribuir pagos mixtos proporcionalmente
-                # Si la venta total tiene múltiples servicios, distribuir pagos proporcionalmente
-                proporcion = precio / total_venta if total_venta > 0 else 1
-                pago_efec_orden = pagos['efectivo'] * proporcion
-                pago_trf_orden = pagos['transferencia'] * proporcion
-                pago_deb_orden = pagos['debito'] * proporcion
-                pago_cred_orden = pagos['credito'] * proporcion
+                        # Calcular comisión técnico
+                        m_tarjeta_calc = tot if con_tarjeta else 0
+                        m_iva = tot * 0.19 if con_iva else 0
+                        m_banco = m_tarjeta_calc * 0.0295
+                        util = (tot - m_banco) - rep - env
+                        util_com = util * 0.81 if con_iva else util
+                        com_tec = max(0, util_com * (pct_tec / 100))
                 
-                # 🔥 ACTUALIZAR ORDEN CON CIERRE FINANCIERO COMPLETO
-                self.bd.EJECUTAR_CONSULTA(
-                    """UPDATE ordenes SET 
-                       fecha_cierre = datetime('now'),
-                       usuario_cierre_id = ?,
-                       pago_efectivo = ?,
-                       pago_transferencia = ?,
-                       pago_debito = ?,
-                       pago_credito = ?,
-                       costo_total_servicios = ?,
-                       costo_envio = ?,
-                       comision_tecnico = ?,
-                       estado = 'Entregado',
-                       condicion = COALESCE(condicion, 'SOLUCIONADO')
-                       WHERE id = ?""",
-                    (usuario_id, pago_efec_orden, pago_trf_orden, pago_deb_orden, pago_cred_orden, 
-                     rep, env, com_tec, orden_id)
-                )
-                print(f"✅ Orden #{orden_id} cerrada: Efectivo=${pago_efec_orden:.0f}, Transferencia=${pago_trf_orden:.0f}, Débito=${pago_deb_orden:.0f}, Crédito=${pago_cred_orden:.0f}")
+                        # Distribuir pagos mixtos proporcionalmente
+                        # Si la venta total tiene múltiples servicios, distribuir pagos proporcionalmente
+                        proporcion = precio / total_venta if total_venta > 0 else 1
+                        cierres.append((usuario_id,
+                                        pagos['efectivo'] * proporcion, pagos['transferencia'] * proporcion,
+                                        pagos['debito'] * proporcion, pagos['credito'] * proporcion,
+                                        rep, env, com_tec, orden_id))
                 
+                    # 🔥 ACTUALIZAR ÓRDENES CON CIERRE FINANCIERO COMPLETO (un executemany)
+                    self.bd.EJECUTAR_MUCHOS(
+                        """UPDATE ordenes SET 
+                           fecha_cierre = datetime('now'),
+                           usuario_cierre_id = ?,
+                           pago_efectivo = ?,
+                           pago_transferencia = ?,
+                           pago_debito = ?,
+                           pago_credito = ?,
+                           costo_total_servicios = ?,
+                           costo_envio = ?,
+                           comision_tecnico = ?,
+                           estado = 'Entregado',
+                           condicion = COALESCE(condicion, 'SOLUCIONADO')
+                           WHERE id = ?""",
+                        cierres
+                    )
+                    for _, efec, trf, deb, cred, _, _, _, orden_id in cierres:
+                        print(f"✅ Orden #{orden_id} cerrada: Efectivo=${efec:.0f}, Transferencia=${trf:.0f}, Débito=${deb:.0f}, Crédito=${cred:.0f}")
+        except STOCK_INSUFICIENTE as e:
+            print(f"⚠️ Venta cancelada, stock insuficiente: {e}")
+            return False
+        except sqlite3.Error as e:
+            print(f"❌ ERROR al procesar venta (revertida): {e}")
+            return False
+        
         return venta_id
     
     # Compatibilidad
@@ -1317,9 +1540,19 @@ class GESTOR_CAJA:
         if not sesión: return []
         return self.bd.OBTENER_TODOS("SELECT * FROM gastos WHERE SESION_ID = ? ORDER BY ID DESC", (sesión[0],))
 
-    def OBTENER_VENTAS_TURNO_ACTUAL(self, usuario_id):
-        sesión = self.OBTENER_SESIÓN_ACTIVA(usuario_id)
-        if not sesión: return (0,0,0,0)
+    def OBTENER_TOTALES_SESIÓN(self, sesion_id):
+        """Totales del turno desde caja_sesion_totales (dict de resumenes.TOTALES_SESION_CAJA), o None si la base no lo tiene"""
+        return TOTALES_SESION_CAJA(self.bd, sesion_id)
+
+    def _TOTALES_TURNO(self, sesión):
+        """
+        (efectivo, transferencia, débito, crédito, gastos) del turno: una fila del libro
+        de totales, o en bases sin él las sumas de ventas/transacciones y gastos
+        """
+        totales = self.OBTENER_TOTALES_SESIÓN(sesión[0])
+        if totales is not None:
+            return (totales['efectivo'], totales['transferencia'], totales['debito'], totales['credito'],
+                    totales['total_gastos'])
         
         # Ventas (POS) - Obtener pagos desde transacciones vinculadas a ventas
         # La tabla ventas tiene transaccion_id que enlaza con transacciones
@@ -1332,23 +1565,24 @@ class GESTOR_CAJA:
             FROM ventas v 
             LEFT JOIN transacciones t ON v.transaccion_id = t.id
             WHERE v.usuario_id = ? AND v.fecha >= ?
-        """, (usuario_id, sesión[2],))
+        """, (sesión[1], sesión[2],))
+        ventas = (0, 0, 0, 0) if not res_p or res_p[0] is None else tuple(v or 0 for v in res_p)
         
-        if not res_p or res_p[0] is None:
-            return (0, 0, 0, 0)
-        
-        return (res_p[0] or 0, res_p[1] or 0, res_p[2] or 0, res_p[3] or 0)
+        # Gastos
+        gastos = self.bd.OBTENER_UNO("SELECT SUM(monto) FROM gastos WHERE SESION_ID = ?", (sesión[0],))
+        return (*ventas, (gastos[0] if gastos else 0) or 0)
+
+    def OBTENER_VENTAS_TURNO_ACTUAL(self, usuario_id):
+        sesión = self.OBTENER_SESIÓN_ACTIVA(usuario_id)
+        if not sesión: return (0,0,0,0)
+        return self._TOTALES_TURNO(sesión)[:4]
 
     def CERRAR_TURNO(self, usuario_id, r_efec, r_trf, r_deb, r_cred):
         sesión = self.OBTENER_SESIÓN_ACTIVA(usuario_id)
         if not sesión: return False
         
-        # Ventas Sistema
-        ventas = self.OBTENER_VENTAS_TURNO_ACTUAL(usuario_id) # (Efec, Trf, Deb, Cred)
-        
-        # Gastos
-        gastos = self.bd.OBTENER_UNO("SELECT SUM(monto) FROM gastos WHERE SESION_ID = ?", (sesión[0],))
-        total_gastos = gastos[0] or 0
+        # Ventas Sistema (Efec, Trf, Deb, Cred) y Gastos: una sola lectura
+        *ventas, total_gastos = self._TOTALES_TURNO(sesión)
         
         # Calculo Final Sistema (Solo Efectivo se ve afectado por gastos en caja fisica, pero el sistema debe cuadrar todo)
         # Sistema dice: Tienes X en efectivo. Menos gastos Y. Total esperado en caja = X - Y + Fondo
@@ -1383,6 +1617,7 @@ class GESTOR_CAJA:
     add_expense = AGREGAR_GASTO
     get_session_expenses = OBTENER_GASTOS_SESIÓN
     get_current_shift_sales = OBTENER_VENTAS_TURNO_ACTUAL
+    get_session_totals = OBTENER_TOTALES_SESIÓN
     close_shift = CERRAR_TURNO
 
 class GESTOR_REPORTES:
@@ -1404,11 +1639,14 @@ class GESTOR_REPORTES:
         WHERE o.tecnico_id = ? AND o.fecha_cierre IS NOT NULL AND o.estado = 'Entregado'"""
         parámetros = [tecnico_id]
         if fecha_inicio and fecha_fin:
-            consulta += " AND date(o.fecha_cierre) BETWEEN ? AND ?"
-            parámetros.extend([fecha_inicio, fecha_fin])
+            condicion, limites = PREDICADO_RANGO("o.fecha_cierre", *LIMITES_DIAS(fecha_inicio, fecha_fin))
+            consulta += f" AND {condicion}"
+            parámetros.extend(limites)
         consulta += " ORDER BY o.fecha_cierre DESC"
         return self.bd.OBTENER_TODOS(consulta, tuple(parámetros))
-    def OBTENER_VENTAS_DIARIAS(self): return self.bd.OBTENER_TODOS("""SELECT 
+    def OBTENER_VENTAS_DIARIAS(self):
+        condicion, limites = PREDICADO_RANGO("o.fecha_cierre", *LIMITES_DIA())
+        return self.bd.OBTENER_TODOS(f"""SELECT 
         o.id, 
         o.id as orden_id, 
         o.equipo, 
@@ -1419,10 +1657,10 @@ class GESTOR_REPORTES:
         o.comision_tecnico 
     FROM ordenes o 
     JOIN usuarios u ON o.tecnico_id = u.id 
-    WHERE date(o.fecha_cierre) = date('now') AND o.fecha_cierre IS NOT NULL AND o.estado = 'Entregado'""")
+    WHERE {condicion} AND o.estado = 'Entregado'""", limites)
 
-    def OBTENER_HISTORIAL_COMPLETO_ORDENES(self):
-        return self.bd.OBTENER_TODOS("""
+    # Consultas de historial completo (compartidas por la versión en lista, la iterada y la paginada)
+    _COLUMNAS_HISTORIAL_ORDENES = """
             SELECT 
                 o.id,                                    -- 0: ID
                 o.fecha_entrada,                         -- 1: FECHA
@@ -1434,11 +1672,108 @@ class GESTOR_REPORTES:
                 COALESCE(o.condicion, 'PENDIENTE') AS condicion,  -- 7: CONDICIÓN
                 o.fecha_entrega,                         -- 8: F.ENTREGA
                 COALESCE(o.presupuesto_inicial, 0) AS total      -- 9: TOTAL
-            FROM ordenes o
+        """
+    _UNIONES_HISTORIAL_ORDENES = """
             LEFT JOIN clientes c ON o.cliente_id = c.id
             LEFT JOIN usuarios u ON o.tecnico_id = u.id
-            ORDER BY o.id DESC
-        """)
+        """
+    _SQL_HISTORIAL_ORDENES = (_COLUMNAS_HISTORIAL_ORDENES + "FROM ordenes o" + _UNIONES_HISTORIAL_ORDENES
+                              + "ORDER BY o.id DESC")
+
+    _SQL_HISTORIAL_VENTAS = """
+            SELECT v.id, v.fecha, u.nombre, v.total_final, 0 as pago_efectivo, 0 as pago_transferencia, 0 as pago_debito, 0 as pago_credito
+            FROM ventas v
+            LEFT JOIN usuarios u ON v.usuario_id = u.id
+            ORDER BY v.id DESC
+        """
+
+    def OBTENER_HISTORIAL_COMPLETO_ORDENES(self):
+        return self.bd.OBTENER_TODOS(self._SQL_HISTORIAL_ORDENES)
+
+    def ITERAR_HISTORIAL_COMPLETO_ORDENES(self, batch=500):
+        """Igual que OBTENER_HISTORIAL_COMPLETO_ORDENES pero por bloques (no carga todo en memoria)"""
+        return self.bd.ITERAR(self._SQL_HISTORIAL_ORDENES, batch=batch)
+
+    def BUSCAR_HISTORIAL_ORDENES(self, estado=None, tecnico_id=None, desde=None, hasta=None, texto="",
+                                 cursor=None, limite=100):
+        """
+        Página del historial de órdenes con todos los filtros en SQL (mismas columnas que
+        OBTENER_HISTORIAL_COMPLETO_ORDENES, de la más nueva a la más antigua)
+        
+        - estado: idx_ordenes_estado (ya ordenado por id); técnico: idx_ordenes_tecnico_estado_cierre
+        - desde/hasta: días de ingreso, ambos incluidos (rango sobre idx_ordenes_fecha_entrada)
+        - texto: N° de orden, o palabras por prefijo en equipo/marca/modelo/serie/falla
+          (ordenes_fts) y en nombre/RUT/teléfono del cliente (clientes_fts); LIKE si no hay FTS
+        - cursor: paginación por clave (o.id < cursor), sin OFFSET que recorra las páginas anteriores
+        
+        Returns:
+            dict con 'filas' (lista de FILA), 'total' (órdenes que cumplen los filtros; solo en
+            la primera página, con cursor es None: el llamador conserva el de la primera)
+            y 'siguiente' (cursor de la página siguiente, o None si es la última)
+        """
+        condiciones, parámetros = [], []
+        unir_clientes = False
+        if estado:
+            condiciones.append("o.estado = ?")
+            parámetros.append(estado)
+        if tecnico_id is not None:
+            condiciones.append("o.tecnico_id = ?")
+            parámetros.append(tecnico_id)
+        if desde is not None or hasta is not None:
+            condicion, limites = PREDICADO_RANGO(
+                "o.fecha_entrada",
+                LIMITES_DIAS(desde)[0] if desde is not None else None,
+                LIMITES_DIAS(hasta)[1] if hasta is not None else None
+            )
+            condiciones.append(condicion)
+            parámetros.extend(limites)
+        
+        texto = (texto or "").strip()
+        if texto:
+            opciones = []
+            if texto.lstrip("#").isdigit():
+                opciones.append("o.id = ?")
+                parámetros.append(int(texto.lstrip("#")))
+            expresion = EXPRESION_FTS(texto)
+            like = f"%{texto.upper()}%"
+            if expresion and FTS_DISPONIBLE(self.bd, "ordenes_fts"):
+                opciones.append("o.id IN (SELECT rowid FROM ordenes_fts WHERE ordenes_fts MATCH ?)")
+                parámetros.append(expresion)
+            else:
+                opciones.append("(o.equipo LIKE ? OR o.modelo LIKE ?)")
+                parámetros.extend((like, like))
+            if expresion and FTS_DISPONIBLE(self.bd, "clientes_fts"):
+                opciones.append("o.cliente_id IN (SELECT rowid FROM clientes_fts WHERE clientes_fts MATCH ?)")
+                parámetros.append(expresion)
+            else:
+                opciones.append("c.nombre LIKE ?")
+                parámetros.append(like)
+                unir_clientes = True
+            condiciones.append(f"({' OR '.join(opciones)})")
+        
+        filtro = " AND ".join(condiciones) or "1"
+        origen = f"ordenes o {'LEFT JOIN clientes c ON o.cliente_id = c.id ' if unir_clientes else ''}"
+        if cursor is None:
+            # El COUNT recorre todo el conjunto filtrado: una vez por búsqueda, no por página
+            total = self.bd.OBTENER_UNO(f"SELECT COUNT(*) FROM {origen}WHERE {filtro}", tuple(parámetros))
+            total = total[0] if total else 0
+        else:
+            total = None
+            filtro += " AND o.id < ?"
+            parámetros.append(cursor)
+        # Primero los ids de la página (recorrido por id descendente que corta en el LIMIT),
+        # después los JOIN solo para esas filas
+        filas = self.bd.OBTENER_TODOS(
+            f"{self._COLUMNAS_HISTORIAL_ORDENES} "
+            f"FROM (SELECT o.id FROM {origen}WHERE {filtro} ORDER BY o.id DESC LIMIT ?) p "
+            f"JOIN ordenes o ON o.id = p.id {self._UNIONES_HISTORIAL_ORDENES} ORDER BY o.id DESC",
+            (*parámetros, limite)
+        )
+        return {
+            'filas': filas,
+            'total': total,
+            'siguiente': filas[-1][0] if len(filas) == limite else None,
+        }
 
     def OBTENER_FINANZAS_ORDEN(self, orden_id):
         """Obtiene información financiera de una orden (ahora directo de tabla ordenes)"""
@@ -1459,12 +1794,11 @@ class GESTOR_REPORTES:
         """, (orden_id,))
 
     def OBTENER_HISTORIAL_COMPLETO_VENTAS(self):
-        return self.bd.OBTENER_TODOS("""
-            SELECT v.id, v.fecha, u.nombre, v.total_final, 0 as pago_efectivo, 0 as pago_transferencia, 0 as pago_debito, 0 as pago_credito
-            FROM ventas v
-            LEFT JOIN usuarios u ON v.usuario_id = u.id
-            ORDER BY v.id DESC
-        """)
+        return self.bd.OBTENER_TODOS(self._SQL_HISTORIAL_VENTAS)
+
+    def ITERAR_HISTORIAL_COMPLETO_VENTAS(self, batch=500):
+        """Igual que OBTENER_HISTORIAL_COMPLETO_VENTAS pero por bloques (no carga todo en memoria)"""
+        return self.bd.ITERAR(self._SQL_HISTORIAL_VENTAS, batch=batch)
 
     def OBTENER_DETALLES_VENTA(self, venta_id):
         return self.bd.OBTENER_TODOS("""
@@ -1480,6 +1814,9 @@ class GESTOR_REPORTES:
     get_full_history_orders = OBTENER_HISTORIAL_COMPLETO_ORDENES
     get_order_financials = OBTENER_FINANZAS_ORDEN
     get_full_history_sales = OBTENER_HISTORIAL_COMPLETO_VENTAS
+    iter_full_history_orders = ITERAR_HISTORIAL_COMPLETO_ORDENES
+    search_order_history = BUSCAR_HISTORIAL_ORDENES
+    iter_full_history_sales = ITERAR_HISTORIAL_COMPLETO_VENTAS
     get_sale_details = OBTENER_DETALLES_VENTA
 
 class GESTOR_LOGICA:
@@ -0,0 +1,248 @@
+"""
+SERVICIO DE MANTENIMIENTO DE SQLITE EN SEGUNDO PLANO
+Reemplaza el ANALYZE bloqueante del arranque y los scripts manuales de optimización:
+
+- PRAGMA optimize: estadísticas del planificador solo donde hacen falta (barato)
+- wal_checkpoint(PASSIVE): pasa el WAL a la base sin bloquear a nadie
+- wal_checkpoint(TRUNCATE): en inactividad, recorta el archivo -wal a 0 bytes
+- incremental_vacuum: devuelve páginas libres al sistema (si auto_vacuum=INCREMENTAL)
+- respaldo incremental (opcional): solo si hubo escrituras desde el anterior
+
+Cada tarea se dispara por tiempo y, las que molestan a los usuarios, solo cuando
+no hubo escrituras durante un rato. Todo queda registrado con su duración.
+
+Uso:
+    mantenimiento = SERVICIO_MANTENIMIENTO(bd, respaldos=ALMACEN_RESPALDOS())
+    mantenimiento.INICIAR()
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Intervalos por defecto (segundos)
+INTERVALO_REVISION = 30  # Cada cuánto despierta el hilo
+INTERVALO_CHECKPOINT = 300  # Checkpoint pasivo
+INTERVALO_OPTIMIZE = 3600  # PRAGMA optimize
+INTERVALO_VACUUM = 6 * 3600  # incremental_vacuum
+INACTIVIDAD_MINIMA = 60  # Sin escrituras durante este tiempo = inactivo
+UMBRAL_WAL_MB = 16  # Con el WAL sobre este tamaño se intenta TRUNCATE al estar inactivo
+PAGINAS_VACUUM = 2000  # Páginas liberadas por pasada de incremental_vacuum
+INTERVALO_RESPALDO = 600  # Respaldo incremental (si hubo cambios)
+RESPALDO_FORZADO = 6  # Sin cambios propios, igual se respalda cada 6 intervalos (otros procesos pueden escribir)
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class SERVICIO_MANTENIMIENTO:
+    """
+    Hilo de mantenimiento de la base de datos (daemon)
+
+    Usa la conexión escritora de GESTOR_BASE_DATOS mediante EJECUTAR_PRAGMA,
+    tomando el lock con espera acotada: si hay una transacción en curso, la
+    tarea se pospone a la siguiente revisión en vez de bloquear a la caja.
+    """
+
+    def __init__(self, bd, intervalo_checkpoint=INTERVALO_CHECKPOINT, intervalo_optimize=INTERVALO_OPTIMIZE,
+                 intervalo_vacuum=INTERVALO_VACUUM, inactividad_minima=INACTIVIDAD_MINIMA,
+                 umbral_wal_mb=UMBRAL_WAL_MB, intervalo_revision=INTERVALO_REVISION,
+                 respaldos=None, intervalo_respaldo=INTERVALO_RESPALDO):
+        """
+        Args:
+            respaldos: ALMACEN_RESPALDOS para respaldos incrementales periódicos (None = desactivado)
+        """
+        self.bd = bd
+        self.intervalo_checkpoint = intervalo_checkpoint
+        self.intervalo_optimize = intervalo_optimize
+        self.intervalo_vacuum = intervalo_vacuum
+        self.inactividad_minima = inactividad_minima
+        self.umbral_wal_bytes = umbral_wal_mb * 1024 * 1024
+        self.intervalo_revision = intervalo_revision
+        self.respaldos = respaldos
+        self.intervalo_respaldo = intervalo_respaldo
+
+        self._detener = threading.Event()
+        self._hilo = None
+        self._historial = deque(maxlen=100)
+
+        ahora = time.monotonic()
+        self._ultimo_checkpoint = ahora
+        self._ultimo_optimize = ahora
+        self._ultimo_vacuum = ahora
+        self._ultimo_respaldo = ahora
+        self._cambios_respaldados = None  # El primer respaldo se hace siempre
+        self._ultimos_cambios = bd.CAMBIOS_TOTALES()
+        self._ultima_actividad = ahora
+
+    # --- CICLO DE VIDA ---
+
+    def INICIAR(self):
+        """Arranca el hilo de mantenimiento (idempotente)"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="mantenimiento_bd", daemon=True)
+        self._hilo.start()
+
+    def DETENER(self, espera=5.0):
+        """Detiene el hilo; la tarea en curso (si hay) termina antes"""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(espera)
+            self._hilo = None
+
+    def _bucle(self):
+        # Al abrir: estadísticas solo de tablas que lo necesiten (reemplaza el ANALYZE de inicio)
+        self._ejecutar("optimize (inicio)", "PRAGMA optimize=0x10002")
+        while not self._detener.wait(self.intervalo_revision):
+            try:
+                self.REVISAR()
+            except Exception as e:
+                print(f"⚠️ Mantenimiento BD: {e}")
+
+    # --- PROGRAMACIÓN ---
+
+    def _inactivo(self, ahora):
+        """Sin escrituras desde la última revisión durante al menos inactividad_minima"""
+        cambios = self.bd.CAMBIOS_TOTALES()
+        if cambios != self._ultimos_cambios:
+            self._ultimos_cambios = cambios
+            self._ultima_actividad = ahora
+        return ahora - self._ultima_actividad >= self.inactividad_minima
+
+    def REVISAR(self):
+        """Una pasada del planificador: ejecuta las tareas vencidas"""
+        ahora = time.monotonic()
+        inactivo = self._inactivo(ahora)
+
+        if ahora - self._ultimo_checkpoint >= self.intervalo_checkpoint:
+            if self.CHECKPOINT("PASSIVE") is not None:
+                self._ultimo_checkpoint = ahora
+
+        if inactivo and self.TAMANO_WAL() >= self.umbral_wal_bytes:
+            self.CHECKPOINT("TRUNCATE")
+
+        if inactivo and ahora - self._ultimo_optimize >= self.intervalo_optimize:
+            if self.OPTIMIZAR() is not None:
+                self._ultimo_optimize = ahora
+
+        if inactivo and ahora - self._ultimo_vacuum >= self.intervalo_vacuum:
+            self.VACUUM_INCREMENTAL()
+            self._ultimo_vacuum = ahora
+
+        if self.respaldos is not None and ahora - self._ultimo_respaldo >= self.intervalo_respaldo:
+            forzar = ahora - self._ultimo_respaldo >= RESPALDO_FORZADO * self.intervalo_respaldo
+            if self.RESPALDO_INCREMENTAL(forzar=forzar) is not None:
+                self._ultimo_respaldo = ahora
+
+    # --- TAREAS ---
+
+    def _ejecutar(self, tarea, pragma, espera=2.0, busy_timeout_ms=None):
+        """Ejecuta y registra la duración; None si el escritor estaba ocupado o falló"""
+        inicio = time.perf_counter()
+        try:
+            filas = self.bd.EJECUTAR_PRAGMA(pragma, espera=espera, busy_timeout_ms=busy_timeout_ms)
+        except Exception as e:
+            print(f"⚠️ Mantenimiento BD: {tarea} falló: {e}")
+            return None
+        if filas is None:
+            return None  # Escritor ocupado: se reintenta en la próxima revisión
+        ms = (time.perf_counter() - inicio) * 1000
+        self._historial.append({
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'tarea': tarea,
+            'ms': round(ms, 2),
+            'resultado': [tuple(f) for f in filas[:3]],
+        })
+        print(f"🧰 Mantenimiento BD: {tarea} en {ms:.1f} ms {filas[0] if filas else ''}")
+        return filas
+
+    def OPTIMIZAR(self):
+        """PRAGMA optimize: ANALYZE solo de lo que cambió lo suficiente"""
+        return self._ejecutar("optimize", "PRAGMA optimize")
+
+    def CHECKPOINT(self, modo="PASSIVE"):
+        """
+        Checkpoint del WAL
+        PASSIVE nunca espera; TRUNCATE solo se intenta sin lecturas en curso y con un
+        busy_timeout corto, para no retener el lock de escritura esperando a lectores
+        """
+        if modo != "PASSIVE":
+            if self.bd.LECTURAS_ACTIVAS() > 0:
+                return None
+            return self._ejecutar(f"wal_checkpoint({modo})", f"PRAGMA wal_checkpoint({modo})", busy_timeout_ms=200)
+        return self._ejecutar("wal_checkpoint(PASSIVE)", "PRAGMA wal_checkpoint(PASSIVE)")
+
+    def VACUUM_INCREMENTAL(self, paginas=PAGINAS_VACUUM):
+        """Libera páginas vacías; solo aplica con auto_vacuum=INCREMENTAL"""
+        modo = self.bd.EJECUTAR_PRAGMA("PRAGMA auto_vacuum", espera=2.0)
+        if not modo or modo[0][0] != AUTO_VACUUM_INCREMENTAL:
+            return None
+        libres = self.bd.EJECUTAR_PRAGMA("PRAGMA freelist_count", espera=2.0)
+        if not libres or libres[0][0] == 0:
+            return None
+        return self._ejecutar(f"incremental_vacuum ({libres[0][0]} páginas libres)",
+                              f"PRAGMA incremental_vacuum({int(paginas)})")
+
+    def RESPALDO_INCREMENTAL(self, forzar=False):
+        """
+        Respaldo incremental + retención; se omite si esta instancia no escribió nada
+        desde el anterior (salvo forzar). None si no se hizo
+        """
+        if self.respaldos is None:
+            return None
+        cambios = self.bd.CAMBIOS_TOTALES()
+        if not forzar and cambios == self._cambios_respaldados:
+            return None
+        inicio = time.perf_counter()
+        ok, info = self.respaldos.CREAR(self.bd)
+        if not ok:
+            return None
+        self._cambios_respaldados = cambios
+        poda = self.respaldos.APLICAR_RETENCION()
+        self._historial.append({
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'tarea': 'respaldo incremental',
+            'ms': round((time.perf_counter() - inicio) * 1000, 2),
+            'resultado': [(info.get('bloques_nuevos', 0), poda['respaldos_eliminados'])],
+        })
+        return info
+
+    def TAMANO_WAL(self):
+        """Tamaño en bytes del archivo -wal (0 si no existe)"""
+        try:
+            return os.path.getsize(f"{self.bd.nombre_bd}-wal")
+        except OSError:
+            return 0
+
+    def MANTENIMIENTO_COMPLETO(self, vacuum_completo=False):
+        """
+        Todas las tareas de inmediato (uso manual / scripts, con la app cerrada)
+
+        Args:
+            vacuum_completo: VACUUM total (reescribe el archivo; bloquea la base mientras dura)
+        """
+        self.OPTIMIZAR()
+        self.CHECKPOINT("TRUNCATE")
+        self.VACUUM_INCREMENTAL()
+        if vacuum_completo:
+            self._ejecutar("VACUUM", "VACUUM", espera=None)
+            self.CHECKPOINT("TRUNCATE")
+
+    def ACTIVAR_VACUUM_INCREMENTAL(self):
+        """
+        Cambia la base a auto_vacuum=INCREMENTAL (requiere un VACUUM completo una vez)
+        A partir de ahí, VACUUM_INCREMENTAL puede devolver espacio sin reescribir el archivo
+        """
+        self.bd.EJECUTAR_PRAGMA("PRAGMA auto_vacuum=INCREMENTAL")
+        self._ejecutar("VACUUM (activar auto_vacuum incremental)", "VACUUM", espera=None)
+
+    def ESTADISTICAS(self):
+        """Estado del servicio y últimas ejecuciones"""
+        return {
+            'activo': self._hilo is not None and self._hilo.is_alive(),
+            'wal_mb': round(self.TAMANO_WAL() / (1024 * 1024), 2),
+            'historial': list(self._historial),
+        }
@@ -0,0 +1,861 @@
+"""
+MIGRACIONES DE ESQUEMA VERSIONADAS
+Registro numerado de cambios de esquema, controlado por PRAGMA user_version.
+
+- Cada migración se aplica una sola vez, dentro de su propia transacción,
+  y deja user_version en su número: si falla, se revierte completa
+- Con el esquema al día, el arranque solo lee user_version (sin DDL ni ANALYZE)
+- Las migraciones son idempotentes (IF NOT EXISTS / verificación de columnas)
+  porque las bases existentes anteriores a este registro tienen user_version = 0
+  y parte del esquema ya creado
+
+Para agregar un cambio de esquema: escribir una función _mNNN_descripcion(bd)
+y añadirla al final de MIGRACIONES con el siguiente número. Nunca renumerar.
+"""
+
+import sqlite3
+
+
+_TABLAS_BASE = [
+    """CREATE TABLE IF NOT EXISTS usuarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT UNIQUE,
+        password TEXT,
+        rol TEXT,
+        porcentaje_comision REAL DEFAULT 50
+    )""",
+    """CREATE TABLE IF NOT EXISTS clientes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cedula TEXT UNIQUE,
+        nombre TEXT,
+        telefono TEXT,
+        email TEXT,
+        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS categorias (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT UNIQUE NOT NULL,
+        tipo TEXT CHECK(tipo IN ('PRODUCTO', 'REPUESTO')) NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS inventario (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT UNIQUE,
+        categoria TEXT,
+        costo REAL,
+        precio REAL,
+        stock INTEGER,
+        proveedor_id INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (proveedor_id) REFERENCES proveedores (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS repuestos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT UNIQUE,
+        categoria TEXT,
+        costo REAL,
+        precio_sugerido REAL,
+        stock INTEGER,
+        proveedor_id INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (proveedor_id) REFERENCES proveedores (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS servicios_predefinidos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre_servicio TEXT UNIQUE,
+        categoria TEXT,
+        costo_mano_obra REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS ordenes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cliente_id INTEGER NOT NULL,
+        tecnico_id INTEGER,
+        
+        -- INFORMACIÓN DEL EQUIPO
+        fecha_entrada TEXT DEFAULT CURRENT_TIMESTAMP,
+        fecha_entrega TEXT,
+        equipo TEXT,
+        marca TEXT,
+        modelo TEXT,
+        serie TEXT,
+        observacion TEXT,
+        accesorios TEXT,
+        riesgoso INTEGER DEFAULT 0,
+        
+        -- ESTADOS
+        estado TEXT CHECK(estado IN ('Pendiente', 'En Proceso', 'Reparado', 'Entregado', 'Sin solución')) DEFAULT 'Pendiente',
+        condicion TEXT CHECK(condicion IN ('PENDIENTE', 'SOLUCIONADO', 'SIN SOLUCIÓN')) DEFAULT 'PENDIENTE',
+        
+        -- FINANZAS INTEGRADAS (TODO EN UNA TABLA)
+        presupuesto_inicial REAL DEFAULT 0,
+        costo_total_repuestos REAL DEFAULT 0,
+        costo_total_servicios REAL DEFAULT 0,
+        costo_envio REAL DEFAULT 0,
+        descuento REAL DEFAULT 0,
+        total_a_cobrar REAL DEFAULT 0,
+        abono REAL DEFAULT 0,
+        saldo_pendiente REAL DEFAULT 0,
+        utilidad_bruta REAL DEFAULT 0,
+        comision_tecnico REAL DEFAULT 0,
+        
+        -- MÉTODOS DE PAGO (PARA REPARACIONES)
+        pago_efectivo REAL DEFAULT 0,
+        pago_transferencia REAL DEFAULT 0,
+        pago_debito REAL DEFAULT 0,
+        pago_credito REAL DEFAULT 0,
+        
+        -- AUDITORÍA
+        fecha_cierre TEXT,
+        usuario_cierre_id INTEGER,
+        
+        FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE RESTRICT,
+        FOREIGN KEY (tecnico_id) REFERENCES usuarios(id) ON DELETE SET NULL,
+        FOREIGN KEY (usuario_cierre_id) REFERENCES usuarios(id) ON DELETE SET NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS caja_sesiones (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario_id INTEGER,
+        fecha_apertura TEXT,
+        fecha_cierre TEXT,
+        monto_inicial REAL,
+        monto_final_sistema REAL,
+        monto_final_real REAL,
+        real_efectivo REAL DEFAULT 0,
+        real_transferencia REAL DEFAULT 0,
+        real_debito REAL DEFAULT 0,
+        real_credito REAL DEFAULT 0,
+        total_gastos REAL DEFAULT 0,
+        diferencia REAL,
+        estado TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS gastos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sesion_id INTEGER,
+        descripcion TEXT,
+        monto REAL,
+        fecha TEXT,
+        FOREIGN KEY(sesion_id) REFERENCES caja_sesiones(id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS modelos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tipo_dispositivo TEXT,
+        marca TEXT,
+        modelo TEXT,
+        UNIQUE(tipo_dispositivo, marca, modelo)
+    )""",
+    """CREATE TABLE IF NOT EXISTS marcas_personalizadas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT UNIQUE,
+        fecha_creacion TEXT DEFAULT (DATETIME('NOW'))
+    )""",
+    """CREATE TABLE IF NOT EXISTS ventas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario_id INTEGER,
+        cliente_id INTEGER,
+        fecha TEXT,
+        total REAL,
+        descuento REAL DEFAULT 0,
+        pago_efectivo REAL DEFAULT 0,
+        pago_transferencia REAL DEFAULT 0,
+        pago_debito REAL DEFAULT 0,
+        pago_credito REAL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS detalle_ventas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        venta_id INTEGER,
+        producto_id INTEGER,
+        orden_id INTEGER,
+        cantidad INTEGER,
+        precio_unitario REAL,
+        subtotal REAL,
+        FOREIGN KEY(venta_id) REFERENCES ventas(id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS proveedores (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT UNIQUE,
+        telefono TEXT,
+        email TEXT,
+        direccion TEXT,
+        saldo_pendiente REAL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS precios_proveedor (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        proveedor_id INTEGER,
+        repuesto_id INTEGER,
+        precio REAL,
+        fecha_actualizacion TEXT DEFAULT (DATETIME('NOW')),
+        FOREIGN KEY(proveedor_id) REFERENCES proveedores(id),
+        FOREIGN KEY(repuesto_id) REFERENCES repuestos(id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS compras (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        proveedor_id INTEGER,
+        fecha TEXT,
+        total REAL,
+        estado TEXT,
+        tipo_documento TEXT,
+        numero_documento TEXT,
+        observacion TEXT,
+        FOREIGN KEY(proveedor_id) REFERENCES proveedores(id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS detalle_compras (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        compra_id INTEGER,
+        producto_id INTEGER,
+        tipo_producto TEXT,
+        cantidad INTEGER,
+        costo_unitario REAL,
+        subtotal REAL,
+        FOREIGN KEY(compra_id) REFERENCES compras(id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS pedidos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        orden_id INTEGER,
+        producto_id INTEGER,
+        repuesto_id INTEGER,
+        proveedor_id INTEGER NOT NULL,
+        cantidad INTEGER NOT NULL,
+        estado TEXT DEFAULT 'PENDIENTE',
+        fecha_solicitud TEXT,
+        fecha_pedido TEXT,
+        fecha_recepcion TEXT,
+        notas TEXT,
+        usuario_solicita TEXT,
+        FOREIGN KEY(orden_id) REFERENCES ordenes(id),
+        FOREIGN KEY(producto_id) REFERENCES inventario(id),
+        FOREIGN KEY(repuesto_id) REFERENCES repuestos(id),
+        FOREIGN KEY(proveedor_id) REFERENCES proveedores(id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS pagos_proveedor (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        proveedor_id INTEGER,
+        fecha TEXT,
+        monto REAL,
+        metodo_pago TEXT,
+        referencia TEXT,
+        observacion TEXT,
+        FOREIGN KEY(proveedor_id) REFERENCES proveedores(id)
+    )"""
+]
+
+# ÍNDICES PARA OPTIMIZACIÓN DE CONSULTAS
+_INDICES_BASE = [
+    "CREATE INDEX IF NOT EXISTS idx_clientes_cedula ON clientes(cedula)",
+    "CREATE INDEX IF NOT EXISTS idx_clientes_nombre ON clientes(nombre)",
+    "CREATE INDEX IF NOT EXISTS idx_ordenes_cliente ON ordenes(cliente_id)",
+    "CREATE INDEX IF NOT EXISTS idx_ordenes_estado ON ordenes(estado)",
+    "CREATE INDEX IF NOT EXISTS idx_ordenes_fecha ON ordenes(fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_ordenes_tecnico ON ordenes(tecnico_id)",
+    "CREATE INDEX IF NOT EXISTS idx_ventas_usuario ON ventas(usuario_id)",
+    "CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas(fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_detalle_ventas_venta ON detalle_ventas(venta_id)",
+    "CREATE INDEX IF NOT EXISTS idx_precios_proveedor_repuesto ON precios_proveedor(repuesto_id)",
+    "CREATE INDEX IF NOT EXISTS idx_precios_proveedor_proveedor ON precios_proveedor(proveedor_id)",
+    "CREATE INDEX IF NOT EXISTS idx_compras_proveedor ON compras(proveedor_id)",
+    "CREATE INDEX IF NOT EXISTS idx_compras_fecha ON compras(fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_detalle_compras_compra ON detalle_compras(compra_id)",
+    "CREATE INDEX IF NOT EXISTS idx_pagos_proveedor_proveedor ON pagos_proveedor(proveedor_id)",
+    "CREATE INDEX IF NOT EXISTS idx_gastos_sesion ON gastos(sesion_id)",
+    "CREATE INDEX IF NOT EXISTS idx_caja_sesiones_usuario ON caja_sesiones(usuario_id)",
+    "CREATE INDEX IF NOT EXISTS idx_modelos_lookup ON modelos(tipo_dispositivo, marca)",
+    # ÍNDICES CRÍTICOS PARA INVENTARIO Y REPUESTOS (OPTIMIZACIÓN DE BÚSQUEDAS)
+    "CREATE INDEX IF NOT EXISTS idx_inventario_nombre ON inventario(nombre)",
+    "CREATE INDEX IF NOT EXISTS idx_inventario_categoria ON inventario(categoria)",
+    "CREATE INDEX IF NOT EXISTS idx_repuestos_nombre ON repuestos(nombre)",
+    "CREATE INDEX IF NOT EXISTS idx_repuestos_categoria ON repuestos(categoria)",
+    "CREATE INDEX IF NOT EXISTS idx_servicios_nombre ON servicios_predefinidos(nombre_servicio)"
+]
+
+_CATEGORIAS_DEFECTO = [
+    # Categorías de PRODUCTOS
+    ("FUNDAS", "PRODUCTO"),
+    ("CARGADORES", "PRODUCTO"),
+    ("MICAS", "PRODUCTO"),
+    ("AUDIFONOS", "PRODUCTO"),
+    ("CABLES", "PRODUCTO"),
+    ("OTROS", "PRODUCTO"),
+    # Categorías de REPUESTOS
+    ("PANTALLAS", "REPUESTO"),
+    ("BATERIAS", "REPUESTO"),
+    ("PINES CARGA", "REPUESTO"),
+    ("FLEX", "REPUESTO"),
+    ("CAMARAS", "REPUESTO"),
+    ("OTROS", "REPUESTO")
+]
+
+
+# Columnas financieras agregadas a ordenes después de la primera versión
+_COLUMNAS_FINANCIERAS_ORDENES = [
+    ('condicion', "TEXT CHECK(condicion IN ('PENDIENTE', 'SOLUCIONADO', 'SIN SOLUCIÓN')) DEFAULT 'PENDIENTE'"),
+    ('presupuesto_inicial', 'REAL DEFAULT 0'),
+    ('costo_total_repuestos', 'REAL DEFAULT 0'),
+    ('costo_total_servicios', 'REAL DEFAULT 0'),
+    ('costo_envio', 'REAL DEFAULT 0'),
+    ('total_a_cobrar', 'REAL DEFAULT 0'),
+    ('saldo_pendiente', 'REAL DEFAULT 0'),
+    ('utilidad_bruta', 'REAL DEFAULT 0'),
+    ('comision_tecnico', 'REAL DEFAULT 0'),
+    ('pago_efectivo', 'REAL DEFAULT 0'),
+    ('pago_transferencia', 'REAL DEFAULT 0'),
+    ('pago_debito', 'REAL DEFAULT 0'),
+    ('pago_credito', 'REAL DEFAULT 0'),
+    ('fecha_cierre', 'TEXT'),
+    ('usuario_cierre_id', 'INTEGER'),
+]
+
+
+# Búsqueda de texto completo (FTS5): (tabla fts, tabla origen, columnas de origen requeridas,
+# [(columna fts, expresión sobre la fila {f})], pesos bm25 por columna)
+# RUT y teléfono se indexan también sin puntos/guiones/espacios para que "12345" encuentre "12.345.678-9"
+_SOLO_ALFANUMERICO = "REPLACE(REPLACE(REPLACE(REPLACE(UPPER({f}.{c}), '.', ''), '-', ''), ' ', ''), '+', '')"
+_TABLAS_FTS = [
+    ('clientes_fts', 'clientes', ('nombre', 'cedula', 'telefono'), [
+        ('nombre', '{f}.nombre'),
+        ('rut', _SOLO_ALFANUMERICO.replace('{c}', 'cedula')),
+        ('telefono', "{f}.telefono || ' ' || " + _SOLO_ALFANUMERICO.replace('{c}', 'telefono')),
+    ], 'bm25(10.0, 8.0, 4.0)'),
+    ('inventario_fts', 'inventario', ('nombre', 'categoria'), [
+        ('nombre', '{f}.nombre'),
+        ('categoria', '{f}.categoria'),
+    ], 'bm25(10.0, 2.0)'),
+    ('repuestos_fts', 'repuestos', ('nombre', 'categoria'), [
+        ('nombre', '{f}.nombre'),
+        ('categoria', '{f}.categoria'),
+    ], 'bm25(10.0, 2.0)'),
+    ('servicios_fts', 'servicios_predefinidos', ('nombre_servicio', 'categoria'), [
+        ('nombre_servicio', '{f}.nombre_servicio'),
+        ('categoria', '{f}.categoria'),
+    ], 'bm25(10.0, 2.0)'),
+    ('ordenes_fts', 'ordenes', ('equipo', 'marca', 'modelo', 'serie', 'observacion'), [
+        ('equipo', '{f}.equipo'),
+        ('marca', '{f}.marca'),
+        ('modelo', '{f}.modelo'),
+        ('serie', '{f}.serie'),
+        ('observacion', '{f}.observacion'),
+    ], 'bm25(3.0, 4.0, 6.0, 10.0, 1.0)'),
+]
+
+# RUT sin puntos, guion ni espacios, en mayúsculas y sin ceros a la izquierda ('' -> NULL)
+# Debe coincidir con GESTOR_CLIENTES.NORMALIZAR_RUT
+_EXPRESION_RUT_NORMALIZADO = (
+    "NULLIF(LTRIM(UPPER(REPLACE(REPLACE(REPLACE(TRIM(cedula), '.', ''), '-', ''), ' ', '')), '0'), '')"
+)
+
+# Igualdades primero, luego la columna de rango/orden (GESTOR_REPORTES.OBTENER_HISTORIAL_TECNICO,
+# GESTOR_PEDIDOS.OBTENER_PEDIDOS_POR_PROVEEDOR)
+_INDICES_COMPUESTOS = [
+    "CREATE INDEX IF NOT EXISTS idx_ordenes_tecnico_estado_cierre ON ordenes(tecnico_id, estado, fecha_cierre)",
+    "CREATE INDEX IF NOT EXISTS idx_pedidos_proveedor_estado_fecha ON pedidos(proveedor_id, estado, fecha_solicitud)",
+]
+
+# Columnas de fecha que los reportes filtran por rango (se omiten las que ya tienen índice)
+_COLUMNAS_FECHA_INDEXADAS = [
+    ('ordenes', 'fecha_entrada'),
+    ('ordenes', 'fecha_cierre'),
+    ('ventas', 'fecha'),
+    ('gastos', 'fecha'),
+    ('caja_sesiones', 'fecha_apertura'),
+]
+
+# Tablas de resumen que mantienen los triggers de _crear_resumen (lectura en resumenes.py)
+_TABLAS_RESUMEN = [
+    """CREATE TABLE IF NOT EXISTS resumen_estados (
+        entidad TEXT NOT NULL,
+        estado TEXT NOT NULL,
+        cantidad INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (entidad, estado)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS resumen_ventas_diario (
+        dia TEXT PRIMARY KEY,
+        cantidad INTEGER NOT NULL DEFAULT 0,
+        total REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS resumen_ordenes_diario (
+        dia TEXT PRIMARY KEY,
+        ingresadas INTEGER NOT NULL DEFAULT 0,
+        presupuesto REAL NOT NULL DEFAULT 0,
+        abono REAL NOT NULL DEFAULT 0,
+        cerradas INTEGER NOT NULL DEFAULT 0,
+        total_cerrado REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS resumen_caja_diario (
+        dia TEXT NOT NULL,
+        tipo TEXT NOT NULL,
+        cantidad INTEGER NOT NULL DEFAULT 0,
+        efectivo REAL NOT NULL DEFAULT 0,
+        transferencia REAL NOT NULL DEFAULT 0,
+        debito REAL NOT NULL DEFAULT 0,
+        credito REAL NOT NULL DEFAULT 0,
+        total REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (dia, tipo)
+    ) WITHOUT ROWID""",
+]
+
+# (nombre, tabla origen, columnas requeridas, tabla resumen, claves, valores, condición)
+# Claves y valores son (columna resumen, expresión): {f} = fila (NEW/OLD/tabla), {s} = signo.
+# Solo se acumulan filas que cumplen la condición (sin fecha no hay día al que sumar).
+# ventas: total_final en el esquema nuevo, total en el antiguo (se resuelve en _resumenes)
+_RESUMENES = [
+    ('ordenes_estados', 'ordenes', ['estado'], 'resumen_estados',
+     [('entidad', "'ordenes'"), ('estado', "COALESCE({f}.estado, '')")],
+     [('cantidad', '{s}1')], '1'),
+    ('ordenes_entrada', 'ordenes', ['fecha_entrada', 'presupuesto_inicial', 'abono'], 'resumen_ordenes_diario',
+     [('dia', 'substr({f}.fecha_entrada, 1, 10)')],
+     [('ingresadas', '{s}1'), ('presupuesto', '{s}COALESCE({f}.presupuesto_inicial, 0)'),
+      ('abono', '{s}COALESCE({f}.abono, 0)')], '{f}.fecha_entrada IS NOT NULL'),
+    ('ordenes_cierre', 'ordenes', ['fecha_cierre', 'total_a_cobrar'], 'resumen_ordenes_diario',
+     [('dia', 'substr({f}.fecha_cierre, 1, 10)')],
+     [('cerradas', '{s}1'), ('total_cerrado', '{s}COALESCE({f}.total_a_cobrar, 0)')],
+     '{f}.fecha_cierre IS NOT NULL'),
+    ('pedidos_estados', 'pedidos', ['estado'], 'resumen_estados',
+     [('entidad', "'pedidos'"), ('estado', "COALESCE({f}.estado, '')")],
+     [('cantidad', '{s}1')], '1'),
+    ('ventas_diario', 'ventas', ['fecha', '{total}'], 'resumen_ventas_diario',
+     [('dia', 'substr({f}.fecha, 1, 10)')],
+     [('cantidad', '{s}1'), ('total', '{s}COALESCE({f}.{total}, 0)')], '{f}.fecha IS NOT NULL'),
+    ('caja_diario', 'transacciones',
+     ['fecha', 'tipo', 'monto_final', 'monto_efectivo', 'monto_transferencia', 'monto_debito', 'monto_credito'],
+     'resumen_caja_diario',
+     [('dia', 'substr({f}.fecha, 1, 10)'), ('tipo', "COALESCE({f}.tipo, '')")],
+     [('cantidad', '{s}1'), ('efectivo', '{s}COALESCE({f}.monto_efectivo, 0)'),
+      ('transferencia', '{s}COALESCE({f}.monto_transferencia, 0)'), ('debito', '{s}COALESCE({f}.monto_debito, 0)'),
+      ('credito', '{s}COALESCE({f}.monto_credito, 0)'), ('total', '{s}COALESCE({f}.monto_final, 0)')],
+     '{f}.fecha IS NOT NULL'),
+]
+
+# Totales acumulados de cada turno de caja (lectura en resumenes.TOTALES_SESION_CAJA)
+_TABLA_TOTALES_CAJA = """CREATE TABLE IF NOT EXISTS caja_sesion_totales (
+    sesion_id INTEGER PRIMARY KEY,
+    cantidad_cobros INTEGER NOT NULL DEFAULT 0,
+    efectivo REAL NOT NULL DEFAULT 0,
+    transferencia REAL NOT NULL DEFAULT 0,
+    debito REAL NOT NULL DEFAULT 0,
+    credito REAL NOT NULL DEFAULT 0,
+    total_cobrado REAL NOT NULL DEFAULT 0,
+    cantidad_gastos INTEGER NOT NULL DEFAULT 0,
+    total_gastos REAL NOT NULL DEFAULT 0
+)"""
+
+# Mismo formato que _RESUMENES. Cobros: movimientos de ingreso de la sesión (la venta del
+# POS lleva también el cobro de las órdenes que cierra); gastos: tabla gastos de la sesión.
+_TOTALES_CAJA = [
+    ('caja_sesion_cobros', 'transacciones',
+     ['sesion_caja_id', 'tipo', 'monto_final', 'monto_efectivo', 'monto_transferencia', 'monto_debito', 'monto_credito'],
+     'caja_sesion_totales',
+     [('sesion_id', '{f}.sesion_caja_id')],
+     [('cantidad_cobros', '{s}1'), ('efectivo', '{s}COALESCE({f}.monto_efectivo, 0)'),
+      ('transferencia', '{s}COALESCE({f}.monto_transferencia, 0)'), ('debito', '{s}COALESCE({f}.monto_debito, 0)'),
+      ('credito', '{s}COALESCE({f}.monto_credito, 0)'), ('total_cobrado', '{s}COALESCE({f}.monto_final, 0)')],
+     "{f}.sesion_caja_id IS NOT NULL AND {f}.tipo IN ('VENTA_PRODUCTO', 'COBRO_REPARACION', 'ABONO')"),
+    ('caja_sesion_gastos', 'gastos', ['sesion_id', 'monto'], 'caja_sesion_totales',
+     [('sesion_id', '{f}.sesion_id')],
+     [('cantidad_gastos', '{s}1'), ('total_gastos', '{s}COALESCE({f}.monto, 0)')],
+     '{f}.sesion_id IS NOT NULL'),
+]
+
+# Catálogos que CACHE_INTELIGENTE guarda en memoria: cada escritura sube su versión
+TABLAS_VERSIONADAS = ['inventario', 'repuestos', 'servicios_predefinidos', 'clientes']
+
+
+# --- UTILIDADES ---
+
+def COLUMNAS(bd, tabla):
+    """Nombres de las columnas de una tabla, incluidas las generadas (vacío si no existe)"""
+    return {fila[1] for fila in bd.OBTENER_TODOS(f"PRAGMA table_xinfo({tabla})")}
+
+
+def EXISTE_TABLA(bd, tabla):
+    return bd.OBTENER_UNO(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)
+    ) is not None
+
+
+def _crear_indice(bd, sentencia):
+    """
+    Crea un índice tolerando columnas inexistentes: las bases antiguas no tienen
+    todas las columnas del esquema base (ej. clientes.cedula en SERVITEC.DB)
+    """
+    try:
+        bd.EJECUTAR_CONSULTA("SAVEPOINT indice")
+        bd.EJECUTAR_CONSULTA(sentencia)
+        bd.EJECUTAR_CONSULTA("RELEASE indice")
+    except sqlite3.OperationalError as e:
+        bd.EJECUTAR_CONSULTA("ROLLBACK TO indice")
+        bd.EJECUTAR_CONSULTA("RELEASE indice")
+        print(f"⚠️ Índice omitido ({e}): {sentencia}")
+
+
+
+def _indice_por_columna(bd, tabla, columna):
+    """Hay un índice cuya primera columna es `columna` (sirve para rangos sobre ella)"""
+    for indice in bd.OBTENER_TODOS(f"PRAGMA index_list({tabla})"):
+        columnas = bd.OBTENER_TODOS(f"PRAGMA index_info({indice[1]})")
+        if columnas and columnas[0][2] == columna:
+            return True
+    return False
+
+
+def _crear_fts(bd, tabla_fts, tabla, requeridas, columnas, ranking):
+    """
+    Tabla FTS5 (rowid = id de la fila de origen), triggers que la sincronizan y carga inicial
+    Si falta una columna de origen o SQLite no trae FTS5 se omite: la búsqueda usa LIKE
+    """
+    faltantes = set(requeridas) - COLUMNAS(bd, tabla)
+    if faltantes:
+        print(f"⚠️ Búsqueda FTS omitida para {tabla} (faltan columnas: {', '.join(sorted(faltantes))})")
+        return
+
+    nombres = ", ".join(c for c, _ in columnas)
+    nuevos = ", ".join(e.format(f="NEW") for _, e in columnas)
+    try:
+        bd.EJECUTAR_CONSULTA("SAVEPOINT fts")
+        bd.EJECUTAR_CONSULTA(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {tabla_fts} USING fts5("
+            f"{nombres}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        bd.EJECUTAR_CONSULTA(f"INSERT INTO {tabla_fts}({tabla_fts}, rank) VALUES ('rank', '{ranking}')")
+        bd.EJECUTAR_CONSULTA(f"""
+            CREATE TRIGGER IF NOT EXISTS tr_{tabla}_fts_insert AFTER INSERT ON {tabla} BEGIN
+                INSERT INTO {tabla_fts}(rowid, {nombres}) VALUES (NEW.id, {nuevos});
+            END
+        """)
+        bd.EJECUTAR_CONSULTA(f"""
+            CREATE TRIGGER IF NOT EXISTS tr_{tabla}_fts_delete AFTER DELETE ON {tabla} BEGIN
+                DELETE FROM {tabla_fts} WHERE rowid = OLD.id;
+            END
+        """)
+        bd.EJECUTAR_CONSULTA(f"""
+            CREATE TRIGGER IF NOT EXISTS tr_{tabla}_fts_update AFTER UPDATE OF {", ".join(requeridas)} ON {tabla} BEGIN
+                DELETE FROM {tabla_fts} WHERE rowid = OLD.id;
+                INSERT INTO {tabla_fts}(rowid, {nombres}) VALUES (NEW.id, {nuevos});
+            END
+        """)
+        bd.EJECUTAR_CONSULTA(f"DELETE FROM {tabla_fts}")
+        bd.EJECUTAR_CONSULTA(
+            f"INSERT INTO {tabla_fts}(rowid, {nombres}) "
+            f"SELECT id, {', '.join(e.format(f=tabla) for _, e in columnas)} FROM {tabla}"
+        )
+        bd.EJECUTAR_CONSULTA("RELEASE fts")
+    except sqlite3.OperationalError as e:
+        bd.EJECUTAR_CONSULTA("ROLLBACK TO fts")
+        bd.EJECUTAR_CONSULTA("RELEASE fts")
+        print(f"⚠️ Búsqueda FTS omitida para {tabla} ({e})")
+
+
+def _resumenes(bd, especificaciones=_RESUMENES):
+    """_RESUMENES con la columna de total de ventas de esta base; omite los de tablas o columnas faltantes"""
+    total = 'total_final' if 'total_final' in COLUMNAS(bd, 'ventas') else 'total'
+    disponibles = []
+    for nombre, origen, requeridas, resumen, claves, valores, condicion in especificaciones:
+        requeridas = [c.format(total=total) for c in requeridas]
+        faltantes = sorted(set(requeridas) - COLUMNAS(bd, origen)) if EXISTE_TABLA(bd, origen) else [f"tabla {origen}"]
+        if faltantes:
+            disponibles.append((nombre, None, faltantes))
+            continue
+        valores = [(c, e.replace('{total}', total)) for c, e in valores]
+        disponibles.append((nombre, (origen, requeridas, resumen, claves, valores, condicion), None))
+    return disponibles
+
+
+def _acumular(resumen, claves, valores, condicion, fila, signo, agrupar=False):
+    """
+    INSERT ... ON CONFLICT DO UPDATE que suma (signo '+') o resta (signo '-') los valores de `fila`
+    en la fila de resumen de sus claves. Con agrupar=True `fila` es la tabla origen (carga inicial)
+    """
+    expresiones_claves = [e.format(f=fila) for _, e in claves]
+    expresiones_valores = [e.format(f=fila, s=signo) for _, e in valores]
+    if agrupar:
+        expresiones_valores = [f"SUM({e})" for e in expresiones_valores]
+    columnas = [c for c, _ in claves] + [c for c, _ in valores]
+    consulta = (
+        f"INSERT INTO {resumen} ({', '.join(columnas)}) "
+        f"SELECT {', '.join(expresiones_claves + expresiones_valores)} "
+        f"{'FROM ' + fila + ' ' if agrupar else ''}WHERE {condicion.format(f=fila)} "
+    )
+    if agrupar:
+        consulta += f"GROUP BY {', '.join(expresiones_claves)} "
+    return consulta + (
+        f"ON CONFLICT({', '.join(c for c, _ in claves)}) DO UPDATE SET "
+        + ", ".join(f"{c} = {c} + excluded.{c}" for c, _ in valores)
+    )
+
+
+def _crear_resumen(bd, nombre, origen, requeridas, resumen, claves, valores, condicion):
+    """Triggers que mantienen `resumen` al insertar, borrar o modificar filas de `origen`"""
+    nuevo = _acumular(resumen, claves, valores, condicion, "NEW", "+")
+    viejo = _acumular(resumen, claves, valores, condicion, "OLD", "-")
+    cambio = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in requeridas)
+    bd.EJECUTAR_CONSULTA(f"""
+        CREATE TRIGGER IF NOT EXISTS tr_resumen_{nombre}_insert AFTER INSERT ON {origen} BEGIN
+            {nuevo};
+        END
+    """)
+    bd.EJECUTAR_CONSULTA(f"""
+        CREATE TRIGGER IF NOT EXISTS tr_resumen_{nombre}_delete AFTER DELETE ON {origen} BEGIN
+            {viejo};
+        END
+    """)
+    bd.EJECUTAR_CONSULTA(f"""
+        CREATE TRIGGER IF NOT EXISTS tr_resumen_{nombre}_update AFTER UPDATE OF {", ".join(requeridas)} ON {origen}
+        WHEN {cambio} BEGIN
+            {viejo};
+            {nuevo};
+        END
+    """)
+
+
+def _reconstruir(bd, tablas, especificaciones):
+    """Vacía las tablas de resumen y las vuelve a llenar agrupando las tablas de origen"""
+    for tabla in tablas:
+        bd.EJECUTAR_CONSULTA(f"DELETE FROM {tabla}")
+    for _, especificacion, _ in _resumenes(bd, especificaciones):
+        if especificacion is None:
+            continue
+        origen, _, resumen, claves, valores, condicion = especificacion
+        bd.EJECUTAR_CONSULTA(_acumular(resumen, claves, valores, condicion, origen, "+", agrupar=True))
+
+
+def _crear_resumenes(bd, especificaciones):
+    """Triggers de cada resumen disponible en esta base (avisa los omitidos)"""
+    for nombre, especificacion, faltantes in _resumenes(bd, especificaciones):
+        if especificacion is None:
+            print(f"⚠️ Resumen {nombre} omitido (falta: {', '.join(faltantes)})")
+            continue
+        _crear_resumen(bd, nombre, *especificacion)
+
+
+def RECONSTRUIR_RESUMENES(bd):
+    """
+    Vuelve a calcular las tablas de resumen desde las tablas de origen
+    (carga inicial de la migración 8, o reparación si se editó la base a mano sin triggers)
+    """
+    _reconstruir(bd, ('resumen_estados', 'resumen_ventas_diario', 'resumen_ordenes_diario', 'resumen_caja_diario'),
+                 _RESUMENES)
+    if EXISTE_TABLA(bd, "caja_sesion_totales"):
+        _reconstruir(bd, ("caja_sesion_totales",), _TOTALES_CAJA)
+
+
+def _versionar_tabla(bd, tabla):
+    """Fila en versiones_tablas y triggers que la suben con cada escritura en `tabla`"""
+    if not EXISTE_TABLA(bd, tabla):
+        return
+    bd.EJECUTAR_CONSULTA("INSERT OR IGNORE INTO versiones_tablas (tabla) VALUES (?)", (tabla,))
+    for evento in ('INSERT', 'UPDATE', 'DELETE'):
+        bd.EJECUTAR_CONSULTA(f"""
+            CREATE TRIGGER IF NOT EXISTS tr_version_{tabla}_{evento.lower()} AFTER {evento} ON {tabla} BEGIN
+                UPDATE versiones_tablas SET version = version + 1 WHERE tabla = '{tabla}';
+            END
+        """)
+
+
+# --- MIGRACIONES ---
+
+def _m001_esquema_base(bd):
+    """Tablas e índices del esquema base y categorías por defecto"""
+    for consulta in _TABLAS_BASE:
+        bd.EJECUTAR_CONSULTA(consulta)
+    for indice in _INDICES_BASE:
+        _crear_indice(bd, indice)
+    bd.EJECUTAR_MUCHOS("INSERT OR IGNORE INTO categorias (nombre, tipo) VALUES (?, ?)", _CATEGORIAS_DEFECTO)
+
+
+def _m002_columnas_financieras_ordenes(bd):
+    """Finanzas integradas en ordenes (antes en main.EJECUTAR_MIGRACIONES)"""
+    actuales = COLUMNAS(bd, "ordenes")
+    for nombre, tipo in _COLUMNAS_FINANCIERAS_ORDENES:
+        if nombre not in actuales:
+            bd.EJECUTAR_CONSULTA(f"ALTER TABLE ordenes ADD COLUMN {nombre} {tipo}")
+            print(f"✅ Columna '{nombre}' agregada")
+
+
+def _m003_cuentas_boletas_detalles(bd):
+    """Cuentas bancarias, boletas y detalles de orden (antes en main.EJECUTAR_MIGRACIONES)"""
+    bd.EJECUTAR_CONSULTA("""
+        CREATE TABLE IF NOT EXISTS cuentas_bancarias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            banco TEXT NOT NULL,
+            numero_cuenta TEXT NOT NULL UNIQUE,
+            tipo_cuenta TEXT,
+            titular TEXT NOT NULL,
+            rut_titular TEXT,
+            notas TEXT,
+            activa INTEGER DEFAULT 1,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    bd.EJECUTAR_CONSULTA("""
+        CREATE TABLE IF NOT EXISTS boletas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            orden_id INTEGER NOT NULL,
+            numero_boleta TEXT UNIQUE,
+            fecha_emision TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            monto_neto REAL,
+            iva REAL,
+            monto_total REAL,
+            metodo_pago TEXT,
+            estado TEXT DEFAULT 'EMITIDA',
+            observaciones TEXT,
+            FOREIGN KEY(orden_id) REFERENCES ordenes(id)
+        )
+    """)
+    bd.EJECUTAR_CONSULTA("""
+        CREATE TABLE IF NOT EXISTS detalles_orden (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            orden_id INTEGER NOT NULL,
+            tipo_item TEXT NOT NULL,
+            descripcion TEXT,
+            costo REAL DEFAULT 0,
+            cantidad INTEGER DEFAULT 1,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(orden_id) REFERENCES ordenes(id)
+        )
+    """)
+
+
+def _m004_busqueda_texto_completo(bd):
+    """Índices FTS5 para clientes, inventario, repuestos, servicios y órdenes"""
+    for especificacion in _TABLAS_FTS:
+        _crear_fts(bd, *especificacion)
+
+
+def _m005_rut_normalizado(bd):
+    """
+    clientes.rut_normalizado: columna generada con índice único para buscar por RUT
+    sin importar el formato ('12.345.678-9' = '12345678-9' = '123456789')
+    """
+    actuales = COLUMNAS(bd, "clientes")
+    if "cedula" not in actuales:
+        print("⚠️ RUT normalizado omitido (clientes no tiene columna cedula)")
+        return
+    if "rut_normalizado" not in actuales:
+        bd.EJECUTAR_CONSULTA(
+            f"ALTER TABLE clientes ADD COLUMN rut_normalizado TEXT "
+            f"GENERATED ALWAYS AS ({_EXPRESION_RUT_NORMALIZADO}) VIRTUAL"
+        )
+
+    duplicados = bd.OBTENER_TODOS(
+        "SELECT rut_normalizado, COUNT(*) FROM clientes WHERE rut_normalizado IS NOT NULL "
+        "GROUP BY rut_normalizado HAVING COUNT(*) > 1"
+    )
+    if duplicados:
+        # No se fusionan clientes automáticamente: índice normal hasta que se corrijan
+        print(f"⚠️ RUT repetidos con distinto formato ({', '.join(d[0] for d in duplicados[:10])}): "
+              f"se crea un índice no único")
+        bd.EJECUTAR_CONSULTA("CREATE INDEX IF NOT EXISTS idx_clientes_rut_normalizado ON clientes(rut_normalizado)")
+    else:
+        bd.EJECUTAR_CONSULTA(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_clientes_rut_normalizado ON clientes(rut_normalizado)")
+
+
+def _m006_indices_fechas(bd):
+    """
+    Índices para filtrar por rango de fechas (rango_fechas.PREDICADO_RANGO)
+    El esquema base indexaba ordenes(fecha), que no existe en las bases nuevas
+    """
+    for tabla, columna in _COLUMNAS_FECHA_INDEXADAS:
+        if columna not in COLUMNAS(bd, tabla) or _indice_por_columna(bd, tabla, columna):
+            continue
+        _crear_indice(bd, f"CREATE INDEX IF NOT EXISTS idx_{tabla}_{columna} ON {tabla}({columna})")
+
+
+def _m007_indices_compuestos(bd):
+    """
+    Índices compuestos propuestos por asesor_indices.py sobre la carga real:
+    historial/comisiones por técnico y pedidos pendientes por proveedor
+    """
+    for sentencia in _INDICES_COMPUESTOS:
+        _crear_indice(bd, sentencia)
+    # (tecnico_id) es prefijo del compuesto: mantener los dos solo encarece las escrituras
+    if _indice_por_columna(bd, "ordenes", "tecnico_id") and bd.OBTENER_UNO(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_ordenes_tecnico_estado_cierre'"):
+        bd.EJECUTAR_CONSULTA("DROP INDEX IF EXISTS idx_ordenes_tecnico")
+
+
+def _m008_resumenes_diarios(bd):
+    """
+    Resúmenes mantenidos por triggers para dashboards y estadísticas: ventas, órdenes
+    y caja por día, y conteo de órdenes y pedidos por estado (se leen pocas filas
+    en lugar de recorrer las tablas con COUNT/SUM en cada refresco)
+    """
+    for consulta in _TABLAS_RESUMEN:
+        bd.EJECUTAR_CONSULTA(consulta)
+    _crear_resumenes(bd, _RESUMENES)
+    RECONSTRUIR_RESUMENES(bd)
+
+
+def _m009_versiones_catalogos(bd):
+    """
+    versiones_tablas: contador por catálogo que suben los triggers de INSERT/UPDATE/DELETE
+    (CACHE_INTELIGENTE sirve su copia en memoria mientras la versión no cambie)
+    """
+    bd.EJECUTAR_CONSULTA("""
+        CREATE TABLE IF NOT EXISTS versiones_tablas (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    for tabla in TABLAS_VERSIONADAS:
+        _versionar_tabla(bd, tabla)
+
+
+def _m010_version_proveedores(bd):
+    """Contador de proveedores: la lista de repuestos en caché muestra su nombre"""
+    _versionar_tabla(bd, "proveedores")
+
+
+def _m011_totales_sesion_caja(bd):
+    """
+    caja_sesion_totales: cobros por medio de pago y gastos acumulados por turno,
+    al día con cada movimiento (el arqueo y la pantalla de caja leen una fila
+    en lugar de sumar ventas, transacciones y gastos)
+    """
+    bd.EJECUTAR_CONSULTA(_TABLA_TOTALES_CAJA)
+    _crear_resumenes(bd, _TOTALES_CAJA)
+    _reconstruir(bd, ("caja_sesion_totales",), _TOTALES_CAJA)
+
+
+# Registro ordenado: (versión, descripción, función). Solo se agregan al final.
+MIGRACIONES = [
+    (1, "esquema base", _m001_esquema_base),
+    (2, "columnas financieras de ordenes", _m002_columnas_financieras_ordenes),
+    (3, "cuentas bancarias, boletas y detalles de orden", _m003_cuentas_boletas_detalles),
+    (4, "búsqueda de texto completo (FTS5)", _m004_busqueda_texto_completo),
+    (5, "RUT normalizado de clientes", _m005_rut_normalizado),
+    (6, "índices de rangos de fechas", _m006_indices_fechas),
+    (7, "índices compuestos de técnico y proveedor", _m007_indices_compuestos),
+    (8, "resúmenes diarios y conteos por estado", _m008_resumenes_diarios),
+    (9, "versiones de catálogos para el caché", _m009_versiones_catalogos),
+    (10, "versión de proveedores para el caché", _m010_version_proveedores),
+    (11, "totales por sesión de caja", _m011_totales_sesion_caja),
+]
+
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+
+def VERSION_ACTUAL(bd):
+    """Versión del esquema guardada en la base (PRAGMA user_version)"""
+    fila = bd.OBTENER_UNO("PRAGMA user_version")
+    return fila[0] if fila else 0
+
+
+def APLICAR_MIGRACIONES(bd):
+    """
+    Aplica en orden las migraciones pendientes
+
+    Args:
+        bd: Instancia de GESTOR_BASE_DATOS
+
+    Returns:
+        Lista de versiones aplicadas (vacía si el esquema ya estaba al día)
+
+    Raises:
+        sqlite3.Error si una migración falla (esa migración queda revertida)
+    """
+    version = VERSION_ACTUAL(bd)
+    aplicadas = []
+    for numero, descripcion, migracion in MIGRACIONES:
+        if numero <= version:
+            continue
+        print(f"🔧 Migración {numero}: {descripcion}...")
+        with bd.TRANSACCION():
+            migracion(bd)
+            bd.EJECUTAR_CONSULTA(f"PRAGMA user_version = {numero}")
+        aplicadas.append(numero)
+    return aplicadas
@@ -7,6 +7,9 @@ from datetime import datetime, timedelta
 import json
 import os
 
+from migraciones import EXISTE_TABLA
+from rango_fechas import HACE_DIAS, LIMITES_DIA, PREDICADO_RANGO
+
 
 class NOTIFICACIONES:
     """Sistema inteligente de notificaciones y alertas"""
@@ -168,13 +171,14 @@ class NOTIFICACIONES:
             # Órdenes con abono pendiente hace más de 15 días
             vencidas = self.db.fetch_all(
                 """
-                SELECT o.id, o.cliente_id, c.nombre, o.presupuesto, o.abono, o.fecha
+                SELECT o.id, o.cliente_id, c.nombre, o.presupuesto_inicial, o.abono, o.fecha_entrada
                 FROM ordenes o
                 JOIN clientes c ON o.cliente_id = c.id
-                WHERE (o.presupuesto - COALESCE(o.abono, 0)) > 0
-                AND DATE(o.fecha) < DATE('now', '-15 days')
-                ORDER BY o.fecha DESC
-                """
+                WHERE (o.presupuesto_inicial - COALESCE(o.abono, 0)) > 0
+                AND o.fecha_entrada < ?
+                ORDER BY o.fecha_entrada DESC
+                """,
+                (HACE_DIAS(15),)
             )
             
             for orden in vencidas:
@@ -202,13 +206,14 @@ class NOTIFICACIONES:
             # Órdenes pendientes sin cambios hace más de 7 días
             pendientes = self.db.fetch_all(
                 """
-                SELECT o.id, c.nombre, o.fecha, o.observacion
+                SELECT o.id, c.nombre, o.fecha_entrada, o.observacion
                 FROM ordenes o
                 JOIN clientes c ON o.cliente_id = c.id
-                WHERE o.estado = 'PENDIENTE'
-                AND DATE(o.fecha) < DATE('now', '-7 days')
-                ORDER BY o.fecha ASC
-                """
+                WHERE o.estado = 'Pendiente'
+                AND o.fecha_entrada < ?
+                ORDER BY o.fecha_entrada ASC
+                """,
+                (HACE_DIAS(7),)
             )
             
             for orden in pendientes:
@@ -217,7 +222,7 @@ class NOTIFICACIONES:
                 self.AGREGAR_NOTIFICACIÓN(
                     tipo="ORDEN",
                     título=f"ORDEN ESTANCADA: {orden[1]}",
-                    mensaje=f"Orden #{orden[0]} sin cambios hace {días_sin_actividad} días: {orden[3][:50]}",
+                    mensaje=f"Orden #{orden[0]} sin cambios hace {días_sin_actividad} días: {(orden[3] or '')[:50]}",
                     prioridad="ALTA" if días_sin_actividad > 14 else "NORMAL",
                     datos_asociados={"orden_id": orden[0]}
                 )
@@ -232,14 +237,19 @@ class NOTIFICACIONES:
         alertas_generadas = 0
         
         try:
+            # Las comisiones por técnico solo existen en bases antiguas
+            if not EXISTE_TABLA(self.db, "comisiones"):
+                return {"alertas_generadas": alertas_generadas}
+            
             # Técnicos sin actividad en 7 días
             sin_actividad = self.db.fetch_all(
                 """
                 SELECT DISTINCT tecnico FROM comisiones
-                WHERE DATE(fecha) >= DATE('now', '-30 days')
+                WHERE fecha >= ?
                 GROUP BY tecnico
-                HAVING MAX(DATE(fecha)) < DATE('now', '-7 days')
-                """
+                HAVING MAX(fecha) < ?
+                """,
+                (HACE_DIAS(30), HACE_DIAS(7))
             )
             
             for técnico in sin_actividad:
@@ -257,10 +267,11 @@ class NOTIFICACIONES:
                 """
                 SELECT tecnico, COUNT(*) as cantidad, SUM(comision) as total
                 FROM comisiones
-                WHERE DATE(fecha) >= DATE('now', '-30 days')
+                WHERE fecha >= ?
                 GROUP BY tecnico
                 HAVING cantidad < 5
-                """
+                """,
+                (HACE_DIAS(30),)
             )
             
             for técnico in baja_productividad:
@@ -283,9 +294,8 @@ class NOTIFICACIONES:
         
         try:
             # Día sin ventas
-            ventas_hoy = self.db.fetch_one(
-                "SELECT COUNT(*) FROM ordenes WHERE DATE(fecha) = DATE('now')"
-            )
+            condicion, hoy = PREDICADO_RANGO("fecha_entrada", *LIMITES_DIA())
+            ventas_hoy = self.db.fetch_one(f"SELECT COUNT(*) FROM ordenes WHERE {condicion}", hoy)
             
             if ventas_hoy[0] == 0:
                 self.AGREGAR_NOTIFICACIÓN(
@@ -299,7 +309,8 @@ class NOTIFICACIONES:
             
             # Caída en ventas vs promedio
             promedio_diario = self.db.fetch_one(
-                "SELECT AVG(diario) FROM (SELECT COUNT(*) as diario FROM ordenes WHERE DATE(fecha) >= DATE('now', '-30 days') GROUP BY DATE(fecha))"
+                "SELECT AVG(diario) FROM (SELECT COUNT(*) as diario FROM ordenes WHERE fecha_entrada >= ? GROUP BY DATE(fecha_entrada))",
+                (HACE_DIAS(30),)
             )
             
             if promedio_diario[0]:
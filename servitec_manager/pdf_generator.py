@@ -1,3 +1,4 @@
+from collections.abc import Mapping
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
 from reportlab.lib.pagesizes import A4
@@ -364,20 +365,20 @@ class GENERADOR_PDF:
         
         # Extraer datos de session_data (compatible con DictRow y tupla)
         def get_val(data, key_or_idx, default=0):
-            if isinstance(data, dict):
+            if isinstance(data, Mapping):
                 return data.get(key_or_idx, default) or default
             return data[key_or_idx] if isinstance(key_or_idx, int) else default
         
-        session_id = get_val(session_data, 'id' if isinstance(session_data, dict) else 0)
-        fecha_cierre = get_val(session_data, 'fecha_cierre' if isinstance(session_data, dict) else 3, '')
-        monto_inicial = get_val(session_data, 'monto_inicial' if isinstance(session_data, dict) else 4, 0)
-        total_gastos = get_val(session_data, 'total_gastos' if isinstance(session_data, dict) else 11, 0)
-        r_efec = get_val(session_data, 'real_efectivo' if isinstance(session_data, dict) else 7, 0)
-        r_trf = get_val(session_data, 'real_transferencia' if isinstance(session_data, dict) else 8, 0)
-        r_deb = get_val(session_data, 'real_debito' if isinstance(session_data, dict) else 9, 0)
-        r_cred = get_val(session_data, 'real_credito' if isinstance(session_data, dict) else 10, 0)
-        real_total = get_val(session_data, 'monto_final_real' if isinstance(session_data, dict) else 6, 0)
-        diferencia = get_val(session_data, 'diferencia' if isinstance(session_data, dict) else 12, 0)
+        session_id = get_val(session_data, 'id' if isinstance(session_data, Mapping) else 0)
+        fecha_cierre = get_val(session_data, 'fecha_cierre' if isinstance(session_data, Mapping) else 3, '')
+        monto_inicial = get_val(session_data, 'monto_inicial' if isinstance(session_data, Mapping) else 4, 0)
+        total_gastos = get_val(session_data, 'total_gastos' if isinstance(session_data, Mapping) else 11, 0)
+        r_efec = get_val(session_data, 'real_efectivo' if isinstance(session_data, Mapping) else 7, 0)
+        r_trf = get_val(session_data, 'real_transferencia' if isinstance(session_data, Mapping) else 8, 0)
+        r_deb = get_val(session_data, 'real_debito' if isinstance(session_data, Mapping) else 9, 0)
+        r_cred = get_val(session_data, 'real_credito' if isinstance(session_data, Mapping) else 10, 0)
+        real_total = get_val(session_data, 'monto_final_real' if isinstance(session_data, Mapping) else 6, 0)
+        diferencia = get_val(session_data, 'diferencia' if isinstance(session_data, Mapping) else 12, 0)
         
         # Ventas Sistema (sales_data)
         v_efec, v_trf, v_deb, v_cred = sales_data
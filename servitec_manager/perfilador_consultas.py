@@ -0,0 +1,278 @@
+"""
+PERFILADOR DE CONSULTAS SQL
+Mide cada sentencia que pasa por GESTOR_BASE_DATOS, agrupada por SQL normalizado:
+cantidad, tiempo total/medio/p95/máximo y filas devueltas o afectadas.
+Las consultas sobre el umbral se registran en un log de lentas junto a su EXPLAIN QUERY PLAN.
+De cada sentencia se guarda un ejemplo (SQL original y parámetros) para poder repetirla
+después: asesor_indices.py usa el perfil guardado como carga de trabajo real.
+
+Uso en la aplicación:
+    bd.ACTIVAR_PERFILADOR(umbral_ms=50)
+    ...
+    print(bd.REPORTE_PERFIL())
+
+Activación al iniciar: variable de entorno SERVITEC_PERFIL=1 (umbral opcional en
+SERVITEC_PERFIL_UMBRAL_MS). Al cerrar se guarda el perfil en perfil_consultas.json.
+
+Uso por línea de comandos (lee un perfil guardado):
+    python perfilador_consultas.py [perfil_consultas.json] [--orden total|media|p95|cantidad] [--top N]
+"""
+
+import json
+import math
+import os
+import re
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+
+ARCHIVO_PERFIL = "perfil_consultas.json"
+UMBRAL_LENTA_MS = 100  # Consultas más lentas que esto van al log de lentas
+MAX_MUESTRAS = 512  # Duraciones guardadas por sentencia para calcular el p95
+MAX_LENTAS = 200  # Entradas del log de consultas lentas
+
+_PATRON_COMENTARIO = re.compile(r"--[^\n]*")
+_PATRON_CADENA = re.compile(r"'(?:[^']|'')*'")
+_PATRON_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PATRON_LISTA_IN = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_PATRON_ESPACIOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalizar_sql(consulta):
+    """
+    Reduce una sentencia a su forma canónica para agrupar ejecuciones equivalentes:
+    sin comentarios, literales reemplazados por ?, listas IN colapsadas y espacios simples
+    """
+    sql = _PATRON_COMENTARIO.sub(" ", consulta)
+    sql = _PATRON_CADENA.sub("?", sql)
+    sql = _PATRON_NUMERO.sub("?", sql)
+    sql = _PATRON_LISTA_IN.sub("(?, ...)", sql)
+    return _PATRON_ESPACIOS.sub(" ", sql).strip()
+
+
+def _percentil(valores, p):
+    """Percentil por rango más cercano (valores no vacíos)"""
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100.0 * len(ordenados)) - 1)]
+
+
+class _ESTADISTICA:
+    """Acumulado de una sentencia normalizada"""
+    __slots__ = ('cantidad', 'total', 'maximo', 'filas', 'muestras', 'plan', 'ejemplo')
+
+    def __init__(self):
+        self.cantidad = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.filas = 0
+        self.muestras = deque(maxlen=MAX_MUESTRAS)
+        self.plan = None
+        self.ejemplo = None  # (SQL original, parámetros) de la primera ejecución
+
+
+def _parametros_serializables(parámetros):
+    """Parámetros como lista JSON (None si no se registraron o alguno no se puede guardar, ej. un BLOB)"""
+    if parámetros is None or isinstance(parámetros, dict):
+        return None
+    valores = list(parámetros)
+    if all(v is None or isinstance(v, (str, int, float)) for v in valores):
+        return valores
+    return None
+
+
+class PERFILADOR_CONSULTAS:
+    """
+    Recolector de métricas por sentencia (seguro entre hilos)
+
+    GESTOR_BASE_DATOS llama a REGISTRAR después de cada ejecución; el costo cuando
+    el perfilador está desactivado es una sola comprobación de atributo.
+    """
+
+    def __init__(self, umbral_ms=UMBRAL_LENTA_MS, explicar=True):
+        """
+        Args:
+            umbral_ms: Duración a partir de la cual una consulta se considera lenta
+            explicar: Si capturar EXPLAIN QUERY PLAN de las consultas lentas
+        """
+        self.umbral_ms = umbral_ms
+        self.explicar = explicar
+        self._lock = threading.Lock()
+        self._estadisticas = {}
+        self._lentas = deque(maxlen=MAX_LENTAS)
+        self.inicio = datetime.now()
+
+    def REGISTRAR(self, consulta, segundos, filas=0, parámetros=None, explicador=None):
+        """
+        Registra una ejecución
+
+        Args:
+            consulta: SQL ejecutado (se normaliza)
+            segundos: Duración medida
+            filas: Filas devueltas (lecturas) o afectadas (escrituras)
+            parámetros: Parámetros usados (solo para el log de lentas)
+            explicador: Función (consulta, parámetros) -> lista de pasos del plan
+        """
+        clave = normalizar_sql(consulta)
+        ms = segundos * 1000.0
+        capturar_plan = False
+
+        with self._lock:
+            estadistica = self._estadisticas.get(clave)
+            if estadistica is None:
+                estadistica = self._estadisticas[clave] = _ESTADISTICA()
+                estadistica.ejemplo = (consulta, parámetros)
+            estadistica.cantidad += 1
+            estadistica.total += ms
+            estadistica.filas += filas if filas and filas > 0 else 0
+            estadistica.muestras.append(ms)
+            if ms > estadistica.maximo:
+                estadistica.maximo = ms
+            lenta = ms >= self.umbral_ms
+            capturar_plan = lenta and self.explicar and explicador is not None and estadistica.plan is None
+
+        if not lenta:
+            return
+
+        # El plan se obtiene fuera del lock (ejecuta SQL) y solo una vez por sentencia
+        plan = None
+        if capturar_plan:
+            try:
+                plan = explicador(consulta, parámetros if parámetros is not None else ())
+            except Exception as e:
+                plan = [f"(sin plan: {e})"]
+
+        with self._lock:
+            if plan is not None and estadistica.plan is None:
+                estadistica.plan = plan
+            self._lentas.append({
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'ms': round(ms, 2),
+                'sql': clave,
+                'parametros': repr(parámetros)[:200] if parámetros else "",
+            })
+        print(f"🐢 Consulta lenta ({ms:.1f} ms): {clave[:120]}")
+
+    def REINICIAR(self):
+        """Descarta todas las métricas acumuladas"""
+        with self._lock:
+            self._estadisticas.clear()
+            self._lentas.clear()
+            self.inicio = datetime.now()
+
+    def OBTENER_DATOS(self):
+        """
+        Instantánea serializable del perfil
+
+        Returns:
+            dict con 'inicio', 'umbral_ms', 'consultas' (lista por sentencia) y 'lentas'
+        """
+        with self._lock:
+            consultas = [
+                {
+                    'sql': clave,
+                    'cantidad': e.cantidad,
+                    'total_ms': round(e.total, 3),
+                    'media_ms': round(e.total / e.cantidad, 3),
+                    'p95_ms': round(_percentil(e.muestras, 95), 3),
+                    'max_ms': round(e.maximo, 3),
+                    'filas': e.filas,
+                    'plan': e.plan,
+                    'ejemplo_sql': e.ejemplo[0] if e.ejemplo else None,
+                    'ejemplo_parametros': _parametros_serializables(e.ejemplo[1]) if e.ejemplo else None,
+                }
+                for clave, e in self._estadisticas.items()
+            ]
+            lentas = list(self._lentas)
+        return {
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'umbral_ms': self.umbral_ms,
+            'consultas': consultas,
+            'lentas': lentas,
+        }
+
+    def REPORTE(self, orden='total', top=25):
+        """Reporte de texto de las sentencias más costosas"""
+        return formatear_reporte(self.OBTENER_DATOS(), orden=orden, top=top)
+
+    def GUARDAR(self, ruta=ARCHIVO_PERFIL):
+        """Guarda el perfil en JSON (para leerlo luego con la línea de comandos)"""
+        try:
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump(self.OBTENER_DATOS(), f, indent=2, ensure_ascii=False)
+            return True
+        except OSError as e:
+            print(f"❌ No se pudo guardar el perfil de consultas: {e}")
+            return False
+
+
+_CAMPOS_ORDEN = {
+    'total': 'total_ms',
+    'media': 'media_ms',
+    'p95': 'p95_ms',
+    'cantidad': 'cantidad',
+    'filas': 'filas',
+}
+
+
+def formatear_reporte(datos, orden='total', top=25):
+    """Convierte los datos de OBTENER_DATOS en un reporte de texto legible"""
+    campo = _CAMPOS_ORDEN.get(orden, 'total_ms')
+    consultas = sorted(datos['consultas'], key=lambda c: c[campo], reverse=True)
+    total_ms = sum(c['total_ms'] for c in consultas)
+    ejecuciones = sum(c['cantidad'] for c in consultas)
+
+    lineas = [
+        "=" * 100,
+        f"  PERFIL DE CONSULTAS SQL (desde {datos['inicio']})",
+        f"  {len(consultas)} sentencias distintas, {ejecuciones} ejecuciones, {total_ms:.1f} ms en total",
+        f"  Ordenado por: {orden} | Umbral de consulta lenta: {datos['umbral_ms']} ms",
+        "=" * 100,
+        f"{'CANT':>7} {'TOTAL ms':>11} {'MEDIA':>9} {'P95':>9} {'MAX':>9} {'FILAS':>9}  SQL",
+        "-" * 100,
+    ]
+    for c in consultas[:top]:
+        lineas.append(
+            f"{c['cantidad']:>7} {c['total_ms']:>11.1f} {c['media_ms']:>9.2f} {c['p95_ms']:>9.2f} "
+            f"{c['max_ms']:>9.2f} {c['filas']:>9}  {c['sql'][:150]}"
+        )
+        for paso in c.get('plan') or []:
+            lineas.append(f"{'':>60}↳ {paso}")
+
+    if datos['lentas']:
+        lineas += ["", f"🐢 ÚLTIMAS CONSULTAS LENTAS ({len(datos['lentas'])})", "-" * 100]
+        for lenta in datos['lentas'][-top:]:
+            lineas.append(f"{lenta['fecha']}  {lenta['ms']:>9.1f} ms  {lenta['sql'][:120]}")
+    return "\n".join(lineas)
+
+
+def main(argv=None):
+    """Muestra en consola un perfil guardado con GUARDAR"""
+    argv = sys.argv[1:] if argv is None else argv
+    ruta, orden, top = ARCHIVO_PERFIL, 'total', 25
+    i = 0
+    while i < len(argv):
+        if argv[i] == '--orden' and i + 1 < len(argv):
+            orden = argv[i + 1]
+            i += 2
+        elif argv[i] == '--top' and i + 1 < len(argv):
+            top = int(argv[i + 1])
+            i += 2
+        else:
+            ruta = argv[i]
+            i += 1
+
+    if not os.path.exists(ruta):
+        print(f"❌ No se encontró el perfil: {ruta}")
+        print("   Ejecute la aplicación con SERVITEC_PERFIL=1 para generarlo")
+        return 1
+
+    with open(ruta, encoding='utf-8') as f:
+        print(formatear_reporte(json.load(f), orden=orden, top=top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,9 @@ Análisis de tendencias y predicciones usando series de tiempo
 from datetime import datetime, timedelta
 import statistics
 
+from rango_fechas import HACE_DIAS
+from resumenes import CANTIDAD_EN_ESTADO, ORDENES_POR_DIA
+
 
 class PREDICCION_VENTAS:
     """Motor de predicción de ventas basado en datos históricos"""
@@ -22,13 +25,17 @@ class PREDICCION_VENTAS:
     def ANALIZAR_TENDENCIA_VENTAS(self, días_históricos=90):
         """Analiza tendencia de ventas últimos N días"""
         try:
-            fecha_inicio = (datetime.now() - timedelta(days=días_históricos)).strftime("%Y-%m-%d")
+            fecha_inicio = HACE_DIAS(días_históricos)
             
-            # Obtener ventas diarias
-            ventas_diarias = self.db.fetch_all(
-                "SELECT DATE(fecha_entrada), SUM(presupuesto_inicial) FROM ordenes WHERE DATE(fecha_entrada) >= ? GROUP BY DATE(fecha_entrada) ORDER BY fecha_entrada ASC",
-                (fecha_inicio,)
-            )
+            # Obtener ventas diarias (resumen_ordenes_diario; sin resumen se agrupa la tabla)
+            resumen = ORDENES_POR_DIA(self.db, fecha_inicio)
+            if resumen is not None:
+                ventas_diarias = [(d['dia'], d['presupuesto']) for d in resumen if d['ingresadas']]
+            else:
+                ventas_diarias = self.db.fetch_all(
+                    "SELECT DATE(fecha_entrada), SUM(presupuesto_inicial) FROM ordenes WHERE fecha_entrada >= ? GROUP BY DATE(fecha_entrada) ORDER BY fecha_entrada ASC",
+                    (fecha_inicio,)
+                )
             
             if not ventas_diarias:
                 return {"error": "No hay datos históricos"}
@@ -97,13 +104,13 @@ class PREDICCION_VENTAS:
         """Predice ventas para próximas semanas"""
         try:
             # Obtener datos históricos de 12 semanas
-            fecha_inicio = (datetime.now() - timedelta(weeks=12)).strftime("%Y-%m-%d")
+            fecha_inicio = HACE_DIAS(12 * 7)
             
             ventas_semanales = self.db.fetch_all(
                 """
                 SELECT STRFTIME('%Y-W%W', fecha_entrada) as semana, SUM(presupuesto_inicial) 
                 FROM ordenes 
-                WHERE DATE(fecha_entrada) >= ? 
+                WHERE fecha_entrada >= ? 
                 GROUP BY semana 
                 ORDER BY semana ASC
                 """,
@@ -151,13 +158,13 @@ class PREDICCION_VENTAS:
         """Predice ventas para próximos meses"""
         try:
             # Datos de 12 meses anteriores
-            fecha_inicio = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
+            fecha_inicio = HACE_DIAS(365)
             
             ventas_mensuales = self.db.fetch_all(
                 """
                 SELECT STRFTIME('%Y-%m', fecha_entrada) as mes, SUM(presupuesto_inicial) 
                 FROM ordenes 
-                WHERE DATE(fecha_entrada) >= ? 
+                WHERE fecha_entrada >= ? 
                 GROUP BY mes 
                 ORDER BY mes ASC
                 """,
@@ -266,10 +273,15 @@ class PREDICCION_VENTAS:
             mes_actual = datetime.now().strftime("%Y-%m-01")
             mes_anterior = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-01")
             
-            cobranza = self.db.fetch_one(
-                "SELECT SUM(presupuesto_inicial), SUM(abono) FROM ordenes WHERE DATE(fecha_entrada) >= ?",
-                (mes_anterior,)
-            )
+            resumen = ORDENES_POR_DIA(self.db, mes_anterior)
+            if resumen is not None:
+                cobranza = (sum(d['presupuesto'] for d in resumen) if resumen else None,
+                            sum(d['abono'] for d in resumen))
+            else:
+                cobranza = self.db.fetch_one(
+                    "SELECT SUM(presupuesto_inicial), SUM(abono) FROM ordenes WHERE fecha_entrada >= ?",
+                    (mes_anterior,)
+                )
             
             if cobranza[0]:
                 tasa_cobranza = (cobranza[1] / cobranza[0] * 100) if cobranza[0] > 0 else 0
@@ -300,7 +312,9 @@ class PREDICCION_VENTAS:
                     factores.append(f"🔴 Muchos agotados {pct_sin_stock:.0f}% (+5)")
             
             # 4. Diversificación (0-15 puntos)
-            clientes_activos = self.db.fetch_one("SELECT COUNT(DISTINCT cliente_id) FROM ordenes WHERE DATE(fecha) >= DATE('now', '-30 days')")
+            clientes_activos = self.db.fetch_one(
+                "SELECT COUNT(DISTINCT cliente_id) FROM ordenes WHERE fecha_entrada >= ?", (HACE_DIAS(30),)
+            )
             if clientes_activos[0] >= 20:
                 score += 15
                 factores.append("✓ Buena diversificación de clientes (+15)")
@@ -312,7 +326,9 @@ class PREDICCION_VENTAS:
                 factores.append("🔴 Alta dependencia de pocos clientes (+5)")
             
             # 5. Cumplimiento (0-15 puntos)
-            ordenes_pendientes = self.db.fetch_one("SELECT COUNT(*) FROM ordenes WHERE estado = 'PENDIENTE'")
+            pendientes = CANTIDAD_EN_ESTADO(self.db, 'ordenes', 'Pendiente')
+            ordenes_pendientes = (pendientes,) if pendientes is not None else self.db.fetch_one(
+                "SELECT COUNT(*) FROM ordenes WHERE UPPER(estado) = 'PENDIENTE'")
             if ordenes_pendientes[0] <= 5:
                 score += 15
                 factores.append("✓ Bajo nivel de órdenes pendientes (+15)")
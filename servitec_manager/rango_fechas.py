@@ -0,0 +1,100 @@
+"""
+RANGOS DE FECHAS PARA CONSULTAS
+Las fechas se guardan como texto 'YYYY-MM-DD HH:MM:SS', que ordena igual que la fecha.
+Un día o un período se filtra comparando la columna tal cual contra dos límites,
+con el inicio incluido y el fin excluido: [inicio, fin).
+
+    DATE(o.fecha_entrada) = ?                      -> recorre toda la tabla
+    o.fecha_entrada >= ? AND o.fecha_entrada < ?   -> rango sobre idx_ordenes_fecha_entrada
+
+Con la función sobre la columna SQLite no puede usar el índice. Además el fin
+exclusivo corrige el BETWEEN '2025-01-01' AND '2025-01-31', que dejaba fuera todo
+lo del día 31 posterior a las 00:00:00.
+
+Uso:
+    condicion, parámetros = PREDICADO_RANGO("o.fecha_cierre", *LIMITES_DIA())
+    bd.OBTENER_TODOS(f"SELECT ... WHERE {condicion} AND o.estado = ?", (*parámetros, 'Entregado'))
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+FORMATO_DIA = "%Y-%m-%d"
+
+
+def HOY():
+    """
+    Fecha actual en el mismo reloj que date('now') de SQLite (UTC), que es con
+    el que se guardan fecha_entrada, fecha_cierre y ventas.fecha (datetime('now'))
+    """
+    return datetime.now(timezone.utc).date()
+
+
+def _dia(valor):
+    """date a partir de date, datetime o texto 'YYYY-MM-DD[ HH:MM:SS]'"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(str(valor).strip()[:10], FORMATO_DIA).date()
+
+
+def LIMITES_DIAS(desde, hasta=None):
+    """
+    Límites [inicio, fin) que cubren los días desde..hasta, ambos completos
+
+    Args:
+        desde: Primer día incluido (date, datetime o 'YYYY-MM-DD')
+        hasta: Último día incluido (None = solo `desde`)
+
+    Returns:
+        ('YYYY-MM-DD', 'YYYY-MM-DD') con el fin en el día siguiente a `hasta`
+    """
+    inicio = _dia(desde)
+    fin = _dia(hasta) if hasta is not None else inicio
+    return inicio.strftime(FORMATO_DIA), (fin + timedelta(days=1)).strftime(FORMATO_DIA)
+
+
+def LIMITES_DIA(dia=None):
+    """Límites de un día completo (None = hoy)"""
+    return LIMITES_DIAS(dia if dia is not None else HOY())
+
+
+def LIMITES_ULTIMOS_DIAS(dias, hoy=None):
+    """
+    Límites desde hace `dias` días hasta hoy incluido
+    Equivale a DATE(col) >= DATE('now', '-N days') sin la función sobre la columna
+    """
+    hoy = _dia(hoy) if hoy is not None else HOY()
+    return LIMITES_DIAS(hoy - timedelta(days=dias), hoy)
+
+
+def HACE_DIAS(dias, hoy=None):
+    """
+    Inicio del día de hace `dias` días, para "más antiguo que":
+    DATE(col) < DATE('now', '-N days')  ->  col < HACE_DIAS(N)
+    """
+    hoy = _dia(hoy) if hoy is not None else HOY()
+    return (hoy - timedelta(days=dias)).strftime(FORMATO_DIA)
+
+
+def PREDICADO_RANGO(columna, inicio=None, fin=None):
+    """
+    Condición SQL sobre la columna sin funciones (puede usar su índice)
+
+    Args:
+        columna: Columna a filtrar (ej. "o.fecha_entrada")
+        inicio: Límite inferior incluido (None = sin límite)
+        fin: Límite superior excluido (None = sin límite)
+
+    Returns:
+        (condición, parámetros); "1" y () si no hay límites
+    """
+    condiciones = []
+    parámetros = []
+    if inicio is not None:
+        condiciones.append(f"{columna} >= ?")
+        parámetros.append(inicio)
+    if fin is not None:
+        condiciones.append(f"{columna} < ?")
+        parámetros.append(fin)
+    return (" AND ".join(condiciones) or "1"), tuple(parámetros)
@@ -160,10 +160,11 @@ def recrear_base_datos():
     if clientes:
         print(f"📥 Restaurando {len(clientes)} clientes...")
         # Verificar si tienen columna 'rut' o 'cedula'
-        if len(clientes[0]) == 6:  # id, cedula, nombre, telefono, email, fecha_creacion
+        # id, cedula, nombre, telefono, email, fecha_creacion (+ rut_normalizado generado, se omite)
+        if len(clientes[0]) in (6, 7):
             cursor_new.executemany(
                 "INSERT INTO clientes VALUES (?, ?, ?, ?, ?, ?)",
-                clientes
+                (c[:6] for c in clientes)
             )
         else:
             print("⚠️ Estructura de clientes no compatible")
@@ -6,6 +6,8 @@ Análisis detallado de ventas, ganancias, márgenes y comparativos
 from datetime import datetime, timedelta
 import statistics
 
+from rango_fechas import HACE_DIAS, LIMITES_DIAS, PREDICADO_RANGO
+
 
 class REPORTES_AVANZADOS:
     """Generador de reportes analíticos avanzados"""
@@ -17,14 +19,20 @@ class REPORTES_AVANZADOS:
         """
         self.db = db_gestor
     
+    @staticmethod
+    def _PERIODO(columna, fecha_inicio, fecha_fin):
+        """Condición y parámetros para los días fecha_inicio..fecha_fin completos (sin DATE() sobre la columna)"""
+        return PREDICADO_RANGO(columna, *LIMITES_DIAS(fecha_inicio, fecha_fin))
+    
     # --- 1. REPORTES DE VENTAS ---
     
     def OBTENER_REPORTE_VENTAS_PERÍODO(self, fecha_inicio, fecha_fin):
         """Reporte completo de ventas en período"""
         try:
+            condicion, limites = self._PERIODO("fecha_entrada", fecha_inicio, fecha_fin)
             ventas = self.db.fetch_all(
-                "SELECT id, cliente_id, presupuesto_inicial, abono, estado, fecha_entrada FROM ordenes WHERE fecha_entrada BETWEEN ? AND ? ORDER BY fecha_entrada DESC",
-                (fecha_inicio, fecha_fin)
+                f"SELECT id, cliente_id, presupuesto_inicial, abono, estado, fecha_entrada FROM ordenes WHERE {condicion} ORDER BY fecha_entrada DESC",
+                limites
             )
             
             total_ventas = sum(v[2] for v in ventas)  # presupuesto_inicial
@@ -58,9 +66,10 @@ class REPORTES_AVANZADOS:
     def OBTENER_REPORTE_VENTAS_DIARIAS(self, fecha_inicio, fecha_fin):
         """Desglose de ventas por día"""
         try:
+            condicion, limites = self._PERIODO("fecha_entrada", fecha_inicio, fecha_fin)
             ventas = self.db.fetch_all(
-                "SELECT DATE(fecha_entrada) as fecha, SUM(presupuesto_inicial) as total, COUNT(*) as cantidad FROM ordenes WHERE fecha_entrada BETWEEN ? AND ? GROUP BY DATE(fecha_entrada) ORDER BY fecha DESC",
-                (fecha_inicio, fecha_fin)
+                f"SELECT DATE(fecha_entrada) as fecha, SUM(presupuesto_inicial) as total, COUNT(*) as cantidad FROM ordenes WHERE {condicion} GROUP BY DATE(fecha_entrada) ORDER BY fecha DESC",
+                limites
             )
             
             resultado = []
@@ -84,9 +93,10 @@ class REPORTES_AVANZADOS:
         """Ventas y comisiones por técnico"""
         try:
             # Obtener comisiones por técnico
+            condicion, limites = self._PERIODO("fecha", fecha_inicio, fecha_fin)
             comisiones = self.db.fetch_all(
-                "SELECT tecnico, COUNT(*) as cantidad, SUM(comision) as total_comisiones FROM comisiones WHERE fecha BETWEEN ? AND ? GROUP BY tecnico ORDER BY total_comisiones DESC",
-                (fecha_inicio, fecha_fin)
+                f"SELECT tecnico, COUNT(*) as cantidad, SUM(comision) as total_comisiones FROM comisiones WHERE {condicion} GROUP BY tecnico ORDER BY total_comisiones DESC",
+                limites
             )
             
             resultado = []
@@ -112,23 +122,26 @@ class REPORTES_AVANZADOS:
         """Análisis de ganancias y márgenes"""
         try:
             # Ventas
+            condicion, limites = self._PERIODO("fecha_entrada", fecha_inicio, fecha_fin)
             ventas = self.db.fetch_one(
-                "SELECT SUM(presupuesto_inicial) as total FROM ordenes WHERE fecha_entrada BETWEEN ? AND ?",
-                (fecha_inicio, fecha_fin)
+                f"SELECT SUM(presupuesto_inicial) as total FROM ordenes WHERE {condicion}",
+                limites
             )
             total_ventas = ventas[0] if ventas[0] else 0
             
             # Costos de servicios (mano de obra)
+            condicion, limites = self._PERIODO("fecha", fecha_inicio, fecha_fin)
             costos_mo = self.db.fetch_one(
-                "SELECT SUM(comision) as total FROM comisiones WHERE fecha BETWEEN ? AND ?",
-                (fecha_inicio, fecha_fin)
+                f"SELECT SUM(comision) as total FROM comisiones WHERE {condicion}",
+                limites
             )
             total_mo = costos_mo[0] if costos_mo[0] else 0
             
             # Gastos operacionales
+            condicion, limites = self._PERIODO("fecha", fecha_inicio, fecha_fin)
             gastos = self.db.fetch_one(
-                "SELECT SUM(monto) as total FROM gastos_operacionales WHERE fecha BETWEEN ? AND ?",
-                (fecha_inicio, fecha_fin)
+                f"SELECT SUM(monto) as total FROM gastos_operacionales WHERE {condicion}",
+                limites
             )
             total_gastos = gastos[0] if gastos[0] else 0
             
@@ -136,9 +149,10 @@ class REPORTES_AVANZADOS:
             costos_productos = self._CALCULAR_COSTOS_PRODUCTOS(fecha_inicio, fecha_fin)
             
             # Utilidad bruta calculada por trigger (ya incluye todos los costos: repuestos, servicios)
+            condicion, limites = self._PERIODO("fecha_cierre", fecha_inicio, fecha_fin)
             utilidad = self.db.fetch_one(
-                "SELECT COALESCE(SUM(utilidad_bruta), 0) as total FROM ordenes WHERE fecha_cierre BETWEEN ? AND ? AND fecha_cierre IS NOT NULL AND estado = 'Entregado'",
-                (fecha_inicio, fecha_fin)
+                f"SELECT COALESCE(SUM(utilidad_bruta), 0) as total FROM ordenes WHERE {condicion} AND estado = 'Entregado'",
+                limites
             )
             ganancia_bruta = utilidad[0] if utilidad[0] else 0
             
@@ -173,9 +187,10 @@ class REPORTES_AVANZADOS:
         """Calcula costo de productos vendidos"""
         try:
             # Buscar ventas con detalles de productos
+            condicion, limites = self._PERIODO("fecha", fecha_inicio, fecha_fin)
             costos = self.db.fetch_one(
-                "SELECT COALESCE(SUM(costo_unitario * cantidad), 0) FROM detalles_ventas WHERE fecha BETWEEN ? AND ?",
-                (fecha_inicio, fecha_fin)
+                f"SELECT COALESCE(SUM(costo_unitario * cantidad), 0) FROM detalles_ventas WHERE {condicion}",
+                limites
             )
             return costos[0] if costos[0] else 0
         except:
@@ -271,7 +286,7 @@ class REPORTES_AVANZADOS:
         try:
             # Órdenes pendientes sin cobro
             pendientes = self.db.fetch_one(
-                "SELECT COUNT(*) FROM ordenes WHERE estado = 'PENDIENTE' AND DATE(fecha_entrada) < DATE('now', '-15 days')"
+                "SELECT COUNT(*) FROM ordenes WHERE estado = 'PENDIENTE' AND fecha_entrada < ?", (HACE_DIAS(15),)
             )
             if pendientes[0] > 5:
                 alertas.append(f"⚠️ CRÍTICO: {pendientes[0]} órdenes pendientes vencidas (>15 días)")
@@ -292,7 +307,7 @@ class REPORTES_AVANZADOS:
             
             # Técnicos sin actividad
             inactivos = self.db.fetch_one(
-                "SELECT COUNT(DISTINCT tecnico) FROM comisiones WHERE DATE(fecha) < DATE('now', '-7 days')"
+                "SELECT COUNT(DISTINCT tecnico) FROM comisiones WHERE fecha < ?", (HACE_DIAS(7),)
             )
             if inactivos[0] > 0:
                 alertas.append(f"⚠️ ALERTA: {inactivos[0]} técnicos sin actividad en 7 días")
@@ -0,0 +1,180 @@
+"""
+RESPALDO EN CALIENTE DE LA BASE DE DATOS
+Copia la base con la API de backup de SQLite mientras la aplicación sigue operando:
+
+- La copia avanza por bloques de páginas con una pausa entre pasos, así no acapara
+  el disco ni deja a la caja esperando (en WAL la lectura no bloquea al escritor)
+- Incluye lo que todavía está en el archivo -wal (copiar el .DB con shutil no lo hace)
+- La copia se verifica con PRAGMA integrity_check antes de darla por buena
+- El resultado se comprime en un .zip junto a un respaldo_info.json
+
+Uso:
+    ok, info = CREAR_RESPALDO("SERVITEC.DB", "backups/SERVITEC_BACKUP.zip",
+                              progreso=lambda mensaje, porcentaje: ...)
+"""
+
+import json
+import os
+import sqlite3
+import time
+import zipfile
+from datetime import datetime
+
+PAGINAS_POR_PASO = 256  # 1 MB por paso con páginas de 4 KB
+PAUSA_ENTRE_PASOS = 0.01  # Segundos entre pasos (cede el disco a la aplicación)
+MAX_REINICIOS = 3  # Reinicios tolerados por escrituras concurrentes antes de copiar de una vez
+BLOQUE_COMPRESION = 1024 * 1024
+ARCHIVO_INFO = "respaldo_info.json"
+
+
+class _REINICIO_RESPALDO(Exception):
+    """La copia por pasos se reinició demasiadas veces por escrituras concurrentes"""
+
+
+def _copiar(origen, destino, paginas_por_paso, pausa, progreso):
+    """
+    Ejecuta la API de backup reportando el avance
+
+    Si otra conexión escribe en la base entre dos pasos, SQLite reinicia la copia
+    desde cero. Tras MAX_REINICIOS se termina en un solo paso: en WAL eso solo fija
+    una instantánea de lectura y no bloquea las escrituras.
+    """
+    estado = {'restantes': None, 'reinicios': 0}
+
+    def avance(status, restantes, total):
+        if estado['restantes'] is not None and restantes > estado['restantes']:
+            estado['reinicios'] += 1
+            if estado['reinicios'] > MAX_REINICIOS:
+                raise _REINICIO_RESPALDO()
+        estado['restantes'] = restantes
+        if progreso and total:
+            progreso(f"Copiando páginas ({total - restantes}/{total})", int((total - restantes) * 70 / total))
+
+    try:
+        origen.backup(destino, pages=paginas_por_paso, progress=avance, sleep=pausa)
+    except _REINICIO_RESPALDO:
+        if progreso:
+            progreso("Base muy activa: copiando en un solo paso...", 0)
+        origen.backup(destino, pages=-1)
+    return estado['reinicios']
+
+
+def _verificar(conexion):
+    """PRAGMA integrity_check sobre la copia; devuelve 'ok' o el primer problema"""
+    filas = conexion.execute("PRAGMA integrity_check").fetchall()
+    return "ok" if filas == [("ok",)] else "; ".join(str(f[0]) for f in filas[:5])
+
+
+def _comprimir(ruta_bd, ruta_zip, nombre_en_zip, info, progreso):
+    """Comprime la copia por bloques (sin cargarla entera en memoria)"""
+    total = os.path.getsize(ruta_bd) or 1
+    escrito = 0
+    with zipfile.ZipFile(ruta_zip, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        with open(ruta_bd, 'rb') as entrada, zf.open(nombre_en_zip, 'w', force_zip64=True) as salida:
+            while True:
+                bloque = entrada.read(BLOQUE_COMPRESION)
+                if not bloque:
+                    break
+                salida.write(bloque)
+                escrito += len(bloque)
+                if progreso:
+                    progreso("Comprimiendo respaldo...", 80 + int(escrito * 20 / total))
+        zf.writestr(ARCHIVO_INFO, json.dumps(info, indent=2, ensure_ascii=False))
+
+
+def CREAR_RESPALDO(origen, destino, comprimir=True, verificar=True, progreso=None,
+                   paginas_por_paso=PAGINAS_POR_PASO, pausa=PAUSA_ENTRE_PASOS):
+    """
+    Crea un respaldo consistente de una base SQLite en uso
+
+    Args:
+        origen: Ruta de la base o conexión sqlite3 abierta (p. ej. una base en memoria)
+        destino: Archivo a crear (.zip si comprimir, si no una base .DB lista para abrir)
+        comprimir: Guardar la copia comprimida en un zip con respaldo_info.json
+        verificar: Ejecutar integrity_check sobre la copia antes de aceptarla
+        progreso: Función(mensaje, porcentaje) para reportar el avance
+        paginas_por_paso: Páginas copiadas por paso (-1 = todo de una vez)
+        pausa: Segundos de espera entre pasos
+
+    Returns:
+        (True, info) con ruta, bytes, páginas, duración e integridad,
+        o (False, mensaje de error). Si falla, no queda ningún archivo a medias.
+    """
+    inicio = time.perf_counter()
+    temporal = f"{destino}.tmp"
+    fuente = None
+    copia = None
+    try:
+        carpeta = os.path.dirname(os.path.abspath(destino))
+        os.makedirs(carpeta, exist_ok=True)
+        for ruta in (temporal, f"{temporal}-journal"):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+        if isinstance(origen, sqlite3.Connection):
+            fuente, nombre_origen = origen, "SERVITEC.DB"
+        else:
+            fuente = sqlite3.connect(origen, timeout=30.0, isolation_level=None)
+            fuente.execute("PRAGMA query_only=ON")
+            nombre_origen = os.path.basename(origen)
+
+        if progreso:
+            progreso("Copiando base de datos...", 0)
+        copia = sqlite3.connect(temporal, isolation_level=None)
+        reinicios = _copiar(fuente, copia, paginas_por_paso, pausa, progreso)
+
+        # La copia queda autocontenida: sin -wal al abrirla en otro equipo
+        copia.execute("PRAGMA journal_mode=DELETE")
+        paginas = copia.execute("PRAGMA page_count").fetchone()[0]
+        version_esquema = copia.execute("PRAGMA user_version").fetchone()[0]
+
+        integridad = "sin verificar"
+        if verificar:
+            if progreso:
+                progreso("Verificando integridad de la copia...", 70)
+            integridad = _verificar(copia)
+            if integridad != "ok":
+                raise sqlite3.DatabaseError(f"La copia no pasó integrity_check: {integridad}")
+        copia.close()
+        copia = None
+
+        info = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'base': nombre_origen,
+            'paginas': paginas,
+            'bytes_bd': os.path.getsize(temporal),
+            'version_esquema': version_esquema,
+            'integridad': integridad,
+            'reinicios': reinicios,
+        }
+
+        if comprimir:
+            _comprimir(temporal, temporal + ".zip", nombre_origen, info, progreso)
+            os.remove(temporal)
+            os.replace(temporal + ".zip", destino)
+        else:
+            os.replace(temporal, destino)
+
+        info['ruta'] = destino
+        info['bytes'] = os.path.getsize(destino)
+        info['segundos'] = round(time.perf_counter() - inicio, 2)
+        if progreso:
+            progreso("Respaldo completado", 100)
+        print(f"💾 Respaldo creado: {destino} ({info['bytes'] / (1024 * 1024):.2f} MB en {info['segundos']} s)")
+        return True, info
+
+    except Exception as e:
+        print(f"❌ Error al crear respaldo: {e}")
+        return False, str(e)
+
+    finally:
+        if copia is not None:
+            copia.close()
+        if fuente is not None and fuente is not origen:
+            fuente.close()
+        for ruta in (temporal, temporal + ".zip", f"{temporal}-journal"):
+            if os.path.exists(ruta):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
@@ -0,0 +1,414 @@
+"""
+RESPALDOS INCREMENTALES CON DEDUPLICACIÓN
+Cada respaldo es una copia en caliente (respaldo_bd) cortada en bloques de 64 KB.
+Los bloques se guardan comprimidos y direccionados por su SHA-256, así que un bloque
+que no cambió entre dos respaldos se guarda una sola vez: un respaldo cada pocos
+minutos solo agrega al disco las páginas que efectivamente se modificaron.
+
+Estructura del almacén (por defecto backups/incremental):
+    catalogo.db          respaldos, bloques de cada respaldo y bloques guardados
+    bloques/ab/abcd...   contenido de cada bloque (zlib)
+
+Uso:
+    almacen = ALMACEN_RESPALDOS()
+    almacen.CREAR(bd)                                   # nuevo respaldo
+    almacen.RESTAURAR("restaurada.DB", fecha="2025-12-10 18:00")
+    almacen.APLICAR_RETENCION()                         # poda + limpieza de bloques
+
+Por línea de comandos:
+    python respaldo_incremental.py listar
+    python respaldo_incremental.py crear
+    python respaldo_incremental.py restaurar "2025-12-10 18:00" RESTAURADA.DB
+    python respaldo_incremental.py podar
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+CARPETA_INCREMENTAL = os.path.join("backups", "incremental")
+BLOQUE_BYTES = 64 * 1024  # Múltiplo de cualquier tamaño de página: una página cae en un solo bloque
+NIVEL_COMPRESION = 6
+
+# Política de retención por defecto
+POLITICA_RETENCION = {
+    'todos_horas': 24,  # Se conservan todos los respaldos de las últimas 24 horas
+    'por_hora_dias': 7,  # Luego uno por hora durante 7 días
+    'por_dia_dias': 30,  # Luego uno por día hasta los 30 días
+    'por_semana_semanas': 26,  # Luego uno por semana hasta ~6 meses; lo más antiguo se descarta
+}
+
+_ESQUEMA_CATALOGO = """
+CREATE TABLE IF NOT EXISTS respaldos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha TEXT NOT NULL,
+    base TEXT,
+    bytes INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    version_esquema INTEGER,
+    integridad TEXT,
+    bloques_nuevos INTEGER DEFAULT 0,
+    bytes_nuevos INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS respaldo_bloques (
+    respaldo_id INTEGER NOT NULL,
+    posicion INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (respaldo_id, posicion)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_respaldo_bloques_hash ON respaldo_bloques(hash);
+CREATE TABLE IF NOT EXISTS bloques (
+    hash TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL,
+    bytes_comprimidos INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_respaldos_fecha ON respaldos(fecha);
+"""
+
+
+def _fecha_texto(fecha):
+    """Normaliza datetime o texto ISO ('2025-12-10 18:00', '2025-12-10T18:00:05') al formato del catálogo"""
+    if isinstance(fecha, str):
+        fecha = datetime.fromisoformat(fecha.strip())
+    return fecha.isoformat(sep=' ', timespec='seconds')
+
+
+class ALMACEN_RESPALDOS:
+    """
+    Almacén de respaldos incrementales (seguro entre hilos)
+
+    Las escrituras al almacén son en orden seguro: primero los archivos de bloque,
+    después el catálogo en una transacción. Un corte a mitad deja a lo sumo bloques
+    huérfanos, que RECOLECTAR_BLOQUES elimina.
+    """
+
+    def __init__(self, carpeta=CARPETA_INCREMENTAL, politica=None):
+        self.carpeta = carpeta
+        self.carpeta_bloques = os.path.join(carpeta, "bloques")
+        self.politica = dict(POLITICA_RETENCION, **(politica or {}))
+        os.makedirs(self.carpeta_bloques, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._catalogo = sqlite3.connect(os.path.join(carpeta, "catalogo.db"), check_same_thread=False)
+        self._catalogo.executescript(_ESQUEMA_CATALOGO)
+
+    def CERRAR(self):
+        with self._lock:
+            self._catalogo.close()
+
+    # --- BLOQUES ---
+
+    def _ruta_bloque(self, hash_bloque):
+        return os.path.join(self.carpeta_bloques, hash_bloque[:2], hash_bloque)
+
+    def _guardar_bloque(self, hash_bloque, datos):
+        """Escribe el bloque comprimido (atómico: archivo temporal + replace)"""
+        ruta = self._ruta_bloque(hash_bloque)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        comprimido = zlib.compress(datos, NIVEL_COMPRESION)
+        temporal = ruta + ".tmp"
+        with open(temporal, 'wb') as f:
+            f.write(comprimido)
+        os.replace(temporal, ruta)
+        return len(comprimido)
+
+    def _leer_bloque(self, hash_bloque):
+        """Lee, descomprime y verifica un bloque contra su hash"""
+        with open(self._ruta_bloque(hash_bloque), 'rb') as f:
+            datos = zlib.decompress(f.read())
+        if hashlib.sha256(datos).hexdigest() != hash_bloque:
+            raise ValueError(f"Bloque dañado: {hash_bloque}")
+        return datos
+
+    # --- RESPALDO ---
+
+    def CREAR(self, bd, verificar=True, progreso=None):
+        """
+        Crea un respaldo incremental de la base abierta en bd (GESTOR_BASE_DATOS)
+
+        Si la base no cambió desde el último respaldo no se registra uno nuevo.
+
+        Returns:
+            (True, info) con id, bloques totales/nuevos y bytes nuevos,
+            o (False, mensaje de error)
+        """
+        with self._lock:
+            inicio = time.perf_counter()
+            temporal = os.path.join(self.carpeta, "instantanea.tmp")
+            ok, info = bd.RESPALDAR(temporal, comprimir=False, verificar=verificar, progreso=progreso)
+            if not ok:
+                return False, info
+
+            try:
+                existentes = {h for (h,) in self._catalogo.execute("SELECT hash FROM bloques")}
+                hashes = []
+                nuevos = {}
+                bytes_nuevos = 0
+                sha_total = hashlib.sha256()
+                with open(temporal, 'rb') as f:
+                    while True:
+                        datos = f.read(BLOQUE_BYTES)
+                        if not datos:
+                            break
+                        sha_total.update(datos)
+                        hash_bloque = hashlib.sha256(datos).hexdigest()
+                        hashes.append(hash_bloque)
+                        if hash_bloque not in existentes and hash_bloque not in nuevos:
+                            comprimido = self._guardar_bloque(hash_bloque, datos)
+                            nuevos[hash_bloque] = (len(datos), comprimido)
+                            bytes_nuevos += comprimido
+                sha256 = sha_total.hexdigest()
+            finally:
+                os.remove(temporal)
+
+            ultimo = self._catalogo.execute(
+                "SELECT id, sha256 FROM respaldos ORDER BY fecha DESC, id DESC LIMIT 1"
+            ).fetchone()
+            if ultimo and ultimo[1] == sha256:
+                return True, {'id': ultimo[0], 'sin_cambios': True, 'bloques': len(hashes),
+                              'bloques_nuevos': 0, 'bytes_nuevos': 0}
+
+            with self._catalogo:
+                cursor = self._catalogo.execute(
+                    """INSERT INTO respaldos (fecha, base, bytes, sha256, version_esquema, integridad,
+                                              bloques_nuevos, bytes_nuevos)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (_fecha_texto(datetime.now()), info['base'], info['bytes'], sha256,
+                     info['version_esquema'], info['integridad'], len(nuevos), bytes_nuevos)
+                )
+                respaldo_id = cursor.lastrowid
+                self._catalogo.executemany(
+                    "INSERT OR IGNORE INTO bloques (hash, bytes, bytes_comprimidos) VALUES (?, ?, ?)",
+                    ((h, b, c) for h, (b, c) in nuevos.items())
+                )
+                self._catalogo.executemany(
+                    "INSERT INTO respaldo_bloques (respaldo_id, posicion, hash) VALUES (?, ?, ?)",
+                    ((respaldo_id, i, h) for i, h in enumerate(hashes))
+                )
+
+            resultado = {
+                'id': respaldo_id,
+                'sin_cambios': False,
+                'bloques': len(hashes),
+                'bloques_nuevos': len(nuevos),
+                'bytes_nuevos': bytes_nuevos,
+                'segundos': round(time.perf_counter() - inicio, 2),
+            }
+            print(f"💾 Respaldo incremental #{respaldo_id}: {len(nuevos)}/{len(hashes)} bloques nuevos "
+                  f"({bytes_nuevos / 1024:.1f} KB) en {resultado['segundos']} s")
+            return True, resultado
+
+    # --- CONSULTA ---
+
+    def LISTAR(self):
+        """Respaldos disponibles, del más reciente al más antiguo"""
+        with self._lock:
+            filas = self._catalogo.execute(
+                """SELECT id, fecha, base, bytes, version_esquema, integridad, bloques_nuevos, bytes_nuevos
+                   FROM respaldos ORDER BY fecha DESC, id DESC"""
+            ).fetchall()
+        campos = ('id', 'fecha', 'base', 'bytes', 'version_esquema', 'integridad', 'bloques_nuevos', 'bytes_nuevos')
+        return [dict(zip(campos, fila)) for fila in filas]
+
+    def ESTADISTICAS(self):
+        """Tamaño lógico (suma de respaldos) frente a lo realmente ocupado en disco"""
+        with self._lock:
+            respaldos, logico = self._catalogo.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM respaldos").fetchone()
+            bloques, en_disco = self._catalogo.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes_comprimidos), 0) FROM bloques").fetchone()
+        return {
+            'respaldos': respaldos,
+            'bloques': bloques,
+            'bytes_logicos': logico,
+            'bytes_en_disco': en_disco,
+            'ahorro': round(1 - en_disco / logico, 3) if logico else 0,
+        }
+
+    # --- RESTAURACIÓN ---
+
+    def RESTAURAR(self, destino, fecha=None, respaldo_id=None, verificar=True):
+        """
+        Reconstruye la base tal como estaba en un momento dado
+
+        Args:
+            destino: Archivo a crear (no debe ser la base en uso: restaurar sobre ella
+                     con la aplicación abierta la corrompería)
+            fecha: Último respaldo en o antes de esta fecha (datetime o texto ISO); None = el más reciente
+            respaldo_id: Alternativa a fecha, un respaldo concreto
+            verificar: Ejecutar integrity_check sobre la base reconstruida
+
+        Returns:
+            (True, info del respaldo usado) o (False, mensaje de error)
+        """
+        with self._lock:
+            if respaldo_id is not None:
+                fila = self._catalogo.execute(
+                    "SELECT id, fecha, bytes, sha256 FROM respaldos WHERE id = ?", (respaldo_id,)).fetchone()
+            elif fecha is not None:
+                fila = self._catalogo.execute(
+                    """SELECT id, fecha, bytes, sha256 FROM respaldos WHERE fecha <= ?
+                       ORDER BY fecha DESC, id DESC LIMIT 1""", (_fecha_texto(fecha),)).fetchone()
+            else:
+                fila = self._catalogo.execute(
+                    "SELECT id, fecha, bytes, sha256 FROM respaldos ORDER BY fecha DESC, id DESC LIMIT 1").fetchone()
+            if fila is None:
+                return False, "No hay un respaldo para esa fecha"
+            respaldo_id, fecha_respaldo, bytes_esperados, sha_esperado = fila
+            hashes = [h for (h,) in self._catalogo.execute(
+                "SELECT hash FROM respaldo_bloques WHERE respaldo_id = ? ORDER BY posicion", (respaldo_id,))]
+
+            temporal = f"{destino}.tmp"
+            try:
+                sha_total = hashlib.sha256()
+                with open(temporal, 'wb') as f:
+                    for hash_bloque in hashes:
+                        datos = self._leer_bloque(hash_bloque)
+                        sha_total.update(datos)
+                        f.write(datos)
+                if sha_total.hexdigest() != sha_esperado or os.path.getsize(temporal) != bytes_esperados:
+                    raise ValueError("La base reconstruida no coincide con el respaldo")
+
+                integridad = "sin verificar"
+                if verificar:
+                    conexion = sqlite3.connect(temporal)
+                    try:
+                        filas = conexion.execute("PRAGMA integrity_check").fetchall()
+                    finally:
+                        conexion.close()
+                    integridad = "ok" if filas == [("ok",)] else "; ".join(str(f[0]) for f in filas[:5])
+                    if integridad != "ok":
+                        raise ValueError(f"La base restaurada no pasó integrity_check: {integridad}")
+                os.replace(temporal, destino)
+            except Exception as e:
+                print(f"❌ Error al restaurar respaldo #{respaldo_id}: {e}")
+                return False, str(e)
+            finally:
+                if os.path.exists(temporal):
+                    os.remove(temporal)
+
+        print(f"✅ Respaldo #{respaldo_id} ({fecha_respaldo}) restaurado en {destino}")
+        return True, {'id': respaldo_id, 'fecha': fecha_respaldo, 'ruta': destino, 'integridad': integridad}
+
+    # --- RETENCIÓN ---
+
+    def _seleccionar_conservados(self, respaldos, ahora):
+        """
+        Aplica la política: todos los recientes, luego uno por hora, por día y por semana
+        (el más reciente de cada período). El último respaldo siempre se conserva.
+        """
+        p = self.politica
+        conservados = set()
+        periodos_vistos = set()
+        for indice, (respaldo_id, fecha) in enumerate(respaldos):  # Del más reciente al más antiguo
+            momento = datetime.fromisoformat(fecha)
+            edad = ahora - momento
+            if indice == 0 or edad <= timedelta(hours=p['todos_horas']):
+                conservados.add(respaldo_id)
+                continue
+            if edad <= timedelta(days=p['por_hora_dias']):
+                periodo = ('hora', fecha[:13])
+            elif edad <= timedelta(days=p['por_dia_dias']):
+                periodo = ('dia', fecha[:10])
+            elif edad <= timedelta(weeks=p['por_semana_semanas']):
+                periodo = ('semana', tuple(momento.isocalendar()[:2]))
+            else:
+                continue
+            if periodo not in periodos_vistos:
+                periodos_vistos.add(periodo)
+                conservados.add(respaldo_id)
+        return conservados
+
+    def APLICAR_RETENCION(self, ahora=None):
+        """
+        Elimina los respaldos que la política ya no conserva y luego los bloques sin uso
+
+        Returns:
+            dict con respaldos eliminados, bloques eliminados y bytes liberados
+        """
+        with self._lock:
+            ahora = ahora or datetime.now()
+            respaldos = self._catalogo.execute(
+                "SELECT id, fecha FROM respaldos ORDER BY fecha DESC, id DESC").fetchall()
+            conservados = self._seleccionar_conservados(respaldos, ahora)
+            eliminar = [(r[0],) for r in respaldos if r[0] not in conservados]
+            if eliminar:
+                with self._catalogo:
+                    self._catalogo.executemany("DELETE FROM respaldo_bloques WHERE respaldo_id = ?", eliminar)
+                    self._catalogo.executemany("DELETE FROM respaldos WHERE id = ?", eliminar)
+            resultado = self.RECOLECTAR_BLOQUES()
+            resultado['respaldos_eliminados'] = len(eliminar)
+            return resultado
+
+    def RECOLECTAR_BLOQUES(self):
+        """Borra los bloques que ningún respaldo referencia (y archivos huérfanos de cortes previos)"""
+        with self._lock:
+            with self._catalogo:
+                sin_uso = self._catalogo.execute(
+                    """SELECT hash, bytes_comprimidos FROM bloques
+                       WHERE hash NOT IN (SELECT hash FROM respaldo_bloques)"""
+                ).fetchall()
+                self._catalogo.executemany("DELETE FROM bloques WHERE hash = ?", ((h,) for h, _ in sin_uso))
+
+            liberados = 0
+            for hash_bloque, comprimido in sin_uso:
+                try:
+                    os.remove(self._ruta_bloque(hash_bloque))
+                    liberados += comprimido
+                except OSError:
+                    pass
+
+            # Archivos sin fila en el catálogo (escritos justo antes de un corte)
+            registrados = {h for (h,) in self._catalogo.execute("SELECT hash FROM bloques")}
+            for subcarpeta in os.listdir(self.carpeta_bloques):
+                ruta_sub = os.path.join(self.carpeta_bloques, subcarpeta)
+                if not os.path.isdir(ruta_sub):
+                    continue
+                for nombre in os.listdir(ruta_sub):
+                    if nombre not in registrados:
+                        ruta = os.path.join(ruta_sub, nombre)
+                        liberados += os.path.getsize(ruta)
+                        os.remove(ruta)
+
+            return {'bloques_eliminados': len(sin_uso), 'bytes_liberados': liberados}
+
+
+def main(argv=None):
+    """Línea de comandos: listar | crear | restaurar FECHA DESTINO | podar"""
+    argv = sys.argv[1:] if argv is None else argv
+    comando = argv[0] if argv else "listar"
+    almacen = ALMACEN_RESPALDOS()
+
+    if comando == "listar":
+        for r in almacen.LISTAR():
+            print(f"#{r['id']:>5}  {r['fecha']}  {r['bytes'] / (1024 * 1024):>8.2f} MB  "
+                  f"+{r['bloques_nuevos']} bloques ({r['bytes_nuevos'] / 1024:.1f} KB)  {r['integridad']}")
+        e = almacen.ESTADISTICAS()
+        print(f"\n{e['respaldos']} respaldos, {e['bytes_logicos'] / (1024 * 1024):.2f} MB lógicos en "
+              f"{e['bytes_en_disco'] / (1024 * 1024):.2f} MB de disco ({e['ahorro']:.0%} de ahorro)")
+    elif comando == "crear":
+        from database import GESTOR_BASE_DATOS
+        bd = GESTOR_BASE_DATOS()
+        return 0 if almacen.CREAR(bd)[0] else 1
+    elif comando == "restaurar" and len(argv) >= 3:
+        if os.path.exists(argv[2]):
+            print(f"❌ {argv[2]} ya existe: elija un archivo nuevo")
+            return 1
+        return 0 if almacen.RESTAURAR(argv[2], fecha=argv[1])[0] else 1
+    elif comando == "podar":
+        r = almacen.APLICAR_RETENCION()
+        print(f"🧹 {r['respaldos_eliminados']} respaldos y {r['bloques_eliminados']} bloques eliminados "
+              f"({r['bytes_liberados'] / 1024:.1f} KB liberados)")
+    else:
+        print(main.__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+RESÚMENES PARA DASHBOARDS
+Lectura de las tablas resumen_* (migración 8), que los triggers mantienen al día
+con cada INSERT/UPDATE/DELETE de ordenes, ventas, transacciones y pedidos:
+
+- resumen_estados: órdenes y pedidos por estado actual
+- resumen_ventas_diario: cantidad y total de ventas por día
+- resumen_ordenes_diario: órdenes ingresadas (presupuesto, abono) y cerradas por día
+- resumen_caja_diario: movimientos de caja por día, tipo y medio de pago
+- caja_sesion_totales (migración 11): cobros por medio de pago y gastos de cada turno
+
+Los días son los primeros 10 caracteres de la fecha guardada (UTC, igual que
+rango_fechas.HOY). Si la base no tiene la tabla de resumen (esquema sin migrar)
+las funciones devuelven None y el llamador usa su consulta de siempre.
+"""
+
+from migraciones import EXISTE_TABLA
+from rango_fechas import FORMATO_DIA, HOY, _dia
+
+
+def _clave_dia(dia):
+    """'YYYY-MM-DD' del día pedido (None = hoy)"""
+    return (_dia(dia) if dia is not None else HOY()).strftime(FORMATO_DIA)
+
+
+def CONTEO_ESTADOS(bd, entidad):
+    """
+    Filas (estado, cantidad) de 'ordenes' o 'pedidos', como
+    SELECT estado, COUNT(*) FROM <entidad> GROUP BY estado
+
+    Returns:
+        Lista de FILA, o None si no hay resumen
+    """
+    if not EXISTE_TABLA(bd, "resumen_estados"):
+        return None
+    return bd.OBTENER_TODOS(
+        "SELECT NULLIF(estado, '') AS estado, cantidad FROM resumen_estados "
+        "WHERE entidad = ? AND cantidad <> 0 ORDER BY estado",
+        (entidad,)
+    )
+
+
+def CANTIDAD_EN_ESTADO(bd, entidad, estado):
+    """Cantidad de órdenes/pedidos en un estado (sin distinguir mayúsculas), o None si no hay resumen"""
+    if not EXISTE_TABLA(bd, "resumen_estados"):
+        return None
+    fila = bd.OBTENER_UNO(
+        "SELECT COALESCE(SUM(cantidad), 0) FROM resumen_estados WHERE entidad = ? AND UPPER(estado) = UPPER(?)",
+        (entidad, estado)
+    )
+    return fila[0]
+
+
+def VENTAS_DEL_DIA(bd, dia=None):
+    """(cantidad, total) de las ventas del día (None = hoy), o None si no hay resumen"""
+    if not EXISTE_TABLA(bd, "resumen_ventas_diario"):
+        return None
+    fila = bd.OBTENER_UNO("SELECT cantidad, total FROM resumen_ventas_diario WHERE dia = ?", (_clave_dia(dia),))
+    return (fila[0], fila[1]) if fila else (0, 0.0)
+
+
+def ORDENES_POR_DIA(bd, desde, hasta=None):
+    """
+    Resumen de órdenes por día entre desde y hasta (ambos incluidos), solo días con movimiento
+
+    Returns:
+        Lista de FILA (dia, ingresadas, presupuesto, abono, cerradas, total_cerrado), o None si no hay resumen
+    """
+    if not EXISTE_TABLA(bd, "resumen_ordenes_diario"):
+        return None
+    condicion, parámetros = "dia >= ?", [_clave_dia(desde)]
+    if hasta is not None:
+        condicion += " AND dia <= ?"
+        parámetros.append(_clave_dia(hasta))
+    return bd.OBTENER_TODOS(
+        f"SELECT * FROM resumen_ordenes_diario WHERE {condicion} "
+        f"AND (ingresadas <> 0 OR cerradas <> 0) ORDER BY dia",
+        tuple(parámetros)
+    )
+
+
+def CAJA_DEL_DIA(bd, dia=None, tipos=None):
+    """
+    Totales por medio de pago de los movimientos de caja del día (None = hoy)
+
+    Args:
+        tipos: Tipos de transacción a sumar (None = todos)
+
+    Returns:
+        dict con cantidad, efectivo, transferencia, debito, credito y total, o None si no hay resumen
+    """
+    if not EXISTE_TABLA(bd, "resumen_caja_diario"):
+        return None
+    condicion, parámetros = "dia = ?", [_clave_dia(dia)]
+    if tipos:
+        condicion += f" AND tipo IN ({', '.join('?' * len(tipos))})"
+        parámetros += list(tipos)
+    fila = bd.OBTENER_UNO(f"""
+        SELECT COALESCE(SUM(cantidad), 0), COALESCE(SUM(efectivo), 0), COALESCE(SUM(transferencia), 0),
+               COALESCE(SUM(debito), 0), COALESCE(SUM(credito), 0), COALESCE(SUM(total), 0)
+        FROM resumen_caja_diario WHERE {condicion}
+    """, tuple(parámetros))
+    return dict(zip(('cantidad', 'efectivo', 'transferencia', 'debito', 'credito', 'total'), fila))
+
+
+def TOTALES_SESION_CAJA(bd, sesion_id):
+    """
+    Totales acumulados de un turno de caja, en una sola fila
+
+    Returns:
+        dict con cantidad_cobros, efectivo, transferencia, debito, credito, total_cobrado,
+        cantidad_gastos y total_gastos (ceros si el turno no tiene movimientos),
+        o None si no hay libro de totales
+    """
+    if not EXISTE_TABLA(bd, "caja_sesion_totales"):
+        return None
+    columnas = ('cantidad_cobros', 'efectivo', 'transferencia', 'debito', 'credito',
+                'total_cobrado', 'cantidad_gastos', 'total_gastos')
+    fila = bd.OBTENER_UNO(
+        f"SELECT {', '.join(columnas)} FROM caja_sesion_totales WHERE sesion_id = ?", (sesion_id,)
+    )
+    return dict(zip(columnas, fila if fila else (0,) * len(columnas)))
@@ -88,6 +88,7 @@ class AdminFrame(ctk.CTkFrame):
         # Sección de gestión de base de datos
         ctk.CTkLabel(right_panel, text="💾 GESTIÓN DE BASE DE DATOS", font=(Theme.FONT_FAMILY, Theme.FONT_SIZE_NORMAL, "bold"), text_color=Theme.PRIMARY).pack(anchor="w", padx=20, pady=(10,5))
         ctk.CTkButton(right_panel, text="💾 RESPALDAR BASE DE DATOS", command=self.respaldar_base_datos, fg_color="#2196F3", hover_color="#1976D2", text_color="white", height=50).pack(pady=10, fill="x", padx=20)
+        ctk.CTkButton(right_panel, text="📈 PERFIL DE CONSULTAS SQL", command=self.ver_perfil_consultas, **Theme.get_button_style("secondary"), height=40).pack(pady=5, fill="x", padx=20)
         
         # Zona peligrosa
         ctk.CTkLabel(right_panel, text="⚠️ ZONA PELIGROSA", font=(Theme.FONT_FAMILY, Theme.FONT_SIZE_NORMAL, "bold"), text_color="#FF0000").pack(anchor="w", padx=20, pady=(20,5))
@@ -154,92 +155,158 @@ class AdminFrame(ctk.CTkFrame):
                 self.app.frames['Reception'].refresh()
     
     def respaldar_base_datos(self):
-        """Crea un respaldo manual de la base de datos"""
-        try:
-            import os
-            import shutil
-            from datetime import datetime
-            from tkinter import filedialog
-            
-            db_path = 'SERVITEC.DB'
-            
-            if not os.path.exists(db_path):
-                messagebox.showerror("Error", "No se encuentra la base de datos SERVITEC.DB")
-                return
-            
-            # Crear directorio de backups si no existe
-            backup_dir = 'backups'
-            if not os.path.exists(backup_dir):
-                os.makedirs(backup_dir)
-            
-            # Generar nombre del backup
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f'SERVITEC_BACKUP_{timestamp}.DB'
-            backup_path = os.path.join(backup_dir, backup_name)
-            
-            # Preguntar si desea elegir ubicación personalizada
-            respuesta = messagebox.askyesnocancel(
-                "💾 RESPALDO DE BASE DE DATOS",
-                f"Se creará un respaldo de la base de datos.\n\n"
-                f"¿Desea elegir la ubicación del respaldo?\n\n"
-                f"• SÍ: Elegir ubicación personalizada\n"
-                f"• NO: Guardar en carpeta 'backups' predeterminada\n"
-                f"• Cancelar: Cancelar operación"
+        """Crea un respaldo manual en caliente (API de backup de SQLite, comprimido y verificado)"""
+        import os
+        import threading
+        from datetime import datetime
+        from tkinter import filedialog
+        
+        bd = self.logic.bd
+        
+        # Generar nombre del backup en la carpeta de backups predeterminada
+        backup_dir = 'backups'
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_name = f'SERVITEC_BACKUP_{timestamp}.zip'
+        backup_path = os.path.join(backup_dir, backup_name)
+        
+        # Preguntar si desea elegir ubicación personalizada
+        respuesta = messagebox.askyesnocancel(
+            "💾 RESPALDO DE BASE DE DATOS",
+            f"Se creará un respaldo de la base de datos.\n"
+            f"Puede seguir trabajando mientras se genera.\n\n"
+            f"¿Desea elegir la ubicación del respaldo?\n\n"
+            f"• SÍ: Elegir ubicación personalizada\n"
+            f"• NO: Guardar en carpeta 'backups' predeterminada\n"
+            f"• Cancelar: Cancelar operación"
+        )
+        
+        if respuesta is None:  # Cancelar
+            return
+        
+        if respuesta:  # Sí - elegir ubicación
+            custom_path = filedialog.asksaveasfilename(
+                title="Guardar respaldo como",
+                initialfile=backup_name,
+                defaultextension=".zip",
+                filetypes=[("Respaldo comprimido", "*.zip"), ("Todos los archivos", "*.*")]
             )
             
-            if respuesta is None:  # Cancelar
+            if not custom_path:  # Usuario canceló el diálogo
                 return
             
-            if respuesta:  # Sí - elegir ubicación
-                custom_path = filedialog.asksaveasfilename(
-                    title="Guardar respaldo como",
-                    initialfile=backup_name,
-                    defaultextension=".DB",
-                    filetypes=[("Base de datos", "*.DB"), ("Todos los archivos", "*.*")]
-                )
-                
-                if not custom_path:  # Usuario canceló el diálogo
-                    return
-                
-                backup_path = custom_path
-            
-            # Crear el respaldo
-            shutil.copy2(db_path, backup_path)
+            backup_path = custom_path
+        
+        # Ventana de progreso (la copia corre en segundo plano)
+        win = ctk.CTkToplevel(self)
+        win.title("💾 RESPALDANDO...")
+        win.geometry("420x140")
+        win.attributes("-topmost", True)
+        win.protocol("WM_DELETE_WINDOW", lambda: None)  # No cerrar a mitad del respaldo
+        lbl_progreso = ctk.CTkLabel(win, text="Iniciando respaldo...", text_color=Theme.TEXT_PRIMARY)
+        lbl_progreso.pack(pady=(25, 10), padx=20)
+        barra = ctk.CTkProgressBar(win, width=360, progress_color=Theme.SUCCESS)
+        barra.pack(pady=10, padx=20)
+        barra.set(0)
+        
+        def mostrar_progreso(mensaje, porcentaje):
+            if win.winfo_exists():
+                lbl_progreso.configure(text=mensaje)
+                barra.set(porcentaje / 100)
+        
+        def progreso(mensaje, porcentaje):
+            # Llamado desde el hilo del respaldo: Tk solo se toca desde el hilo principal
+            self.after(0, mostrar_progreso, mensaje, porcentaje)
+        
+        def finalizar(exito, resultado):
+            win.destroy()
+            if not exito:
+                messagebox.showerror("❌ ERROR", f"No se pudo crear el respaldo:\n\n{resultado}")
+                return
             
             # Obtener estadísticas de la base de datos
-            import sqlite3
-            conn = sqlite3.connect(db_path)
-            c = conn.cursor()
-            
-            ordenes = c.execute('SELECT COUNT(*) FROM ordenes').fetchone()[0]
-            clientes = c.execute('SELECT COUNT(*) FROM clientes').fetchone()[0]
-            usuarios = c.execute('SELECT COUNT(*) FROM usuarios').fetchone()[0]
-            ventas = c.execute('SELECT COUNT(*) FROM ventas').fetchone()[0]
-            
-            conn.close()
-            
-            # Obtener tamaño del archivo
-            file_size = os.path.getsize(backup_path)
-            size_mb = file_size / (1024 * 1024)
+            conteos = {}
+            for tabla in ('ordenes', 'clientes', 'usuarios', 'ventas'):
+                fila = bd.OBTENER_UNO(f"SELECT COUNT(*) FROM {tabla}")
+                conteos[tabla] = fila[0] if fila else 0
             
             messagebox.showinfo(
                 "✅ RESPALDO COMPLETADO",
                 f"Base de datos respaldada exitosamente.\n\n"
-                f"📁 Ubicación:\n{backup_path}\n\n"
+                f"📁 Ubicación:\n{resultado['ruta']}\n\n"
                 f"📊 Contenido respaldado:\n"
-                f"• Órdenes: {ordenes}\n"
-                f"• Clientes: {clientes}\n"
-                f"• Usuarios: {usuarios}\n"
-                f"• Ventas: {ventas}\n\n"
-                f"💾 Tamaño: {size_mb:.2f} MB\n\n"
+                f"• Órdenes: {conteos['ordenes']}\n"
+                f"• Clientes: {conteos['clientes']}\n"
+                f"• Usuarios: {conteos['usuarios']}\n"
+                f"• Ventas: {conteos['ventas']}\n\n"
+                f"💾 Tamaño: {resultado['bytes_bd'] / (1024 * 1024):.2f} MB "
+                f"({resultado['bytes'] / (1024 * 1024):.2f} MB comprimido)\n"
+                f"🔍 Integridad: {resultado['integridad']}\n\n"
                 f"🕐 Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
             )
-            
-        except Exception as e:
-            messagebox.showerror(
-                "❌ ERROR",
-                f"No se pudo crear el respaldo:\n\n{str(e)}"
-            )
+        
+        def ejecutar_respaldo():
+            exito, resultado = bd.RESPALDAR(backup_path, progreso=progreso)
+            self.after(100, lambda: finalizar(exito, resultado))
+        
+        threading.Thread(target=ejecutar_respaldo, daemon=True).start()
+    
+    def ver_perfil_consultas(self):
+        """Muestra el reporte del perfilador de consultas (activar, reiniciar, guardar)"""
+        bd = self.logic.bd
+        
+        win = ctk.CTkToplevel(self)
+        win.title("📈 PERFIL DE CONSULTAS SQL")
+        win.geometry("1100x650")
+        win.attributes("-topmost", True)
+        
+        barra = ctk.CTkFrame(win, fg_color="transparent")
+        barra.pack(fill="x", padx=10, pady=(10, 5))
+        
+        texto = ctk.CTkTextbox(win, font=("Consolas", 11), wrap="none")
+        texto.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        
+        orden_var = ctk.StringVar(value="total")
+        
+        def actualizar(*_):
+            texto.configure(state="normal")
+            texto.delete("1.0", "end")
+            if bd.PERFILADOR_ACTIVO():
+                texto.insert("1.0", bd.REPORTE_PERFIL(orden=orden_var.get(), top=50))
+            else:
+                texto.insert("1.0", "El perfilador está desactivado.\n\nPresione ACTIVAR, use el sistema normalmente y vuelva a ACTUALIZAR.")
+            texto.configure(state="disabled")
+            btn_activar.configure(text="⏸ DESACTIVAR" if bd.PERFILADOR_ACTIVO() else "▶ ACTIVAR")
+        
+        def alternar():
+            if bd.PERFILADOR_ACTIVO():
+                bd.DESACTIVAR_PERFILADOR()
+            else:
+                bd.ACTIVAR_PERFILADOR()
+            actualizar()
+        
+        def reiniciar():
+            bd.REINICIAR_PERFIL()
+            actualizar()
+        
+        def guardar():
+            from tkinter import filedialog
+            if not bd.PERFILADOR_ACTIVO():
+                return
+            ruta = filedialog.asksaveasfilename(parent=win, initialfile="perfil_consultas.json", defaultextension=".json",
+                                                filetypes=[("JSON", "*.json")])
+            if ruta and bd.GUARDAR_PERFIL(ruta):
+                messagebox.showinfo("✅ PERFIL GUARDADO", f"Perfil guardado en:\n{ruta}\n\nVer con: python perfilador_consultas.py \"{ruta}\"", parent=win)
+        
+        btn_activar = ctk.CTkButton(barra, text="▶ ACTIVAR", command=alternar, width=130, **Theme.get_button_style("primary"))
+        btn_activar.pack(side="left", padx=3)
+        ctk.CTkButton(barra, text="🔄 ACTUALIZAR", command=actualizar, width=130, **Theme.get_button_style("secondary")).pack(side="left", padx=3)
+        ctk.CTkButton(barra, text="🧹 REINICIAR", command=reiniciar, width=130, **Theme.get_button_style("secondary")).pack(side="left", padx=3)
+        ctk.CTkButton(barra, text="💾 GUARDAR", command=guardar, width=130, **Theme.get_button_style("secondary")).pack(side="left", padx=3)
+        ctk.CTkLabel(barra, text="Ordenar por:", text_color=Theme.TEXT_SECONDARY).pack(side="left", padx=(20, 5))
+        ctk.CTkComboBox(barra, values=["total", "media", "p95", "cantidad", "filas"], variable=orden_var, width=120,
+                        command=actualizar, state="readonly").pack(side="left")
+        
+        actualizar()
     
     def limpiar_base_datos(self):
         """Limpia todos los datos de la base de datos manteniendo usuarios"""
@@ -1,3 +1,4 @@
+from collections.abc import Mapping
 import customtkinter as ctk
 from .login import LoginFrame
 from .reception import ReceptionFrame
@@ -87,7 +88,7 @@ class APLICACION(ctk.CTk):
         # Separador
         ctk.CTkFrame(self.sidebar, height=1, fg_color=Theme.DIVIDER).pack(fill="x", padx=20, pady=10)
         
-        rol = str(self.usuario_actual['rol']).upper() if isinstance(self.usuario_actual, dict) else str(self.usuario_actual[3]).upper()
+        rol = str(self.usuario_actual['rol']).upper() if isinstance(self.usuario_actual, Mapping) else str(self.usuario_actual[3]).upper()
         
         # Scroll frame para menú
         menu_scroll = ctk.CTkScrollableFrame(
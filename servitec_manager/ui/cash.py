@@ -1,3 +1,4 @@
+from collections.abc import Mapping
 import customtkinter as ctk
 from tkinter import messagebox, simpledialog
 from .theme import Theme
@@ -16,7 +17,7 @@ class CashFrame(ctk.CTkFrame):
 
     def refresh_state(self):
         for w in self.main_container.winfo_children(): w.destroy()
-        user_id = self.current_user['id'] if isinstance(self.current_user, dict) else self.current_user[0]
+        user_id = self.current_user['id'] if isinstance(self.current_user, Mapping) else self.current_user[0]
         session = self.logic.cash.get_active_session(user_id)
         if session: self.show_close_ui(session)
         else: self.show_open_ui()
@@ -35,14 +36,14 @@ class CashFrame(ctk.CTkFrame):
     def open_shift(self):
         try:
             monto = float(self.entry_start.get())
-            user_id = self.current_user['id'] if isinstance(self.current_user, dict) else self.current_user[0]
+            user_id = self.current_user['id'] if isinstance(self.current_user, Mapping) else self.current_user[0]
             self.logic.cash.open_shift(user_id, monto)
             messagebox.showinfo("ÉXITO", "TURNO ABIERTO CORRECTAMENTE"); self.refresh_state()
         except: messagebox.showerror("ERROR", "INGRESE UN MONTO VÁLIDO")
 
     def show_close_ui(self, session):
         monto_inicial = session[4]
-        user_id = self.current_user['id'] if isinstance(self.current_user, dict) else self.current_user[0]
+        user_id = self.current_user['id'] if isinstance(self.current_user, Mapping) else self.current_user[0]
         sales = self.logic.cash.get_current_shift_sales(user_id)
         # sales: (Efec, Trf, Deb, Cred)
         
@@ -106,7 +107,7 @@ class CashFrame(ctk.CTkFrame):
                 LEFT JOIN transacciones t ON v.transaccion_id = t.id
                 WHERE v.usuario_id = ? AND v.fecha >= ? 
                 ORDER BY v.id DESC"""
-            user_id = self.current_user['id'] if isinstance(self.current_user, dict) else self.current_user[0]
+            user_id = self.current_user['id'] if isinstance(self.current_user, Mapping) else self.current_user[0]
             ventas_pos = self.logic.bd.OBTENER_TODOS(ventas_query, (user_id, session[2]))
         except Exception as e:
             pass
@@ -128,7 +129,7 @@ class CashFrame(ctk.CTkFrame):
             ctk.CTkLabel(sales_scroll, text="💰 VENTAS POS:", font=(Theme.FONT_FAMILY, Theme.FONT_SIZE_NORMAL, "bold"), text_color=Theme.SUCCESS, anchor="w").pack(fill="x", padx=5, pady=(5,2))
             for venta in ventas_pos:
                 # Manejar tanto tuplas como DictRow
-                if isinstance(venta, dict):
+                if isinstance(venta, Mapping):
                     vid = venta.get('id', venta[0] if len(venta) > 0 else 0)
                     fecha = venta.get('fecha', venta[1] if len(venta) > 1 else '')
                     total = venta.get('total', venta[2] if len(venta) > 2 else 0)
@@ -162,7 +163,7 @@ class CashFrame(ctk.CTkFrame):
             ctk.CTkLabel(sales_scroll, text="🔧 SERVICIOS COBRADOS:", font=(Theme.FONT_FAMILY, Theme.FONT_SIZE_NORMAL, "bold"), text_color=Theme.PRIMARY, anchor="w").pack(fill="x", padx=5, pady=(10,2))
             for servicio in servicios:
                 # Manejar tanto tuplas como DictRow
-                if isinstance(servicio, dict):
+                if isinstance(servicio, Mapping):
                     oid = servicio.get('id', servicio[0] if len(servicio) > 0 else 0)
                     equipo = servicio.get('equipo', servicio[1] if len(servicio) > 1 else '')
                     modelo = servicio.get('modelo', servicio[2] if len(servicio) > 2 else '')
@@ -202,7 +203,7 @@ class CashFrame(ctk.CTkFrame):
 
     def load_expenses(self):
         for w in self.scroll_gastos.winfo_children(): w.destroy()
-        user_id = self.current_user['id'] if isinstance(self.current_user, dict) else self.current_user[0]
+        user_id = self.current_user['id'] if isinstance(self.current_user, Mapping) else self.current_user[0]
         gastos = self.logic.cash.get_session_expenses(user_id)
         total_g = 0
         for g in gastos:
@@ -224,7 +225,7 @@ class CashFrame(ctk.CTkFrame):
         if not d or not m: return
         try:
             val = float(m)
-            user_id = self.current_user['id'] if isinstance(self.current_user, dict) else self.current_user[0]
+            user_id = self.current_user['id'] if isinstance(self.current_user, Mapping) else self.current_user[0]
             self.logic.cash.add_expense(user_id, d, val)
             self.entry_gasto_desc.delete(0, "end"); self.entry_gasto_monto.delete(0, "end")
             self.load_expenses()
@@ -276,7 +277,7 @@ class CashFrame(ctk.CTkFrame):
                 
                 if messagebox.askyesno("Confirmar", "¿Cerrar turno con estos montos?"):
                     # 1. Cerrar Turno
-                    user_id = self.current_user['id'] if isinstance(self.current_user, dict) else self.current_user[0]
+                    user_id = self.current_user['id'] if isinstance(self.current_user, Mapping) else self.current_user[0]
                     self.logic.cash.close_shift(user_id, v_efec, v_trf, v_deb, v_cred)
                     win.destroy()
                     messagebox.showinfo("Cierre Exitoso", "Turno cerrado correctamente.")
@@ -285,36 +286,41 @@ class CashFrame(ctk.CTkFrame):
                     if messagebox.askyesno("Reporte", "¿Desea generar el informe de cierre de caja?"):
                         try:
                             # Obtener datos actualizados de la sesión cerrada
-                            user_id = self.current_user['id'] if isinstance(self.current_user, dict) else self.current_user[0]
+                            user_id = self.current_user['id'] if isinstance(self.current_user, Mapping) else self.current_user[0]
                             last_session = self.logic.bd.OBTENER_UNO("SELECT * FROM caja_sesiones WHERE usuario_id = ? ORDER BY id DESC LIMIT 1", (user_id,))
                             if last_session:
-                                expenses = self.logic.bd.OBTENER_TODOS("SELECT * FROM gastos WHERE sesion_id = ?", (last_session['id'] if isinstance(last_session, dict) else last_session[0],))
-                                f_inicio = last_session['fecha_apertura'] if isinstance(last_session, dict) else last_session[2]
-                                f_fin = last_session['fecha_cierre'] if isinstance(last_session, dict) else last_session[3]
+                                expenses = self.logic.bd.OBTENER_TODOS("SELECT * FROM gastos WHERE sesion_id = ?", (last_session['id'] if isinstance(last_session, Mapping) else last_session[0],))
+                                f_inicio = last_session['fecha_apertura'] if isinstance(last_session, Mapping) else last_session[2]
+                                f_fin = last_session['fecha_cierre'] if isinstance(last_session, Mapping) else last_session[3]
                                 
-                                # Finanzas (Ordenes consolidadas) - calcular desde pagos mixtos
-                                res_t = self.logic.bd.OBTENER_UNO("SELECT SUM(COALESCE(pago_efectivo,0)), SUM(COALESCE(pago_transferencia,0)), SUM(COALESCE(pago_debito,0)), SUM(COALESCE(pago_credito,0)) FROM ordenes WHERE estado = 'Entregado' AND fecha >= ? AND fecha <= ?", (f_inicio, f_fin))
-                                # Ventas (POS)
-                                res_p = self.logic.bd.OBTENER_UNO("SELECT SUM(pago_efectivo), SUM(pago_transferencia), SUM(pago_debito), SUM(pago_credito) FROM ventas WHERE fecha >= ? AND fecha <= ?", (f_inicio, f_fin))
-                                
-                                # Acceso compatible con DictRow y tuplas
-                                def get_val(row, idx_or_key):
-                                    if row is None:
-                                        return 0
-                                    if isinstance(row, dict):
-                                        keys = list(row.keys())
-                                        return row.get(keys[idx_or_key] if isinstance(idx_or_key, int) else idx_or_key, 0) or 0
-                                    return row[idx_or_key] or 0
-                                
-                                sales_data = (
-                                    get_val(res_t, 0) + get_val(res_p, 0),
-                                    get_val(res_t, 1) + get_val(res_p, 1),
-                                    get_val(res_t, 2) + get_val(res_p, 2),
-                                    get_val(res_t, 3) + get_val(res_p, 3)
-                                )
+                                # Totales del turno: una fila del libro de caja (bases migradas)
+                                session_id = last_session['id'] if isinstance(last_session, Mapping) else last_session[0]
+                                totales = self.logic.cash.get_session_totals(session_id)
+                                if totales is not None:
+                                    sales_data = (totales['efectivo'], totales['transferencia'], totales['debito'], totales['credito'])
+                                else:
+                                    # Finanzas (Ordenes consolidadas) - calcular desde pagos mixtos
+                                    res_t = self.logic.bd.OBTENER_UNO("SELECT SUM(COALESCE(pago_efectivo,0)), SUM(COALESCE(pago_transferencia,0)), SUM(COALESCE(pago_debito,0)), SUM(COALESCE(pago_credito,0)) FROM ordenes WHERE estado = 'Entregado' AND fecha >= ? AND fecha <= ?", (f_inicio, f_fin))
+                                    # Ventas (POS)
+                                    res_p = self.logic.bd.OBTENER_UNO("SELECT SUM(pago_efectivo), SUM(pago_transferencia), SUM(pago_debito), SUM(pago_credito) FROM ventas WHERE fecha >= ? AND fecha <= ?", (f_inicio, f_fin))
+                                    
+                                    # Acceso compatible con DictRow y tuplas
+                                    def get_val(row, idx_or_key):
+                                        if row is None:
+                                            return 0
+                                        if isinstance(row, Mapping):
+                                            keys = list(row.keys())
+                                            return row.get(keys[idx_or_key] if isinstance(idx_or_key, int) else idx_or_key, 0) or 0
+                                        return row[idx_or_key] or 0
+                                    
+                                    sales_data = (
+                                        get_val(res_t, 0) + get_val(res_p, 0),
+                                        get_val(res_t, 1) + get_val(res_p, 1),
+                                        get_val(res_t, 2) + get_val(res_p, 2),
+                                        get_val(res_t, 3) + get_val(res_p, 3)
+                                    )
                                 
                                 from pdf_generator import GENERADOR_PDF
-                                session_id = last_session['id'] if isinstance(last_session, dict) else last_session[0]
                                 pdf = GENERADOR_PDF(f"cierre_caja_{session_id}.pdf")
                                 pdf.GENERAR_REPORTE_CIERRE_CAJA(pdf.filename, last_session, expenses, sales_data)
                         except Exception as e:
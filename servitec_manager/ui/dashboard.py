@@ -1,3 +1,4 @@
+from collections.abc import Mapping
 import customtkinter as ctk
 from tkinter import messagebox, Canvas
 from matplotlib.figure import Figure
@@ -356,7 +357,7 @@ class DashboardFrame(ctk.CTkFrame):
 
         for idx, o in enumerate(orders):
             # Compatibilidad con diccionarios (row_factory) y tuplas
-            if isinstance(o, dict):
+            if isinstance(o, Mapping):
                 oid = o['id']
                 equipo = o['equipo']
                 modelo = o['modelo']
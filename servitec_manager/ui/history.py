@@ -4,6 +4,8 @@ import traceback
 from .theme import Theme
 
 class HistoryFrame(ctk.CTkFrame):
+    ORDENES_POR_PAGINA = 100  # Filas por página del historial de órdenes
+
     def __init__(self, parent, logic, current_user, app_ref=None):
         super().__init__(parent, fg_color=Theme.BACKGROUND)
         self.logic = logic
@@ -78,19 +80,31 @@ class HistoryFrame(ctk.CTkFrame):
         self.load_orders()
 
     def load_orders(self, filter_txt=""):
+        """Primera página del historial con el filtro de estado y el texto buscado (filtrado en SQL)"""
         for w in self.scroll_orders.winfo_children(): w.destroy()
-        data = self.logic.reports.get_full_history_orders()
+        self._filtro_ordenes = {'estado': self.filtro_estado, 'texto': filter_txt}
+        self._btn_mas_ordenes = None
+        self._ordenes_mostradas = 0
+        self.load_more_orders(cursor=None)
+
+    def load_more_orders(self, cursor):
+        """Agrega la página que sigue a `cursor` (paginación por clave, sin recorrer las anteriores)"""
+        pagina = self.logic.reports.search_order_history(
+            estado=self._filtro_ordenes['estado'], texto=self._filtro_ordenes['texto'],
+            cursor=cursor, limite=self.ORDENES_POR_PAGINA
+        )
+        if cursor is None:
+            # El total solo viene en la primera página; las siguientes reutilizan este
+            self._filtro_ordenes['total'] = pagina['total']
+        if self._btn_mas_ordenes is not None:
+            self._btn_mas_ordenes.destroy()
+            self._btn_mas_ordenes = None
 
-        filter_txt = filter_txt.upper()
         ESTADOS = ['Pendiente', 'En Proceso', 'Reparado', 'Entregado', 'Sin solución']
         CONDICIONES = ['PENDIENTE', 'SOLUCIONADO', 'SIN SOLUCIÓN']
-        for row in data:
+        for row in pagina['filas']:
             # Índices: 0:ID, 1:FECHA, 2:CLIENTE, 3:EQUIPO, 4:TÉCNICO, 5:OBSERVACIONES, 6:ESTADO, 7:CONDICIÓN, 8:F.ENTREGA, 9:TOTAL
             oid = row[0]
-            # Filtros
-            if self.filtro_estado and row[6] != self.filtro_estado:
-                continue
-            if filter_txt and (filter_txt not in str(row[0]) and filter_txt not in str(row[2] or "") and filter_txt not in str(row[3])): continue
 
             f = ctk.CTkFrame(self.scroll_orders, **Theme.get_card_style()); f.pack(fill="x", pady=2)
             # ID
@@ -151,6 +165,16 @@ class HistoryFrame(ctk.CTkFrame):
             # Botón ver
             ctk.CTkButton(f, text="👁️", width=80, height=30, **Theme.get_button_style("secondary"), command=lambda oid=row[0]: self.show_order_detail(oid)).pack(side="left", padx=3)
 
+        self._ordenes_mostradas += len(pagina['filas'])
+        if pagina['siguiente'] is not None:
+            self._btn_mas_ordenes = ctk.CTkButton(
+                self.scroll_orders, text=f"⬇️ CARGAR MÁS ({self._ordenes_mostradas} de {self._filtro_ordenes['total']})",
+                command=lambda c=pagina['siguiente']: self.load_more_orders(c),
+                **Theme.get_button_style("secondary"), height=36)
+            self._btn_mas_ordenes.pack(pady=8)
+        elif self._ordenes_mostradas == 0:
+            ctk.CTkLabel(self.scroll_orders, text="No hay órdenes que coincidan con el filtro", text_color=Theme.TEXT_SECONDARY).pack(pady=20)
+
     def show_order_detail(self, oid):
         # Popup con detalles
         win = ctk.CTkToplevel(self)
@@ -365,7 +389,7 @@ class HistoryFrame(ctk.CTkFrame):
 
     def load_sales(self, filter_txt=""):
         for w in self.scroll_sales.winfo_children(): w.destroy()
-        data = self.logic.reports.get_full_history_sales()
+        data = self.logic.reports.iter_full_history_sales()
         
         filter_txt = filter_txt.upper()
         for row in data:
@@ -1,3 +1,4 @@
+from collections.abc import Mapping
 import customtkinter as ctk
 from tkinter import messagebox
 from .theme import Theme
@@ -293,7 +294,7 @@ class POSFrame(ctk.CTkFrame):
         
         for o in orders:
             # Manejar tanto dict como tupla
-            if isinstance(o, dict):
+            if isinstance(o, Mapping):
                 oid = o.get('id')
                 eq = o.get('equipo', 'N/A')
                 mod = o.get('modelo', 'N/A')
@@ -454,7 +455,7 @@ class POSFrame(ctk.CTkFrame):
         if not self.cart: return
         
         # 1️⃣ VALIDAR QUE CAJA/TURNO ESTÉ ABIERTO
-        user_id = self.current_user['id'] if isinstance(self.current_user, dict) else self.current_user[0]
+        user_id = self.current_user['id'] if isinstance(self.current_user, Mapping) else self.current_user[0]
         sesion_activa = self.logic.cash.get_active_session(user_id)
         if not sesion_activa:
             # Ofrecer abrir caja rápidamente
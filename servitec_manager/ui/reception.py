@@ -110,7 +110,17 @@ class ReceptionFrame(ctk.CTkFrame):
         try: return f"{int(cuerpo):,}".replace(",", ".") + "-" + dv
         except: return raw
 
-    def on_rut_focus_out(self, event): self.var_rut.set(self.format_rut_val(self.var_rut.get()))
+    def on_rut_focus_out(self, event):
+        self.var_rut.set(self.format_rut_val(self.var_rut.get()))
+        # RUT válido de un cliente existente: completar sus datos (búsqueda por índice)
+        rut = self.var_rut.get()
+        if event is None or not self.logic.clients.VALIDAR_RUT(rut): return
+        if self.selected_client_rut and self.logic.clients.NORMALIZAR_RUT(self.selected_client_rut) == self.logic.clients.NORMALIZAR_RUT(rut): return
+        cliente = self.logic.clients.get_client(rut)
+        if cliente:
+            self.var_rut.set(cliente[1]); self.var_name.set(cliente[2]); self.var_tel.set(cliente[3]); self.var_email.set(cliente[4])
+            self.selected_client_rut = cliente[1]
+            self.btn_save_client.configure(text="EDITAR")
     def on_search_focus_out(self, event):
         cur = self.var_search.get()
         if any(char.isdigit() for char in cur): self.var_search.set(self.format_rut_val(cur))
@@ -1705,6 +1715,7 @@ class ReceptionFrame(ctk.CTkFrame):
     def save_client_data(self):
         self.on_rut_focus_out(None); r = self.var_rut.get().strip(); n = self.var_name.get().strip(); t = self.var_tel.get().strip()
         if not r or not n or not t: messagebox.showwarning("FALTAN DATOS", "RUT, NOMBRE y TELÉFONO obligatorios"); return
+        if not self.logic.clients.VALIDAR_RUT(r) and not messagebox.askyesno("RUT INVÁLIDO", f"El dígito verificador de {r} no es válido.\n¿Guardar de todas formas?"): return
         if self.logic.clients.get_client(r): self.logic.clients.update_client(r, n, t, self.var_email.get()); messagebox.showinfo("OK", "Actualizado"); self.search_client()
         else: self.logic.clients.add_client(r, n, t, self.var_email.get()); messagebox.showinfo("OK", "Registrado"); self.var_search.set(r); self.search_client()
 
@@ -2059,9 +2070,6 @@ class ReceptionFrame(ctk.CTkFrame):
                     for w in self.scroll_results.winfo_children(): w.destroy()
         except Exception as e: messagebox.showerror("Error al Guardar Orden", f"Ha ocurrido un error:\n{e}")
 
-    def on_rut_focus_out(self, event):
-        self.var_rut.set(self.format_rut_val(self.var_rut.get()))
-    
     def enviar_whatsapp_cliente(self):
         """Envía mensaje de WhatsApp al cliente seleccionado"""
         if not self.logic.mensajeria:
@@ -10,8 +10,12 @@ import hashlib
 from datetime import datetime
 from pathlib import Path
 
+from database import NOMBRE_BD
+from respaldo_bd import CREAR_RESPALDO
+
 VERSION_ACTUAL = "1.0.0"
 VERSION_FILE = "version.json"
+BACKUP_BD = "base_datos.zip"  # Copia en caliente de la base dentro de cada backup
 
 class GestorActualizaciones:
     def __init__(self, ruta_base=None):
@@ -143,11 +147,20 @@ class GestorActualizaciones:
                         os.makedirs(os.path.dirname(destino), exist_ok=True)
                         shutil.copy2(origen, destino)
             
+            # Base de datos: API de backup de SQLite (segura con la aplicación abierta)
+            ruta_bd = os.path.join(self.ruta_base, NOMBRE_BD)
+            info_bd = None
+            if os.path.exists(ruta_bd):
+                ok, info_bd = CREAR_RESPALDO(ruta_bd, os.path.join(backup_path, BACKUP_BD))
+                if not ok:
+                    return False, f"Error al respaldar la base de datos: {info_bd}"
+            
             # Guardar info del backup
             backup_info = {
                 'version': self.version_actual,
                 'fecha': timestamp,
-                'ruta': backup_path
+                'ruta': backup_path,
+                'base_datos': info_bd
             }
             
             with open(os.path.join(backup_path, 'backup_info.json'), 'w', encoding='utf-8') as f:
@@ -241,7 +254,8 @@ class GestorActualizaciones:
             
             # Restaurar archivos
             for item in os.listdir(ruta_backup):
-                if item == 'backup_info.json':
+                # La base no se pisa en caliente: base_datos.zip queda para restauración manual
+                if item in ('backup_info.json', BACKUP_BD):
                     continue
                 
                 origen = os.path.join(ruta_backup, item)